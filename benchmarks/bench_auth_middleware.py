@@ -0,0 +1,125 @@
+"""
+Measure the per-request overhead of the JWT middleware in front of a trivial ASGI app.
+
+Compares the previous implementation (a BaseHTTPMiddleware dispatch that reads
+JWT_SECRET and runs jwt.decode on every request) with the pure-ASGI JWTMiddleware,
+with and without its verification cache, and for an exempt path. Requests are sent
+directly to the ASGI app, so the numbers exclude the server and network.
+
+Usage:
+    python benchmarks/bench_auth_middleware.py --requests 20000 --tokens 100
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import jwt
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from src.auth_middleware import JWTMiddleware
+
+SECRET = "benchmark-secret-of-at-least-32-bytes"
+
+async def endpoint(scope, receive, send):
+    await PlainTextResponse("ok")(scope, receive, send)
+
+async def previous_dispatch(request: Request, call_next):
+    """The middleware as it was before: configuration and a full decode on every request."""
+    jwt_secret = os.environ.get("JWT_SECRET")
+    if not jwt_secret:
+        return await call_next(request)
+    authorization = request.headers.get("Authorization")
+    token = authorization.replace("Bearer ", "") if authorization and authorization.startswith("Bearer ") else None
+    request.state.token = token
+    request.state.user = None
+    if token:
+        try:
+            payload = jwt.decode(token, jwt_secret, algorithms=["HS256"])
+            request.state.user = {"id": payload.get("sub"), "email": payload.get("email"), "name": payload.get("name")}
+        except jwt.InvalidTokenError:
+            pass
+    return await call_next(request)
+
+def make_scope(path: str, token: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+def make_receive():
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # The client stays connected until the response is complete
+        await asyncio.Event().wait()
+
+    return receive
+
+async def send(message):
+    pass
+
+async def measure(app, scopes, requests: int):
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        await app(dict(scopes[i % len(scopes)]), make_receive(), send)
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1e6
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95)), float(latencies.mean())
+
+async def run(args):
+    os.environ["JWT_SECRET"] = SECRET
+    expires = int(time.time()) + 3600
+    tokens = [
+        jwt.encode({"sub": str(i), "email": f"user{i}@example.com", "name": f"User {i}", "exp": expires}, SECRET, algorithm="HS256")
+        for i in range(args.tokens)
+    ]
+    scopes = [make_scope("/chat", token) for token in tokens]
+    exempt_scopes = [make_scope("/metrics", token) for token in tokens]
+
+    cached = JWTMiddleware(endpoint, secret=SECRET, exempt_paths=["/metrics"], cache_size=args.tokens)
+    cases = [
+        ("no middleware", endpoint, scopes),
+        ("before: BaseHTTPMiddleware, decode", BaseHTTPMiddleware(endpoint, dispatch=previous_dispatch), scopes),
+        ("after: ASGI, cache disabled", JWTMiddleware(endpoint, secret=SECRET, cache_size=0), scopes),
+        ("after: ASGI, cached", cached, scopes),
+        ("after: ASGI, exempt path", cached, exempt_scopes),
+    ]
+
+    print(f"{args.requests} requests, {args.tokens} distinct tokens")
+    print(f"{'middleware':<38}{'p50 us':>10}{'p95 us':>10}{'mean us':>10}{'overhead us':>13}")
+    baseline = None
+    for name, app, case_scopes in cases:
+        await measure(app, case_scopes, min(args.requests, 1000))  # warm up
+        p50, p95, mean = await measure(app, case_scopes, args.requests)
+        baseline = mean if baseline is None else baseline
+        print(f"{name:<38}{p50:>10.1f}{p95:>10.1f}{mean:>10.1f}{mean - baseline:>13.1f}")
+    print(f"cache: {cached.stats()}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=100, help="Distinct tokens, reused round robin")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Measure the per-request overhead of building a retriever and query engine for
+every request versus reusing the ones cached by IndexManager.
+
+The index is filled with synthetic chunks and queries are embedded with a mock
+model (and engines get a mock LLM), so the numbers show construction and
+retrieval cost, not model loading or inference.
+Query engines are only constructed, not run, because running them calls the LLM.
+
+Usage:
+    python benchmarks/bench_query_engine.py --chunks 20000 --requests 200
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llama_index.core import Settings
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.llms import MockLLM
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.response_synthesizers import ResponseMode
+from llama_index.core.schema import TextNode
+from src.index_manager import IndexManager
+
+WORDS = ["pump", "valve", "invoice", "policy", "server", "network", "contract", "schedule", "report", "budget"]
+
+def make_nodes(num_chunks: int, dim: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((num_chunks, dim), dtype=np.float32)
+    return [
+        TextNode(
+            text=" ".join(rng.choice(WORDS, size=40)) + f" item-{i}",
+            id_=f"node-{i}",
+            embedding=embeddings[i].tolist(),
+            metadata={"file_name": f"doc-{i // 50}.txt"},
+        )
+        for i in range(num_chunks)
+    ]
+
+def percentiles(latencies):
+    latencies = np.array(latencies) * 1000
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95))
+
+def measure(fn, requests: int):
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - start)
+    return percentiles(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--retrieval-mode", default="hybrid", choices=["hybrid", "vector"])
+    args = parser.parse_args()
+
+    index_manager = IndexManager(retrieval_mode=args.retrieval_mode)
+    # Models load lazily on first use; mark the mocks as loaded so ensure_models() keeps them
+    Settings.llm = MockLLM()
+    Settings.embed_model = MockEmbedding(embed_dim=args.dim)
+    index_manager._models_ready = True
+    index_manager._new_index()
+    nodes = make_nodes(args.chunks, args.dim)
+    index_manager.vector_store.add(nodes)
+    index_manager.sparse_index.add(nodes)
+    del nodes
+
+    top_k = args.top_k
+    mode = args.retrieval_mode
+    queries = [f"{WORDS[i % len(WORDS)]} item-{i}" for i in range(args.requests)]
+
+    def build_engine_per_request(i):
+        RetrieverQueryEngine.from_args(
+            index_manager._build_retriever(top_k, mode), llm=Settings.llm, response_mode=ResponseMode.COMPACT
+        )
+
+    def cached_engine(i):
+        index_manager.get_query_engine(similarity_top_k=top_k, retrieval_mode=mode)
+
+    def retrieve_per_request(i):
+        index_manager._build_retriever(top_k, mode).retrieve(queries[i])
+
+    def retrieve_cached(i):
+        index_manager.get_retriever(similarity_top_k=top_k, retrieval_mode=mode).retrieve(queries[i])
+
+    print(f"{args.chunks} chunks, dim {args.dim}, top-{top_k}, {mode} retrieval, {args.requests} requests")
+    print(f"{'path':<40}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, fn in [
+        ("query engine, built per request", build_engine_per_request),
+        ("query engine, cached", cached_engine),
+        ("retrieve, retriever built per request", retrieve_per_request),
+        ("retrieve, cached retriever", retrieve_cached),
+    ]:
+        fn(0)  # warm up
+        p50, p95 = measure(fn, args.requests)
+        print(f"{name:<40}{p50:>10.3f}{p95:>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compare memory use and top-k query latency of LlamaIndex's default SimpleVectorStore
+with the NumPy vector store in float32, float16 and int8.
+
+Usage:
+    python benchmarks/bench_vector_store.py --chunks 200000 --dim 384 --queries 50
+"""
+import os
+import sys
+import time
+import gc
+import argparse
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores import SimpleVectorStore
+from llama_index.core.vector_stores.types import VectorStoreQuery
+from src.vector_store import NumpyVectorStore
+
+def make_nodes(num_chunks: int, dim: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((num_chunks, dim), dtype=np.float32)
+    return [
+        TextNode(text=f"chunk {i}", id_=f"node-{i}", embedding=embeddings[i].tolist())
+        for i in range(num_chunks)
+    ]
+
+def measure(name: str, make_store, num_chunks: int, dim: int, queries, top_k: int):
+    # Nodes are created and dropped inside the traced region, so only what the
+    # store itself retains (e.g. SimpleVectorStore's embedding lists) is counted
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    store = make_store()
+    nodes = make_nodes(num_chunks, dim)
+    store.add(nodes)
+    del nodes
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = []
+    for query_embedding in queries:
+        start = time.perf_counter()
+        store.query(VectorStoreQuery(query_embedding=query_embedding, similarity_top_k=top_k))
+        latencies.append(time.perf_counter() - start)
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "store": name,
+        "memory_mb": (after - before) / (1024 * 1024),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    queries = [rng.standard_normal(args.dim).tolist() for _ in range(args.queries)]
+
+    stores = [
+        ("SimpleVectorStore", SimpleVectorStore),
+        ("NumpyVectorStore float32", lambda: NumpyVectorStore(dtype="float32")),
+        ("NumpyVectorStore float16", lambda: NumpyVectorStore(dtype="float16")),
+        ("NumpyVectorStore int8", lambda: NumpyVectorStore(dtype="int8")),
+    ]
+
+    print(f"{args.chunks} chunks, dim {args.dim}, top-{args.top_k}, {args.queries} queries")
+    print(f"{'store':<28}{'memory MB':>12}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, make_store in stores:
+        result = measure(name, make_store, args.chunks, args.dim, queries, args.top_k)
+        print(f"{result['store']:<28}{result['memory_mb']:>12.1f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}")
+
+if __name__ == "__main__":
+    main()
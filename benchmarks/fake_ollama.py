@@ -0,0 +1,88 @@
+"""
+Local stand-in for the parts of the Ollama API the backend uses (/api/tags and
+/api/chat, streaming and non-streaming), with configurable latency and token rate.
+
+Each chat request waits --latency seconds (model load and prompt evaluation), then
+generates --tokens tokens at --token-rate tokens per second. Responses carry the same
+timing fields as Ollama (durations in nanoseconds).
+
+Usage:
+    python benchmarks/fake_ollama.py --port 11435 --latency 0.2 --token-rate 50 --tokens 64
+"""
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime, timezone
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+def create_app(latency: float, token_rate: float, tokens: int, models: list) -> FastAPI:
+    app = FastAPI(title="Fake Ollama")
+
+    def timings(started: float, first_token_at: float, prompt: str, eval_count: int) -> dict:
+        now = time.perf_counter()
+        return {
+            "total_duration": int((now - started) * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": len(prompt.split()),
+            "prompt_eval_duration": int((first_token_at - started) * 1e9),
+            "eval_count": eval_count,
+            "eval_duration": int((now - first_token_at) * 1e9),
+        }
+
+    def chunk(model: str, content: str, done: bool) -> dict:
+        return {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+        }
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": name, "model": name, "size": 0, "details": {}} for name in models]}
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        model = body.get("model", models[0])
+        prompt = " ".join(message.get("content", "") for message in body.get("messages", []))
+        num_predict = body.get("options", {}).get("num_predict") or tokens
+        started = time.perf_counter()
+        await asyncio.sleep(latency)
+        first_token_at = time.perf_counter()
+        interval = 1.0 / token_rate if token_rate > 0 else 0.0
+
+        if not body.get("stream", True):
+            await asyncio.sleep(interval * num_predict)
+            text = " ".join(f"token{i}" for i in range(num_predict))
+            return {**chunk(model, text, True), "done_reason": "stop", **timings(started, first_token_at, prompt, num_predict)}
+
+        async def generate():
+            for i in range(num_predict):
+                yield json.dumps(chunk(model, f"token{i} ", False)) + "\n"
+                await asyncio.sleep(interval)
+            final = {**chunk(model, "", True), "done_reason": "stop", **timings(started, first_token_at, prompt, num_predict)}
+            yield json.dumps(final) + "\n"
+
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=50.0, help="Generated tokens per second")
+    parser.add_argument("--tokens", type=int, default=64, help="Tokens per response unless num_predict is set")
+    parser.add_argument("--models", default="mistral", help="Comma-separated model names for /api/tags")
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.token_rate, args.tokens, args.models.split(","))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
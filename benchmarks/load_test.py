@@ -0,0 +1,320 @@
+"""
+End-to-end load test of the FastAPI backend against a local fake Ollama server.
+
+Generates a synthetic corpus, starts benchmarks/fake_ollama.py and the backend with
+uvicorn, then drives /chat (plain, RAG and streaming), /query and /upload at each
+concurrency level. Reports p50/p95/p99 latency and requests/sec per scenario, the
+startup time until the first accepted request (/healthz) and until the index is
+loaded (/readyz), ingestion chunks/sec and the peak RSS of the backend process, and writes everything to a JSON file so runs can be
+compared.
+
+Usage:
+    python benchmarks/load_test.py --files 200 --concurrency 1,8,32 --requests 64
+    python benchmarks/load_test.py --scenarios chat_rag,query --app-env VECTOR_DTYPE=int8
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import shutil
+import socket
+import subprocess
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import httpx
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("chat", "chat_stream", "chat_rag", "query", "upload")
+WORDS = [
+    "pump", "valve", "invoice", "policy", "server", "network", "contract", "schedule", "report",
+    "budget", "customer", "warranty", "shipment", "firmware", "license", "audit", "backup", "sensor",
+    "pressure", "calibration", "release", "incident", "migration", "vendor", "quarterly", "forecast",
+]
+
+def make_text(rng: random.Random, num_words: int, tag: str) -> str:
+    """Random sentences with a few unique identifiers so keyword retrieval has something to find."""
+    sentences = []
+    for i in range(0, num_words, 12):
+        words = [rng.choice(WORDS) for _ in range(12)]
+        if i % 120 == 0:
+            words.append(f"{tag}-{i}")
+        sentences.append(" ".join(words).capitalize() + ".")
+    return "\n".join(" ".join(sentences[i:i + 8]) for i in range(0, len(sentences), 8))
+
+def generate_corpus(docs_dir: str, num_files: int, words_per_file: int, seed: int = 0) -> int:
+    """Write num_files synthetic text documents and return their total size in bytes."""
+    os.makedirs(docs_dir, exist_ok=True)
+    rng = random.Random(seed)
+    total = 0
+    for i in range(num_files):
+        path = os.path.join(docs_dir, f"doc-{i:05d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            total += f.write(make_text(rng, words_per_file, f"DOC{i}"))
+    return total
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_for(url: str, timeout: float, process: subprocess.Popen) -> float:
+    """Poll url until it answers 200 and return the seconds waited."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process exited with code {process.returncode} before {url} was ready")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return time.perf_counter() - start
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+def peak_rss_mb(pid: int) -> Optional[float]:
+    """Peak resident set size of a process (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    result: Dict[str, Any] = {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+    }
+    if latencies:
+        values = np.array(latencies) * 1000
+        result.update({
+            "p50_ms": float(np.percentile(values, 50)),
+            "p95_ms": float(np.percentile(values, 95)),
+            "p99_ms": float(np.percentile(values, 99)),
+            "mean_ms": float(values.mean()),
+        })
+    return result
+
+async def drive(request: Callable[[int], Any], concurrency: int, total: int) -> Dict[str, Any]:
+    """Send total requests with at most concurrency in flight; request(i) returns optional extra timings."""
+    latencies: List[float] = []
+    extras: Dict[str, List[float]] = {}
+    errors = 0
+    next_index = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in next_index:
+            start = time.perf_counter()
+            try:
+                extra = await request(i)
+                latencies.append(time.perf_counter() - start)
+                for name, value in (extra or {}).items():
+                    extras.setdefault(name, []).append(value)
+            except Exception as e:
+                errors += 1
+                if errors <= 3:
+                    print(f"  request {i} failed: {e!r}", file=sys.stderr)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result = summarize(latencies, errors, time.perf_counter() - start)
+    for name, values in extras.items():
+        values_ms = np.array(values) * 1000
+        result[f"{name}_p50_ms"] = float(np.percentile(values_ms, 50))
+        result[f"{name}_p95_ms"] = float(np.percentile(values_ms, 95))
+    return result
+
+def make_requests(client: httpx.AsyncClient, scenario: str, level: int, rng: random.Random) -> Callable[[int], Any]:
+    # Every request uses a distinct query so the answer cache does not hide the work
+    def question(i: int) -> str:
+        return f"What does the {rng.choice(WORDS)} {rng.choice(WORDS)} report say about DOC{i % 50}-0? ({level}/{i})"
+
+    async def check(response: httpx.Response, expected: int = 200):
+        if response.status_code != expected:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+    async def chat(i: int):
+        await check(await client.post("/chat", json={"messages": [{"role": "user", "content": question(i)}]}))
+
+    async def chat_rag(i: int):
+        await check(await client.post("/chat", json={"messages": [{"role": "user", "content": question(i)}], "use_rag": True}))
+
+    async def chat_stream(i: int):
+        start = time.perf_counter()
+        first_token = None
+        payload = {"messages": [{"role": "user", "content": question(i)}], "stream": True, "use_rag": True}
+        async with client.stream("POST", "/chat", json=payload) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}")
+            async for line in response.aiter_lines():
+                if first_token is None and line == "event: message":
+                    first_token = time.perf_counter() - start
+                if line == "event: error":
+                    raise RuntimeError("stream error event")
+        return {"time_to_first_token": first_token} if first_token is not None else None
+
+    async def query(i: int):
+        await check(await client.post("/query", json={"query": question(i)}))
+
+    async def upload(i: int):
+        content = make_text(rng, 400, f"UP{level}x{i}").encode("utf-8")
+        response = await client.post("/upload", files={"file": (f"bench-upload-{level}-{i}.txt", content, "text/plain")})
+        await check(response, expected=202)
+        upload.job_ids.append(response.json()["job_id"])
+
+    upload.job_ids = []
+    return {"chat": chat, "chat_rag": chat_rag, "chat_stream": chat_stream, "query": query, "upload": upload}[scenario]
+
+async def wait_for_jobs(client: httpx.AsyncClient, job_ids: List[str], timeout: float) -> Dict[str, int]:
+    """Poll the ingestion jobs until all have finished; returns counts by status."""
+    deadline = time.perf_counter() + timeout
+    pending = set(job_ids)
+    counts: Dict[str, int] = {}
+    while pending and time.perf_counter() < deadline:
+        for job_id in list(pending):
+            job = (await client.get(f"/jobs/{job_id}")).json()
+            if job["status"] in ("completed", "failed"):
+                pending.discard(job_id)
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        if pending:
+            await asyncio.sleep(0.2)
+    if pending:
+        counts["unfinished"] = len(pending)
+    return counts
+
+async def run_scenarios(base_url: str, scenarios: List[str], levels: List[int], total: int, timeout: float, seed: int):
+    results = []
+    rng = random.Random(seed)
+    limits = httpx.Limits(max_connections=max(levels) * 2, max_keepalive_connections=max(levels) * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        for scenario in scenarios:
+            for level in levels:
+                request = make_requests(client, scenario, level, rng)
+                print(f"{scenario} x{level} ...", file=sys.stderr)
+                start = time.perf_counter()
+                result = await drive(request, level, total)
+                if scenario == "upload":
+                    result["jobs"] = await wait_for_jobs(client, request.job_ids, timeout)
+                    indexed_in = time.perf_counter() - start
+                    result["indexed_seconds"] = indexed_in
+                    result["indexed_files_per_second"] = result["jobs"].get("completed", 0) / indexed_in
+                    result["last_index_run"] = (await client.get("/stats/ingestion")).json().get("last_run")
+                results.append({"scenario": scenario, "concurrency": level, **result})
+    return results
+
+def start_process(command: List[str], env: Dict[str, str], cwd: str, log_path: str) -> subprocess.Popen:
+    log = open(log_path, "w", encoding="utf-8")
+    return subprocess.Popen(command, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+def stop_process(process: Optional[subprocess.Popen]):
+    if process is not None and process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def print_summary(results: Dict[str, Any]):
+    startup = results["startup"]
+    ingestion = startup.get("ingestion") or {}
+    print(f"startup: first request {startup['first_request_seconds']:.2f}s, ready {startup['ready_seconds']:.2f}s, initial ingestion {ingestion.get('chunks_per_second', 0):.1f} chunks/s "
+          f"({ingestion.get('chunks', 0)} chunks), peak RSS {results.get('peak_rss_mb') or 0:.0f} MB")
+    print(f"{'scenario':<14}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for row in results["scenarios"]:
+        print(f"{row['scenario']:<14}{row['concurrency']:>6}{row['requests_per_second']:>10.1f}"
+              f"{row.get('p50_ms', 0):>10.1f}{row.get('p95_ms', 0):>10.1f}{row.get('p99_ms', 0):>10.1f}{row['errors']:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=100, help="Documents in the synthetic corpus")
+    parser.add_argument("--words", type=int, default=800, help="Words per document")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=64, help="Requests per scenario and concurrency level")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake Ollama seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="Fake Ollama tokens per second")
+    parser.add_argument("--tokens", type=int, default=32, help="Fake Ollama tokens per response")
+    parser.add_argument("--app", default="src.main:app", help="ASGI app to benchmark")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE", help="Extra environment for the backend")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Startup and per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/load_test-<time>.json)")
+    parser.add_argument("--keep", action="store_true", help="Keep the working directory with corpus, index and logs")
+    args = parser.parse_args()
+
+    scenarios = [scenario for scenario in args.scenarios.split(",") if scenario]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {sorted(unknown)}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    workdir = tempfile.mkdtemp(prefix="assistant-bench-")
+    docs_dir = os.path.join(workdir, "docs")
+    corpus_bytes = generate_corpus(docs_dir, args.files, args.words, args.seed)
+    print(f"Generated {args.files} documents ({corpus_bytes / 1e6:.1f} MB) in {docs_dir}", file=sys.stderr)
+
+    ollama_port, app_port = free_port(), free_port()
+    fake_ollama = backend = None
+    try:
+        fake_ollama = start_process(
+            [sys.executable, os.path.join(ROOT, "benchmarks", "fake_ollama.py"), "--port", str(ollama_port),
+             "--latency", str(args.latency), "--token-rate", str(args.token_rate), "--tokens", str(args.tokens)],
+            dict(os.environ), workdir, os.path.join(workdir, "fake_ollama.log")
+        )
+        wait_for(f"http://127.0.0.1:{ollama_port}/api/tags", 30, fake_ollama)
+
+        env = {
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])),
+            "OLLAMA_BASE_URL": f"http://127.0.0.1:{ollama_port}",
+            "DOCS_PATH": docs_dir,
+            "INDEX_PERSIST_DIR": os.path.join(workdir, "index_storage"),
+        }
+        env.update(item.split("=", 1) for item in args.app_env)
+        # The backend's cwd is the working directory, so its app.log stays out of the repo
+        backend = start_process(
+            [sys.executable, "-m", "uvicorn", args.app, "--host", "127.0.0.1", "--port", str(app_port), "--log-level", "warning"],
+            env, workdir, os.path.join(workdir, "backend.log")
+        )
+        base_url = f"http://127.0.0.1:{app_port}"
+        first_request_seconds = wait_for(f"{base_url}/healthz", args.timeout, backend)
+        ready_seconds = first_request_seconds + wait_for(f"{base_url}/readyz", args.timeout, backend)
+        ingestion = httpx.get(f"{base_url}/stats/ingestion", timeout=10).json().get("last_run")
+
+        scenario_results = asyncio.run(run_scenarios(base_url, scenarios, levels, args.requests, args.timeout, args.seed))
+        results = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "config": {**vars(args), "corpus_bytes": corpus_bytes},
+            "startup": {"first_request_seconds": first_request_seconds, "ready_seconds": ready_seconds, "ingestion": ingestion},
+            "scenarios": scenario_results,
+            "peak_rss_mb": peak_rss_mb(backend.pid),
+        }
+    finally:
+        stop_process(backend)
+        stop_process(fake_ollama)
+        if args.keep:
+            print(f"Kept working directory {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results", f"load_test-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print_summary(results)
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
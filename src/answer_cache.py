@@ -0,0 +1,203 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class AnswerCache:
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600.0,
+        semantic_threshold: Optional[float] = None,
+        embed_fn: Optional[Callable[[str], List[float]]] = None,
+    ):
+        """
+        Two-tier cache for query answers and retrieval results.
+
+        The exact tier is an LRU keyed on the normalized query, model, temperature,
+        index version and any request options (such as top-k). The optional semantic tier serves an entry whose query embedding
+        has a cosine similarity of at least semantic_threshold with the new query.
+
+        Args:
+            max_entries: Maximum number of cached entries (default: 1024)
+            ttl_seconds: Seconds an entry stays valid (default: 3600.0)
+            semantic_threshold: Minimum cosine similarity for a semantic hit (default: None, disabled)
+            embed_fn: Function returning the embedding of a query, required for the semantic tier
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold if embed_fn is not None else None
+        self.embed_fn = embed_fn
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        # Recently computed query embeddings, so a miss followed by put() embeds once
+        self._embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._exact_hits = 0
+        self._semantic_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Lower-case and collapse whitespace so trivially different queries share a key."""
+        return re.sub(r"\s+", " ", query).strip().lower()
+
+    def _key(
+        self,
+        kind: str,
+        normalized: str,
+        model: Optional[str],
+        temperature: Optional[float],
+        index_version: Hashable,
+        options: Tuple,
+    ) -> Tuple:
+        return (kind, normalized, model, temperature, index_version, options)
+
+    def get(
+        self,
+        kind: str,
+        query: str,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        index_version: Hashable = 0,
+        options: Tuple = (),
+    ) -> Optional[Any]:
+        """
+        Return a cached value, or None on a miss.
+
+        index_version is the index's version, or an (index id, version) tuple when several
+        indexes share the cache; options holds any other parameters the value depends on.
+        """
+        normalized = self.normalize(query)
+        key = self._key(kind, normalized, model, temperature, index_version, options)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry["expires_at"] > now:
+                    self._entries.move_to_end(key)
+                    self._exact_hits += 1
+                    return entry["value"]
+                del self._entries[key]
+                self._evictions += 1
+
+        if self.semantic_threshold is not None:
+            embedding = self._embed(normalized)
+            with self._lock:
+                match = self._find_similar(key, embedding, now)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self._semantic_hits += 1
+                    return self._entries[match]["value"]
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(
+        self,
+        kind: str,
+        query: str,
+        value: Any,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        index_version: Hashable = 0,
+        options: Tuple = (),
+    ):
+        """Cache a value, evicting the least recently used entries beyond max_entries."""
+        normalized = self.normalize(query)
+        key = self._key(kind, normalized, model, temperature, index_version, options)
+        embedding = self._embed(normalized) if self.semantic_threshold is not None else None
+
+        with self._lock:
+            self._entries[key] = {
+                "value": value,
+                "embedding": embedding,
+                "expires_at": time.monotonic() + self.ttl_seconds,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def _embed(self, normalized: str) -> np.ndarray:
+        with self._lock:
+            embedding = self._embeddings.get(normalized)
+            if embedding is not None:
+                self._embeddings.move_to_end(normalized)
+                return embedding
+
+        vector = np.asarray(self.embed_fn(normalized), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        embedding = vector / norm if norm > 0 else vector
+
+        with self._lock:
+            self._embeddings[normalized] = embedding
+            while len(self._embeddings) > self.max_entries:
+                self._embeddings.popitem(last=False)
+        return embedding
+
+    def _find_similar(self, key: Tuple, embedding: np.ndarray, now: float) -> Optional[Tuple]:
+        """Find the most similar live entry with the same kind, model, temperature, index version and options."""
+        kind, _, model, temperature, index_version, options = key
+        candidates = [
+            candidate for candidate, entry in self._entries.items()
+            if entry["embedding"] is not None
+            and entry["expires_at"] > now
+            and candidate[0] == kind
+            and candidate[2:] == (model, temperature, index_version, options)
+        ]
+        if not candidates:
+            return None
+
+        matrix = np.stack([self._entries[candidate]["embedding"] for candidate in candidates])
+        scores = matrix @ embedding
+        best = int(np.argmax(scores))
+        if scores[best] >= self.semantic_threshold:
+            return candidates[best]
+        return None
+
+    def clear(self, index_id: Optional[Hashable] = None):
+        """
+        Drop cached entries because an index changed.
+
+        With index_id, only the entries of that index (an (index id, version) tuple as
+        index_version) are dropped, so other indexes sharing the cache keep theirs.
+        """
+        with self._lock:
+            if index_id is None:
+                keys = list(self._entries)
+            else:
+                keys = [
+                    key for key in self._entries
+                    if isinstance(key[4], tuple) and key[4] and key[4][0] == index_id
+                ]
+            if keys:
+                self._invalidations += 1
+            for key in keys:
+                del self._entries[key]
+        logger.debug("Answer cache invalidated" if index_id is None else f"Answer cache invalidated for index {index_id!r}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            lookups = self._exact_hits + self._semantic_hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "semantic_threshold": self.semantic_threshold,
+                "exact_hits": self._exact_hits,
+                "semantic_hits": self._semantic_hits,
+                "misses": self._misses,
+                "hit_rate": (self._exact_hits + self._semantic_hits) / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
@@ -31,9 +31,8 @@ docs_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "docs")
 doc_loader = DocumentLoader(docs_path)
 index_manager = IndexManager()
 
-# Load and index documents
-documents = doc_loader.load_documents()
-index_manager.create_index(documents)
+# Index the documents file by file through the ingestion pipeline
+index_manager.load_or_create_index(doc_loader)
 
 # Setup query engine
 query_manager = QueryManager(index_manager.get_query_engine())
@@ -1,62 +1,137 @@
-import os
+import time
+import hashlib
 import jwt
+from collections import OrderedDict
 from fastapi import Request, HTTPException
-from typing import Optional
+from typing import Any, Dict, Iterable, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+AUTHORIZATION_HEADER = b"authorization"
+
 # Middleware to verify JWT tokens
 # This doesn't enforce authentication but validates tokens if present
 class JWTMiddleware:
-    async def __call__(self, request: Request, call_next):
-        # Get JWT secret from environment variable
-        jwt_secret = os.environ.get("JWT_SECRET")
-        
-        # If no JWT_SECRET is set, skip token validation
-        if not jwt_secret:
+    """
+    ASGI middleware that verifies a Bearer token when one is sent and stores the token
+    and user in the request state (request.state.token and request.state.user).
+
+    Successful verifications are cached in a bounded LRU keyed by the token's hash until
+    the token expires, so a client reusing its token costs one dictionary lookup instead
+    of a signature check. Failed verifications are not cached. Requests to exempt_paths
+    skip verification entirely; an entry ending in "*" matches every path with that prefix.
+    """
+
+    def __init__(
+        self,
+        app,
+        secret: Optional[str] = None,
+        algorithms: Iterable[str] = ("HS256",),
+        exempt_paths: Iterable[str] = (),
+        cache_size: int = 1024,
+    ):
+        """
+        Args:
+            app: The ASGI application to wrap
+            secret: Key the tokens are signed with; without it tokens are not verified (default: None)
+            algorithms: Accepted signing algorithms (default: ("HS256",))
+            exempt_paths: Paths that are never authenticated, e.g. "/metrics" or "/static/*" (default: ())
+            cache_size: Maximum number of verified tokens kept; 0 disables the cache (default: 1024)
+        """
+        self.app = app
+        self.secret = secret
+        self.algorithms = list(algorithms)
+        self.exempt_paths = frozenset(path for path in exempt_paths if not path.endswith("*"))
+        self.exempt_prefixes = tuple(path[:-1] for path in exempt_paths if path.endswith("*"))
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, Tuple[Dict[str, Any], Optional[float]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        if not secret:
             logger.warning("JWT_SECRET is not set. Authentication is disabled.")
-            return await call_next(request)
-        
-        # Extract token from Authorization header
-        authorization = request.headers.get("Authorization")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket") or self._is_exempt(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
         token = None
-        
-        if authorization and authorization.startswith("Bearer "):
-            token = authorization.replace("Bearer ", "")
-        
+        if self.secret:
+            for name, value in scope["headers"]:
+                if name == AUTHORIZATION_HEADER:
+                    authorization = value.decode("latin-1")
+                    if authorization.startswith("Bearer "):
+                        token = authorization[7:]
+                    break
+
         # Add token info to request state for endpoint handlers to access
-        request.state.token = token
-        request.state.user = None
-        
-        # If token is present, try to validate it
-        if token:
-            try:
-                # Decode and verify token
-                payload = jwt.decode(token, jwt_secret, algorithms=["HS256"])
-                # Add user info to request state
-                request.state.user = {
-                    "id": payload.get("sub"),
-                    "email": payload.get("email"),
-                    "name": payload.get("name")
-                }
-                logger.debug(f"Authenticated user: {request.state.user['email']}")
-            except jwt.ExpiredSignatureError:
-                logger.warning("Token expired")
-                # Continue processing the request but with no valid user
-            except jwt.InvalidTokenError as e:
-                logger.warning(f"Invalid token: {str(e)}")
-                # Continue processing the request but with no valid user
-        
-        # Proceed with the request
-        return await call_next(request)
+        state = scope.setdefault("state", {})
+        state["token"] = token
+        state["user"] = self.verify(token) if token else None
+
+        await self.app(scope, receive, send)
+
+    def _is_exempt(self, path: str) -> bool:
+        return path in self.exempt_paths or (bool(self.exempt_prefixes) and path.startswith(self.exempt_prefixes))
+
+    def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return the user for a valid token, or None if it is invalid or expired."""
+        key = hashlib.sha256(token.encode()).digest()
+        cached = self._cache.get(key)
+        if cached is not None:
+            user, expires_at = cached
+            if expires_at is None or time.time() < expires_at:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return user
+            del self._cache[key]
+
+        self.misses += 1
+        try:
+            # Decode and verify token
+            payload = jwt.decode(token, self.secret, algorithms=self.algorithms)
+        except jwt.ExpiredSignatureError:
+            logger.warning("Token expired")
+            return None
+        except jwt.InvalidTokenError as e:
+            logger.warning(f"Invalid token: {str(e)}")
+            return None
+
+        user = {
+            "id": payload.get("sub"),
+            "email": payload.get("email"),
+            "name": payload.get("name"),
+            "workspace": payload.get("workspace")
+        }
+        logger.debug(f"Authenticated user: {user['email']}")
+
+        if self.cache_size > 0:
+            expires_at = payload.get("exp")
+            self._cache[key] = (user, float(expires_at) if expires_at is not None else None)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return user
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the size and hit rate of the verification cache."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": bool(self.secret),
+            "cached_tokens": len(self._cache),
+            "max_tokens": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
 
 # Optional dependency for endpoints that require authentication
 def get_current_user(request: Request) -> Optional[dict]:
-    user = request.state.user
+    user = getattr(request.state, "user", None)
     if not user:
         raise HTTPException(
             status_code=401,
             detail="Authentication required"
         )
-    return user 
\ No newline at end of file
+    return user
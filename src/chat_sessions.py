@@ -0,0 +1,203 @@
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class ChatSessionStore:
+    """
+    Server-side chat history, so /chat clients only send the new turn.
+
+    A session holds the conversation's messages (user turns name the files their
+    retrieved context came from instead of holding the context), each with its token
+    count, plus the last retrieval result and the Ollama backend that served the last
+    turn. Replaying the stored messages unchanged keeps every request's prompt an
+    extension of the earlier turns, so Ollama mostly evaluates the new turn.
+
+    Sessions are kept in an in-memory LRU of max_sessions entries. When sqlite_path is
+    set, sessions evicted from memory are written to an SQLite database and loaded back
+    on their next use, and close() writes out the resident ones so sessions survive a
+    restart. Without it an evicted session is gone. Sessions idle for more than
+    ttl_seconds expire.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl_seconds: float = 86400.0,
+        max_messages: int = 200,
+        sqlite_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            max_sessions: Sessions kept in memory (default: 1000)
+            ttl_seconds: Seconds a session may stay idle before it expires (default: 86400.0)
+            max_messages: Messages kept per session; older ones are dropped, system messages
+                are kept (default: 200)
+            sqlite_path: SQLite database evicted sessions are spilled to (default: None, discarded)
+        """
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.sqlite_path = sqlite_path
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._hits = 0
+        self._loads = 0
+        self._misses = 0
+        self._spills = 0
+        self._expired = 0
+        if sqlite_path:
+            # Rows are small and only touched on eviction and reload, so calls run inline under the lock
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions "
+                "(id TEXT PRIMARY KEY, owner TEXT NOT NULL, updated_at REAL NOT NULL, data TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def create(self, owner: str, messages: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Start a session for owner, optionally with initial messages such as a system prompt."""
+        now = time.time()
+        session = {
+            "id": uuid.uuid4().hex,
+            "owner": owner,
+            "created_at": now,
+            "updated_at": now,
+            "messages": list(messages or []),
+            "retrieval": None,
+            "backend": None,
+        }
+        with self._lock:
+            self._sessions[session["id"]] = session
+            self._evict()
+        return session
+
+    def get(self, session_id: str, owner: str) -> Optional[Dict[str, Any]]:
+        """Return a session of owner, loading it back from SQLite if it was spilled; None if unknown or expired."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                self._hits += 1
+            else:
+                session = self._load(session_id)
+                if session is None:
+                    self._misses += 1
+                    return None
+                self._loads += 1
+                self._sessions[session_id] = session
+                self._evict()
+            if time.time() - session["updated_at"] > self.ttl_seconds:
+                self._remove(session_id)
+                self._expired += 1
+                return None
+        # Unknown and foreign sessions look the same to the caller
+        if session["owner"] != owner:
+            return None
+        return session
+
+    def append(
+        self,
+        session: Dict[str, Any],
+        messages: List[Dict[str, Any]],
+        retrieval: Optional[Dict[str, Any]] = None,
+        backend: Optional[str] = None,
+    ):
+        """Add a finished turn to a session, with the retrieval it used and the backend that answered it."""
+        with self._lock:
+            session["messages"].extend(messages)
+            excess = len(session["messages"]) - self.max_messages
+            if excess > 0:
+                kept = []
+                for message in session["messages"]:
+                    if excess > 0 and message["role"] != "system":
+                        excess -= 1
+                        continue
+                    kept.append(message)
+                session["messages"] = kept
+            if retrieval is not None:
+                session["retrieval"] = retrieval
+            if backend is not None:
+                session["backend"] = backend
+            session["updated_at"] = time.time()
+            # A turn can finish after its session was evicted; put it back so the turn is not lost
+            self._sessions[session["id"]] = session
+            self._sessions.move_to_end(session["id"])
+            self._evict()
+
+    def delete(self, session_id: str, owner: str) -> bool:
+        """Delete a session of owner; returns False if it does not exist."""
+        if self.get(session_id, owner) is None:
+            return False
+        with self._lock:
+            self._remove(session_id)
+        return True
+
+    def close(self):
+        """Write the resident sessions to SQLite and close the database."""
+        if self._db is None:
+            return
+        with self._lock:
+            for session in self._sessions.values():
+                self._spill(session)
+            self._db.commit()
+            self._db.close()
+            self._db = None
+        logger.info(f"Saved {len(self._sessions)} chat sessions to {self.sqlite_path}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stored = None
+            if self._db is not None:
+                stored = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            return {
+                "resident": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "stored": stored,
+                "hits": self._hits,
+                "loads": self._loads,
+                "misses": self._misses,
+                "spills": self._spills,
+                "expired": self._expired,
+            }
+
+    def _load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _spill(self, session: Dict[str, Any]):
+        self._db.execute(
+            "INSERT OR REPLACE INTO sessions (id, owner, updated_at, data) VALUES (?, ?, ?, ?)",
+            (session["id"], session["owner"], session["updated_at"], json.dumps(session)),
+        )
+        self._spills += 1
+
+    def _remove(self, session_id: str):
+        """Drop a session from memory and SQLite (caller holds the lock)."""
+        self._sessions.pop(session_id, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            self._db.commit()
+
+    def _evict(self):
+        """Move least recently used sessions beyond max_sessions to SQLite (caller holds the lock)."""
+        if len(self._sessions) <= self.max_sessions:
+            return
+        now = time.time()
+        while len(self._sessions) > self.max_sessions:
+            _, session = self._sessions.popitem(last=False)
+            if self._db is not None and now - session["updated_at"] <= self.ttl_seconds:
+                self._spill(session)
+        if self._db is not None:
+            self._db.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl_seconds,))
+            self._db.commit()
@@ -0,0 +1,346 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from src.document_loader import DocumentLoader
+
+try:
+    from watchfiles import awatch
+except ImportError:  # Optional; the catalog polls the directory instead
+    awatch = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, every worker watches; run a single worker
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+WATCH_MODES = ("auto", "poll", "off")
+
+class DocumentCatalog:
+    """
+    In-memory catalog of the documents directory that serves /documents without
+    touching the filesystem and feeds file changes to the index.
+
+    Each entry holds the file's name, size, type, modification time and content
+    hash; the chunk count and indexing time come from the IndexManager. Changes are
+    picked up by a filesystem watcher (watchfiles) or, when that is not installed or
+    fails, by polling. A scan only stats the directory and hashes files whose size or
+    modification time changed. Changes are debounced until the directory has been
+    quiet for debounce_seconds, so a file that is still being copied is indexed once.
+    With several workers sharing the directory, only the one holding lock_path watches
+    it and indexes changes; the others rescan every poll_seconds to keep their own
+    listing current and take over if that worker exits.
+    """
+
+    def __init__(
+        self,
+        docs_path: str,
+        index_manager,
+        run: Callable[..., Awaitable[Any]],
+        on_changes: Callable[[Dict[str, str], List[str]], Awaitable[None]],
+        watch: str = "auto",
+        poll_seconds: float = 5.0,
+        debounce_seconds: float = 2.0,
+        lock_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            docs_path: Directory holding the documents
+            index_manager: IndexManager the chunk counts and indexed state are read from
+            run: Coroutine function that runs blocking work off the event loop, e.g. WorkerPool.run
+            on_changes: Coroutine function called with (new or changed files and their hashes, removed files)
+            watch: "auto" uses watchfiles when available and polls otherwise, "poll" always polls,
+                "off" disables change detection (default: "auto")
+            poll_seconds: Seconds between scans when polling (default: 5.0)
+            debounce_seconds: Quiet time after the last change before it is applied (default: 2.0)
+            lock_path: Lock file that elects the one process watching the directory (default: None, always watch)
+        """
+        if watch not in WATCH_MODES:
+            raise ValueError(f"Invalid watch mode: {watch}. Expected one of {', '.join(WATCH_MODES)}")
+        self.docs_path = docs_path
+        self.index_manager = index_manager
+        self.run = run
+        self.on_changes = on_changes
+        self.watch = watch
+        self.poll_seconds = poll_seconds
+        self.debounce_seconds = debounce_seconds
+        self.lock_path = lock_path
+        self.mode = "off"
+        self._lock_file = None
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._scans = 0
+        self._last_scan_seconds = 0.0
+        self._applied = 0
+
+    def load(self) -> Dict[str, str]:
+        """Scan and hash every file; returns the content hash of each file, keyed by name."""
+        start = time.perf_counter()
+        entries = {}
+        for file_name, stat in self._stat_files().items():
+            entries[file_name] = self._entry(file_name, stat, DocumentLoader.hash_file(os.path.join(self.docs_path, file_name)))
+        with self._lock:
+            self._entries = entries
+            self._pending.clear()
+        logger.info(f"Catalogued {len(entries)} documents in {time.perf_counter() - start:.2f}s")
+        return {file_name: entry["hash"] for file_name, entry in entries.items()}
+
+    def start(self):
+        """Start watching the directory on the running event loop, once this process holds the watcher lock."""
+        if self._tasks or self.watch == "off":
+            return
+        self._wakeup = asyncio.Event()
+        self.mode = "standby"
+        self._tasks.append(asyncio.create_task(self._run()))
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self.mode = "off"
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def record(self, file_name: str, content_hash: str):
+        """Record a file the server wrote itself (an upload), so the watcher does not queue it again."""
+        file_path = os.path.join(self.docs_path, file_name)
+        with self._lock:
+            self._entries[file_name] = self._entry(file_name, os.stat(file_path), content_hash)
+            self._pending.discard(file_name)
+
+    def forget(self, file_name: str):
+        """Drop a file the server deleted itself."""
+        with self._lock:
+            self._entries.pop(file_name, None)
+            self._pending.discard(file_name)
+
+    def get_hash(self, file_name: str) -> Optional[str]:
+        """Content hash of a catalogued file; None if it is unknown or changed since it was last hashed."""
+        with self._lock:
+            entry = self._entries.get(file_name)
+            return entry["hash"] if entry else None
+
+    def list(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        file_type: Optional[str] = None,
+        name: Optional[str] = None,
+        indexed: Optional[bool] = None,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Return the total number of matching documents and one page of them, sorted by name.
+
+        Args:
+            offset: Number of matching documents to skip (default: 0)
+            limit: Maximum number of documents returned (default: None, all)
+            file_type: Only documents of this type, e.g. "pdf" (default: None)
+            name: Only documents whose name contains this text, ignoring case (default: None)
+            indexed: Only documents whose current content is (True) or is not (False) indexed (default: None)
+        """
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda entry: entry["filename"])
+        files = self.index_manager.files
+        if file_type:
+            entries = [entry for entry in entries if entry["type"] == file_type.upper().lstrip(".")]
+        if name:
+            entries = [entry for entry in entries if name.lower() in entry["filename"].lower()]
+
+        documents = []
+        for entry in entries:
+            indexed_entry = files.get(entry["filename"])
+            is_indexed = indexed_entry is not None and indexed_entry.get("hash") == entry["hash"]
+            if indexed is not None and is_indexed != indexed:
+                continue
+            documents.append({
+                **entry,
+                "chunks": indexed_entry.get("chunks") if indexed_entry else None,
+                "indexed_at": indexed_entry.get("indexed_at") if indexed_entry else None,
+                "indexed": is_indexed,
+            })
+        end = None if limit is None else offset + limit
+        return len(documents), documents[offset:end]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "documents": len(self._entries),
+                "mode": self.mode,
+                "pending": len(self._pending),
+                "scans": self._scans,
+                "last_scan_seconds": self._last_scan_seconds,
+                "changes_applied": self._applied,
+            }
+
+    @staticmethod
+    def _entry(file_name: str, stat: os.stat_result, content_hash: Optional[str]) -> Dict[str, Any]:
+        return {
+            "filename": file_name,
+            "size": stat.st_size,
+            "type": os.path.splitext(file_name)[1][1:].upper(),
+            "modified_at": stat.st_mtime,
+            "hash": content_hash,
+        }
+
+    def _stat_files(self) -> Dict[str, os.stat_result]:
+        # Same files DocumentLoader.list_files returns, without a second stat per file
+        files = {}
+        with os.scandir(self.docs_path) as entries:
+            for entry in entries:
+                if not entry.name.startswith(".") and entry.is_file():
+                    files[entry.name] = entry.stat()
+        return files
+
+    def _scan(self) -> bool:
+        """Stat the directory and mark new, changed and removed files as pending; returns True if any were found."""
+        start = time.perf_counter()
+        stats = self._stat_files()
+        with self._lock:
+            changed = {
+                file_name for file_name, stat in stats.items()
+                if file_name not in self._entries
+                or (self._entries[file_name]["size"], self._entries[file_name]["modified_at"]) != (stat.st_size, stat.st_mtime)
+            }
+            removed = set(self._entries) - set(stats)
+            for file_name in changed:
+                # Unknown until the file is hashed again once it has settled
+                self._entries[file_name] = self._entry(file_name, stats[file_name], None)
+            for file_name in removed:
+                del self._entries[file_name]
+            self._pending |= changed | removed
+            self._scans += 1
+            self._last_scan_seconds = time.perf_counter() - start
+        return bool(changed or removed)
+
+    def _sync(self):
+        """Bring the entries up to date with the directory without queueing anything for indexing."""
+        if self._scan():
+            self._collect()
+
+    def _unindexed(self) -> Set[str]:
+        """Files whose catalogued content is not what the index holds, and indexed files that are gone."""
+        files = self.index_manager.files
+        with self._lock:
+            differ = {
+                file_name for file_name, entry in self._entries.items()
+                if file_name not in files or files[file_name].get("hash") != entry["hash"]
+            }
+            return differ | (set(files) - set(self._entries))
+
+    def _collect(self) -> Tuple[Dict[str, str], List[str]]:
+        """Hash the pending files and return the ones whose content changed, and the removed ones."""
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            entries = {file_name: self._entries.get(file_name) for file_name in pending}
+        changed, removed = {}, []
+        for file_name, entry in entries.items():
+            if entry is None:
+                removed.append(file_name)
+                continue
+            try:
+                content_hash = DocumentLoader.hash_file(os.path.join(self.docs_path, file_name))
+            except OSError:
+                # Removed or replaced since the scan; the next scan picks it up
+                continue
+            with self._lock:
+                if file_name in self._entries:
+                    self._entries[file_name]["hash"] = content_hash
+            # A touched file, or one an upload or another worker already indexed
+            if content_hash != self.index_manager.get_document_hash(file_name):
+                changed[file_name] = content_hash
+        return changed, [file_name for file_name in removed if file_name in self.index_manager.files]
+
+    async def _watch(self):
+        """Wake the scanner on filesystem events; switch to polling if the watcher fails."""
+        try:
+            async for _ in awatch(self.docs_path):
+                self._wakeup.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Filesystem watcher for {self.docs_path} failed, polling every {self.poll_seconds}s instead: {str(e)}")
+            self.mode = "poll"
+            self._wakeup.set()
+
+    def _acquire_lock(self) -> bool:
+        """Try to become the watching process; True if this process holds the watcher lock."""
+        if self.lock_path is None or fcntl is None or self._lock_file is not None:
+            return True
+        os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        # Held until close(); the OS releases it if the process exits
+        self._lock_file = lock_file
+        return True
+
+    async def _run(self):
+        # Another worker watches the same directory; embedding every change in each worker would repeat the work
+        while not self._acquire_lock():
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                # Still serve a current listing and upload dedupe; the watching worker indexes the changes
+                await self.run(self._sync)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error rescanning documents on standby: {str(e)}")
+        # Standby rescans did not queue anything; pick up whatever the previous watcher left unindexed
+        unindexed = self._unindexed()
+        with self._lock:
+            self._pending |= unindexed
+        self.mode = "watch" if self.watch == "auto" and awatch is not None else "poll"
+        if self.mode == "watch":
+            self._tasks.append(asyncio.create_task(self._watch()))
+        logger.info(f"Watching {self.docs_path} for document changes ({self.mode})")
+        # Catch up on changes made since load() or while another worker was watching
+        self._wakeup.set()
+        while True:
+            try:
+                # A watcher only wakes on events, so changes left pending by a failed attempt are retried on a timer
+                timeout = self.poll_seconds if self.mode == "poll" or self._pending else None
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                # Pending files left by a failed attempt are retried on the next wakeup
+                if not await self.run(self._scan) and not self._pending:
+                    continue
+                # Wait until a scan finds nothing new, so files still being written settle first
+                while True:
+                    await asyncio.sleep(self.debounce_seconds)
+                    self._wakeup.clear()
+                    if not await self.run(self._scan):
+                        break
+                changed, removed = await self.run(self._collect)
+                if changed or removed:
+                    logger.info(f"Documents directory changed: {len(changed)} new or modified, {len(removed)} removed")
+                    try:
+                        await self.on_changes(changed, removed)
+                    except Exception:
+                        # _collect already took them off the pending set; put them back so they are retried
+                        with self._lock:
+                            self._pending |= set(changed) | set(removed)
+                        raise
+                    self._applied += len(changed) + len(removed)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error applying document changes: {str(e)}")
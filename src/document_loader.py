@@ -1,41 +1,121 @@
 import os
-from typing import List
+import hashlib
+import logging
+from typing import List, Dict, Iterable, Iterator, Optional
 from llama_index.core import Document
 from llama_index.core import SimpleDirectoryReader
 from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.readers.file.base import default_file_metadata_func
+from llama_index.core.schema import BaseNode
+
+logger = logging.getLogger(__name__)
+
+# Same keys SimpleDirectoryReader keeps out of embedding and LLM text
+EXCLUDED_METADATA_KEYS = [
+    "file_name",
+    "file_type",
+    "file_size",
+    "creation_date",
+    "last_modified_date",
+    "last_accessed_date",
+]
 
 class DocumentLoader:
-    def __init__(self, docs_path: str = "./docs"):
+    def __init__(self, docs_path: str = "./docs", chunk_size: int = 1024, chunk_overlap: int = 20):
+        """
+        Read documents one file (and one PDF page) at a time and split them into nodes.
+
+        Args:
+            docs_path: Directory holding the documents (default: "./docs")
+            chunk_size: Chunk size used when splitting documents into nodes (default: 1024)
+            chunk_overlap: Overlap between consecutive chunks (default: 20)
+        """
         self.docs_path = docs_path
-        self.node_parser = SentenceSplitter(chunk_size=1024, chunk_overlap=20)
+        self.node_parser = SentenceSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
 
-    def load_documents(self) -> List[Document]:
-        """Load and parse documents from the specified directory."""
-        if not os.path.exists(self.docs_path):
-            raise FileNotFoundError(f"Documents directory not found: {self.docs_path}")
-        
-        try:
-            documents = SimpleDirectoryReader(self.docs_path).load_data()
-            if not documents:
-                raise ValueError(f"No documents found in {self.docs_path}")
-            
-            print(f"Loaded {len(documents)} documents from {self.docs_path}")
-            return documents
-        except Exception as e:
-            raise Exception(f"Error loading documents: {str(e)}")
+    def iter_documents(self, file_names: Optional[Iterable[str]] = None) -> Iterator[Document]:
+        """
+        Yield documents file by file, and page by page for PDFs.
+
+        Files that cannot be read are logged and skipped, so one bad file never
+        fails the whole load.
+        """
+        if file_names is None:
+            file_names = self.list_files()
+        for file_name in file_names:
+            file_path = os.path.join(self.docs_path, file_name)
+            try:
+                yield from self.iter_file_documents(file_path)
+            except Exception as e:
+                logger.error(f"Skipping unreadable document {file_name}: {str(e)}")
+
+    def iter_nodes(self, documents: Iterable[Document]) -> Iterator[BaseNode]:
+        """Split documents into nodes as they arrive, one document at a time."""
+        for document in documents:
+            yield from self.node_parser.get_nodes_from_documents([document])
+
+    @staticmethod
+    def iter_file_documents(file_path: str) -> Iterator[Document]:
+        """Yield the documents of one file; PDFs are read one page at a time."""
+        if os.path.splitext(file_path)[1].lower() != ".pdf":
+            yield from SimpleDirectoryReader(input_files=[file_path]).load_data()
+            return
+
+        from pypdf import PdfReader
+
+        metadata = default_file_metadata_func(file_path)
+        with open(file_path, "rb") as f:
+            reader = PdfReader(f)
+            page_labels = reader.page_labels
+            for page_number, page in enumerate(reader.pages):
+                try:
+                    text = page.extract_text() or ""
+                except Exception as e:
+                    logger.warning(f"Skipping unreadable page {page_number + 1} of {file_path}: {str(e)}")
+                    continue
+                if not text.strip():
+                    continue
+                yield Document(
+                    text=text,
+                    metadata={**metadata, "page_label": page_labels[page_number]},
+                    excluded_embed_metadata_keys=list(EXCLUDED_METADATA_KEYS),
+                    excluded_llm_metadata_keys=list(EXCLUDED_METADATA_KEYS),
+                )
+
+    def load_file(self, file_name: str) -> List[Document]:
+        """Load and parse a single document from the documents directory."""
+        file_path = os.path.join(self.docs_path, file_name)
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(f"Document not found: {file_path}")
 
-    def get_document_info(self) -> List[dict]:
-        """Return information about loaded documents."""
         try:
-            info = []
-            for file in os.listdir(self.docs_path):
-                file_path = os.path.join(self.docs_path, file)
-                if os.path.isfile(file_path):
-                    info.append({
-                        "filename": file,
-                        "size": os.path.getsize(file_path),
-                        "type": os.path.splitext(file)[1][1:].upper()
-                    })
-            return info
+            return list(self.iter_file_documents(file_path))
         except Exception as e:
-            raise Exception(f"Error getting document info: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"Error loading document {file_name}: {str(e)}")
+
+    def list_files(self) -> List[str]:
+        """Return the names of all document files, in sorted order."""
+        if not os.path.exists(self.docs_path):
+            raise FileNotFoundError(f"Documents directory not found: {self.docs_path}")
+
+        return [
+            file for file in sorted(os.listdir(self.docs_path))
+            # SimpleDirectoryReader skips hidden files, so they never reach the index
+            if not file.startswith(".") and os.path.isfile(os.path.join(self.docs_path, file))
+        ]
+
+    def get_file_hashes(self) -> Dict[str, str]:
+        """Return a SHA-256 content hash for every document file, keyed by file name."""
+        return {
+            file: self.hash_file(os.path.join(self.docs_path, file))
+            for file in self.list_files()
+        }
+
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        """Compute the SHA-256 hash of a file's contents."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
@@ -0,0 +1,48 @@
+from typing import Any, List, Optional
+from llama_index.core.embeddings import BaseEmbedding
+from pydantic import PrivateAttr
+
+class FastEmbedEmbedding(BaseEmbedding):
+    """
+    LlamaIndex embedding model backed by fastembed's ONNX runtime.
+
+    Produces the same sentence-transformers embeddings as HuggingFaceEmbedding but
+    without torch, which is considerably faster for bulk indexing on CPU-only nodes.
+    """
+
+    _model: Any = PrivateAttr()
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_folder: Optional[str] = None,
+        embed_batch_size: int = 256,
+        threads: Optional[int] = None,
+        **kwargs: Any,
+    ):
+        from fastembed import TextEmbedding
+
+        super().__init__(model_name=model_name, embed_batch_size=embed_batch_size, **kwargs)
+        self._model = TextEmbedding(model_name=model_name, cache_dir=cache_folder, threads=threads)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "FastEmbedEmbedding"
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        return [vector.tolist() for vector in self._model.embed(texts, batch_size=self.embed_batch_size)]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed([query])[0]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embedding(text)
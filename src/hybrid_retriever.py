@@ -0,0 +1,66 @@
+from typing import Dict, List
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+from src.sparse_index import BM25Index
+from src.vector_store import NumpyVectorStore
+
+class HybridRetriever(BaseRetriever):
+    """
+    Fuses dense vector retrieval with BM25 keyword retrieval using reciprocal rank fusion.
+
+    Each list contributes 1 / (rrf_k + rank) per node, so exact identifiers that
+    only BM25 finds still surface next to semantically similar chunks.
+    """
+
+    def __init__(
+        self,
+        vector_retriever: BaseRetriever,
+        sparse_index: BM25Index,
+        vector_store: NumpyVectorStore,
+        similarity_top_k: int = 3,
+        candidate_top_k: int = 20,
+        rrf_k: int = 60,
+    ):
+        """
+        Args:
+            vector_retriever: Dense retriever returning candidate_top_k nodes
+            sparse_index: BM25 index built from the same nodes
+            vector_store: Store used to look up nodes that only BM25 returned
+            similarity_top_k: Number of fused results to return (default: 3)
+            candidate_top_k: Candidates taken from each list before fusion (default: 20)
+            rrf_k: Reciprocal rank fusion constant (default: 60)
+        """
+        self.vector_retriever = vector_retriever
+        self.sparse_index = sparse_index
+        self.vector_store = vector_store
+        self.similarity_top_k = similarity_top_k
+        self.candidate_top_k = candidate_top_k
+        self.rrf_k = rrf_k
+        super().__init__()
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        return self.fuse(query_bundle.query_str, self.vector_retriever.retrieve(query_bundle))
+
+    def fuse(self, query_str: str, dense: List[NodeWithScore]) -> List[NodeWithScore]:
+        """Fuse dense results computed elsewhere (e.g. in a batch) with BM25 results for the query."""
+        sparse = self.sparse_index.search(query_str, top_k=self.candidate_top_k)
+
+        fused: Dict[str, float] = {}
+        nodes = {}
+        for rank, result in enumerate(dense):
+            fused[result.node.node_id] = fused.get(result.node.node_id, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+            nodes[result.node.node_id] = result.node
+        for rank, (node_id, _) in enumerate(sparse):
+            fused[node_id] = fused.get(node_id, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:self.similarity_top_k]
+        missing = [node_id for node_id, _ in ranked if node_id not in nodes]
+        if missing:
+            for node in self.vector_store.get_nodes(missing):
+                nodes[node.node_id] = node
+
+        return [
+            NodeWithScore(node=nodes[node_id], score=score)
+            for node_id, score in ranked
+            if node_id in nodes
+        ]
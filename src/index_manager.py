@@ -1,53 +1,194 @@
-from typing import Optional, List
+from typing import Any, Optional, List, Dict, Callable, Tuple
 import os
+import json
+import time
+import shutil
 import logging
-from llama_index.core import VectorStoreIndex, Settings, Document
-from llama_index.llms.ollama import Ollama
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-# Optionally add fastembed support
-from fastembed import TextEmbedding as FastEmbedding
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from llama_index.core import VectorStoreIndex, Settings
+from llama_index.core.schema import BaseNode, NodeWithScore
+from src.fastembed_embedding import FastEmbedEmbedding
+from src.ingestion import IngestionPipeline
+from src.vector_store import NumpyVectorStore
+from src.sparse_index import BM25Index
+from src.hybrid_retriever import HybridRetriever
+from src.metrics import span
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.response_synthesizers import ResponseMode
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process writer lock, run a single worker
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+EMBED_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+EMBED_BACKENDS = ("huggingface", "fastembed")
+MANIFEST_FILE = "manifest.json"
+VECTOR_STORE_DIR = "vectors"
+SPARSE_INDEX_DIR = "bm25"
+# Immutable index versions live in SNAPSHOTS_DIR/v000001, ...; CURRENT_FILE names the latest one
+SNAPSHOTS_DIR = "snapshots"
+CURRENT_FILE = "CURRENT"
+WRITER_LOCK_FILE = "writer.lock"
+# Polls that may fail to read a published snapshot (e.g. it was removed mid-read) before it is given up on
+SNAPSHOT_LOAD_RETRIES = 5
+RETRIEVAL_MODES = ("hybrid", "vector")
+RESPONSE_MODES = tuple(mode.value for mode in ResponseMode)
+# Distinct (top_k, response mode, retrieval mode) combinations kept ready for reuse
+MAX_CACHED_ENGINES = 32
+
+# Settings.llm and Settings.embed_model are process-wide; the configuration they were loaded for
+_models_lock = threading.Lock()
+_models_config: Optional[Tuple] = None
+
 class IndexManager:
-    def __init__(self, model_name: str = "mistral", ollama_base_url: str = "http://localhost:11434"):
+    def __init__(
+        self,
+        model_name: str = "mistral",
+        ollama_base_url: str = "http://localhost:11434",
+        persist_dir: Optional[str] = None,
+        chunk_size: int = 1024,
+        chunk_overlap: int = 20,
+        embed_backend: str = "huggingface",
+        embed_batch_size: int = 256,
+        ingest_workers: Optional[int] = None,
+        vector_dtype: str = "float32",
+        mmap: bool = True,
+        retrieval_mode: str = "hybrid",
+        ollama_pool=None,
+        snapshot_keep: int = 3,
+    ):
         """
         Initialize the IndexManager with the specified Ollama model.
         
         Args:
             model_name: The name of the Ollama model to use (default: "mistral")
             ollama_base_url: The base URL for the Ollama API (default: "http://localhost:11434")
+            persist_dir: Directory where the index and its manifest are saved (default: None, no persistence)
+            chunk_size: Chunk size used when splitting documents into nodes (default: 1024)
+            chunk_overlap: Overlap between consecutive chunks (default: 20)
+            embed_backend: "huggingface" (torch) or "fastembed" (ONNX, CPU) (default: "huggingface")
+            embed_batch_size: Number of chunks embedded per model call (default: 256)
+            ingest_workers: Processes used to parse and chunk files (default: None, one per CPU)
+            vector_dtype: Storage type of embeddings: "float32", "float16" or "int8" (default: "float32")
+            mmap: Memory-map the persisted vectors and BM25 postings instead of reading them into memory (default: True)
+            retrieval_mode: "hybrid" (BM25 + vector, fused with RRF) or "vector" (default: "hybrid")
+            ollama_pool: OllamaBackendPool to route LLM calls over; overrides ollama_base_url (default: None)
+            snapshot_keep: Published index versions kept on disk for workers still switching over (default: 3)
         """
+        if embed_backend not in EMBED_BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {embed_backend}. Expected one of {EMBED_BACKENDS}")
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {retrieval_mode}. Expected one of {RETRIEVAL_MODES}")
+
         self.model_name = model_name
         self.ollama_base_url = ollama_base_url
+        self.ollama_pool = ollama_pool
+        self.persist_dir = persist_dir
+        self.snapshot_keep = snapshot_keep
+        # Name of the snapshot this process serves, e.g. "v000042"
+        self.snapshot: Optional[str] = None
+        self._unusable_snapshot: Optional[str] = None
+        self._load_failures: Tuple[Optional[str], int] = (None, 0)
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.embed_backend = embed_backend
+        self.embed_batch_size = embed_batch_size
+        self.pipeline = IngestionPipeline(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            embed_batch_size=embed_batch_size,
+            num_workers=ingest_workers,
+        )
+        self.vector_dtype = vector_dtype
+        self.mmap = mmap
+        self.retrieval_mode = retrieval_mode
+        self.vector_store: Optional[NumpyVectorStore] = None
+        self.sparse_index: Optional[BM25Index] = None
         self.index: Optional[VectorStoreIndex] = None
-        self._setup_models()
+        # file name -> {"hash": content hash, "doc_ids": LlamaIndex document ids}
+        self.files: Dict[str, Dict] = {}
+        # Bumped on every change to the index so caches keyed on it go stale
+        self.version = 0
+        self._change_listeners: List[Callable[[], None]] = []
+        # Serializes writers within this process; the writer lock file serializes them across
+        # worker processes. Readers never take either and see either the old or the new index.
+        self._write_lock = threading.RLock()
+        # Query engines and retrievers keyed by their parameters; dropped when the index changes
+        self._engines: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._engines_lock = threading.RLock()
+        # The models are loaded on first use (or by warm-up), not at construction
+        self._models_ready = False
+
+    def ensure_models(self):
+        """Load the LLM and embedding models once; every path that needs them calls this first."""
+        global _models_config
+        if self._models_ready:
+            return
+        config = (self.model_name, self.ollama_base_url, id(self.ollama_pool), self.embed_backend, self.embed_batch_size)
+        with _models_lock:
+            # Settings are process-wide, so managers with the same configuration (one per tenant) share the models
+            if _models_config != config:
+                self._setup_models()
+                _models_config = config
+            self._models_ready = True
+
+    @property
+    def models_ready(self) -> bool:
+        return self._models_ready
 
     def _setup_models(self):
         """Initialize the LLM and embedding models."""
         try:
+            # Imported here so importing the app does not load the Ollama LLM package
+            from llama_index.llms.ollama import Ollama
+            from src.pooled_ollama import PooledOllama
+
             # Setup LLM with Ollama
-            llm = Ollama(
+            llm_kwargs = dict(
                 model=self.model_name,
                 request_timeout=60.0,
-                base_url=self.ollama_base_url,
                 temperature=0.1,  # Lower temperature for more deterministic responses in Q&A
+                context_window=4096,  # Known up front, so building a query engine never asks Ollama
                 additional_kwargs={"num_ctx": 4096},  # Increase context window if available
             )
+            if self.ollama_pool is not None:
+                llm = PooledOllama(self.ollama_pool, **llm_kwargs)
+                backends = ", ".join(self.ollama_pool.base_urls)
+            else:
+                llm = Ollama(base_url=self.ollama_base_url, **llm_kwargs)
+                backends = self.ollama_base_url
             Settings.llm = llm
-            logger.info(f"Initialized LLM with Ollama model: {self.model_name} at {self.ollama_base_url}")
+            logger.info(f"Initialized LLM with Ollama model: {self.model_name} at {backends}")
 
             # Create cache directory if it doesn't exist
             cache_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models_cache")
             os.makedirs(cache_dir, exist_ok=True)
             
-            # Use HuggingFace for embeddings - faster and more efficient than OpenAI
-            embed_model = HuggingFaceEmbedding(
-                model_name="sentence-transformers/all-MiniLM-L6-v2",
-                cache_folder=cache_dir
-            )
+            if self.embed_backend == "fastembed":
+                # ONNX runtime, no torch - the faster choice for bulk indexing on CPU
+                embed_model = FastEmbedEmbedding(
+                    model_name=EMBED_MODEL_NAME,
+                    cache_folder=cache_dir,
+                    embed_batch_size=self.embed_batch_size
+                )
+                logger.info(f"Using fastembed (ONNX) for embeddings ({EMBED_MODEL_NAME})")
+            else:
+                # Imported here because it pulls in torch, which takes seconds to import
+                from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+                # Use HuggingFace for embeddings - faster and more efficient than OpenAI
+                embed_model = HuggingFaceEmbedding(
+                    model_name=EMBED_MODEL_NAME,
+                    cache_folder=cache_dir,
+                    embed_batch_size=self.embed_batch_size
+                )
+                logger.info(f"Using HuggingFace for embeddings ({EMBED_MODEL_NAME})")
             Settings.embed_model = embed_model
-            logger.info("Using HuggingFace for embeddings (sentence-transformers/all-MiniLM-L6-v2)")
 
         except Exception as e:
             logger.error(f"Failed to initialize models: {str(e)}")
@@ -55,14 +196,159 @@ class IndexManager:
             logger.error(f"Traceback: {traceback.format_exc()}")
             raise Exception(f"Failed to initialize models: {str(e)}")
 
-    def create_index(self, documents: List[Document]):
-        """Create a vector index from the provided documents."""
+    def _new_index(self):
+        """Start an empty index on a fresh NumPy vector store and BM25 index."""
+        self.vector_store = NumpyVectorStore(dtype=self.vector_dtype)
+        self.sparse_index = BM25Index()
+        self.index = VectorStoreIndex.from_vector_store(self.vector_store)
+
+    def add_change_listener(self, callback: Callable[[], None]):
+        """Register a callback that runs whenever the index is rebuilt, loaded or updated."""
+        self._change_listeners.append(callback)
+
+    def _mark_changed(self):
+        self.version += 1
+        with self._engines_lock:
+            self._engines.clear()
+        for callback in self._change_listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Index change listener failed: {str(e)}")
+
+    def get_document_hash(self, file_name: str) -> Optional[str]:
+        """Return the content hash the index holds for a file, or None if it is not indexed."""
+        entry = self.files.get(file_name)
+        return entry["hash"] if entry else None
+
+    def delete_document(self, file_name: str) -> bool:
+        """Remove a file's documents from the index. Returns False if it was not indexed."""
+        with self._writing():
+            if not self.index or file_name not in self.files:
+                return False
+
+            try:
+                self._remove_document(file_name)
+                self._mark_changed()
+                logger.info(f"Document {file_name} removed from index")
+            except Exception as e:
+                logger.error(f"Failed to remove document {file_name}: {str(e)}")
+                raise Exception(f"Failed to remove document {file_name}: {str(e)}")
+
+            self.persist_index()
+        return True
+
+    def apply_changes(
+        self,
+        docs_path: str,
+        file_hashes: Dict[str, str],
+        progress: Optional[Callable[[str, int, int], None]] = None,
+        removed: Optional[List[str]] = None,
+    ) -> Dict[str, str]:
+        """
+        Index a batch of new or changed files and swap them into the index in one step.
+
+        Files are parsed and embedded while queries keep using the current index; the
+        new chunks replace the old ones, and removed files are dropped, atomically once
+        every file is ready. Returns a status per file: "inserted", "updated", "removed",
+        "unchanged" or "failed" (unreadable).
+
+        Args:
+            docs_path: Directory holding the files
+            file_hashes: Content hash of each file to index, keyed by file name
+            progress: Called with (file name, files done, files total) after each file is embedded
+            removed: Files to remove from the index (default: None)
+        """
+        if not self.index:
+            raise ValueError("Index not created. Call load_or_create_index() first.")
+        self.ensure_models()
+
+        statuses = {}
+        changed = {}
+        for file_name, content_hash in file_hashes.items():
+            if self.get_document_hash(file_name) == content_hash:
+                statuses[file_name] = "unchanged"
+            else:
+                changed[file_name] = content_hash
+
+        added = []
+        file_paths = [os.path.join(docs_path, file_name) for file_name in changed]
+        with span("index_ingest"):
+            for file_name, doc_ids, nodes in self.pipeline.run(file_paths):
+                added.append((file_name, doc_ids, nodes, changed[file_name]))
+                if progress:
+                    progress(file_name, len(added), len(changed))
+
+        with self._writing():
+            # Another worker may have indexed the same content while this one was embedding
+            for file_name, _, _, content_hash in added:
+                if self.get_document_hash(file_name) == content_hash:
+                    statuses[file_name] = "unchanged"
+            added = [entry for entry in added if statuses.get(entry[0]) != "unchanged"]
+            for file_name, _, nodes, _ in added:
+                statuses[file_name] = "updated" if file_name in self.files else "inserted"
+            removals = [file_name for file_name in removed or [] if file_name in self.files]
+            for file_name in removed or []:
+                statuses[file_name] = "removed" if file_name in removals else "unchanged"
+            if added or removals:
+                with span("index_swap"):
+                    self._swap_files(removals, added)
+                self._mark_changed()
+                logger.info(
+                    f"Applied {len(added)} changed files ({sum(len(nodes) for _, _, nodes, _ in added)} chunks) "
+                    f"and {len(removals)} removed files to the index"
+                )
+                self.persist_index()
+        for file_name in changed:
+            statuses.setdefault(file_name, "failed")
+        return statuses
+
+    def _index_nodes(self, file_name: str, doc_ids: List[str], nodes: List[BaseNode], content_hash: str):
+        """Replace whatever the index holds for a file with its new, already embedded nodes."""
+        self._swap_files([], [(file_name, doc_ids, nodes, content_hash)])
+
+    def _swap_files(self, removed: List[str], added: List[Tuple[str, List[str], List[BaseNode], str]]):
+        """
+        Remove files and replace others with (file name, doc ids, embedded nodes, hash)
+        in a single swap of the vector store and BM25 index.
+        """
+        replaced = set(removed) | {file_name for file_name, _, _, _ in added}
+        old_doc_ids = [
+            doc_id for file_name in replaced if file_name in self.files
+            for doc_id in self.files[file_name]["doc_ids"]
+        ]
+        nodes = [node for _, _, file_nodes, _ in added for node in file_nodes]
+        self.vector_store.replace(old_doc_ids, nodes)
+        self.sparse_index.replace(old_doc_ids, nodes)
+        for file_name in removed:
+            self.files.pop(file_name, None)
+        indexed_at = time.time()
+        for file_name, doc_ids, file_nodes, content_hash in added:
+            self.files[file_name] = {
+                "hash": content_hash,
+                "doc_ids": doc_ids,
+                "chunks": len(file_nodes),
+                "indexed_at": indexed_at,
+            }
+
+    def _ingest_files(self, docs_path: str, file_hashes: Dict[str, str]):
+        """Run files through the parallel ingestion pipeline and add them to the index."""
+        if file_hashes:
+            self.ensure_models()
+        file_paths = [os.path.join(docs_path, file_name) for file_name in file_hashes]
+        for file_name, doc_ids, nodes in self.pipeline.run(file_paths):
+            self._index_nodes(file_name, doc_ids, nodes, file_hashes[file_name])
+
+    def build_index(self, docs_path: str, file_hashes: Dict[str, str]):
+        """Build a new index from the given files using the parallel ingestion pipeline."""
+        self.ensure_models()
         try:
-            logger.info(f"Creating vector index from {len(documents)} documents...")
-            self.index = VectorStoreIndex.from_documents(
-                documents,
-                show_progress=True
-            )
+            logger.info(f"Building vector index from {len(file_hashes)} files...")
+            with span("index_build"):
+                self._new_index()
+                self.files = {}
+                self._ingest_files(docs_path, file_hashes)
+            self._mark_changed()
             logger.info("Index created successfully")
         except Exception as e:
             logger.error(f"Failed to create index: {str(e)}")
@@ -70,12 +356,323 @@ class IndexManager:
             logger.error(f"Traceback: {traceback.format_exc()}")
             raise Exception(f"Failed to create index: {str(e)}")
 
-    def get_query_engine(self, similarity_top_k: int = 3):
-        """Get a query engine from the index."""
+    def _remove_document(self, file_name: str):
+        self._swap_files([file_name], [])
+
+    def build_manifest(self) -> Dict:
+        """Describe everything the persisted index depends on."""
+        return {
+            "embed_model": EMBED_MODEL_NAME,
+            "embed_backend": self.embed_backend,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "vector_store": NumpyVectorStore.class_name(),
+            "vector_dtype": self.vector_dtype,
+            "sparse_index": "bm25-csr",
+            "files": dict(sorted(self.files.items())),
+        }
+
+    @staticmethod
+    def _settings_of(manifest: Dict) -> Dict:
+        return {key: value for key, value in manifest.items() if key != "files"}
+
+    @contextmanager
+    def _writing(self):
+        """
+        Hold the writer locks and bring this process up to the latest published version
+        first, so a change is never applied on top of an index another worker replaced.
+        """
+        with self._write_lock:
+            lock_file = None
+            if self.persist_dir and fcntl is not None:
+                os.makedirs(self.persist_dir, exist_ok=True)
+                lock_file = open(os.path.join(self.persist_dir, WRITER_LOCK_FILE), "a")
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self.refresh()
+                yield
+            finally:
+                if lock_file is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    lock_file.close()
+
+    def latest_snapshot(self) -> Optional[str]:
+        """Name of the most recently published snapshot, or None if there is none."""
+        if not self.persist_dir:
+            return None
+        try:
+            with open(os.path.join(self.persist_dir, CURRENT_FILE), "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _snapshot_dir(self, name: str) -> str:
+        return os.path.join(self.persist_dir, SNAPSHOTS_DIR, name)
+
+    def _read_manifest(self, name: str) -> Optional[Dict]:
+        manifest_path = os.path.join(self._snapshot_dir(name), MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return None
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable index manifest {manifest_path}: {str(e)}")
+            return None
+
+    def persist_index(self):
+        """
+        Publish the index as a new immutable snapshot in persist_dir.
+
+        The snapshot is written to a temporary directory, renamed into place and then
+        made current by atomically replacing CURRENT_FILE, so other workers only ever
+        see complete versions. Older snapshots beyond snapshot_keep are removed; workers
+        that still map their files keep reading them until they switch.
+        """
+        if not self.persist_dir:
+            return
         if not self.index:
-            logger.error("Index not created. Call create_index() first.")
-            raise ValueError("Index not created. Call create_index() first.")
-        
-        return self.index.as_query_engine(
-            similarity_top_k=similarity_top_k
-        ) 
\ No newline at end of file
+            raise ValueError("Index not created. Call load_or_create_index() first.")
+
+        latest = self.latest_snapshot()
+        name = f"v{int(latest[1:]) + 1 if latest else 1:06d}"
+        snapshots_dir = os.path.join(self.persist_dir, SNAPSHOTS_DIR)
+        tmp_dir = os.path.join(snapshots_dir, f".{name}.{os.getpid()}.tmp")
+        os.makedirs(snapshots_dir, exist_ok=True)
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        os.makedirs(tmp_dir)
+
+        with span("index_persist"):
+            self.vector_store.save(os.path.join(tmp_dir, VECTOR_STORE_DIR))
+            self.sparse_index.save(os.path.join(tmp_dir, SPARSE_INDEX_DIR))
+            with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+                json.dump(self.build_manifest(), f, indent=2)
+            os.replace(tmp_dir, self._snapshot_dir(name))
+
+            current_path = os.path.join(self.persist_dir, CURRENT_FILE)
+            with open(current_path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(name)
+            os.replace(current_path + ".tmp", current_path)
+        self.snapshot = name
+        logger.info(f"Index published as snapshot {name} in {self.persist_dir}")
+
+        if self.mmap:
+            # Serve the published vectors and postings from the shared page cache instead of private memory
+            self.vector_store = NumpyVectorStore.load(os.path.join(self._snapshot_dir(name), VECTOR_STORE_DIR), mmap=True)
+            self.sparse_index = BM25Index.load(os.path.join(self._snapshot_dir(name), SPARSE_INDEX_DIR), mmap=True)
+            self.index = VectorStoreIndex.from_vector_store(self.vector_store)
+            with self._engines_lock:
+                self._engines.clear()
+        self._remove_old_snapshots()
+
+    def _remove_old_snapshots(self):
+        snapshots_dir = os.path.join(self.persist_dir, SNAPSHOTS_DIR)
+        names = sorted(name for name in os.listdir(snapshots_dir) if name.startswith("v"))
+        # Temporary directories left behind by a writer that crashed mid-publish
+        stale = [name for name in os.listdir(snapshots_dir) if name.endswith(".tmp")]
+        for name in stale + (names[:-self.snapshot_keep] if self.snapshot_keep > 0 else []):
+            shutil.rmtree(os.path.join(snapshots_dir, name), ignore_errors=True)
+
+    def load_index(self, name: Optional[str] = None) -> bool:
+        """
+        Load a published snapshot (default: the latest) if it was built with the current
+        embedding, chunking and vector store settings.
+        """
+        if not self.persist_dir:
+            return False
+
+        name = name or self.latest_snapshot()
+        manifest = self._read_manifest(name) if name else None
+        if manifest is None:
+            logger.info("No persisted index found")
+            return False
+        if self._settings_of(manifest) != self._settings_of(self.build_manifest()):
+            logger.info("Persisted index is stale (embedding, chunking or vector store settings changed)")
+            return False
+
+        try:
+            snapshot_dir = self._snapshot_dir(name)
+            vector_store = NumpyVectorStore.load(os.path.join(snapshot_dir, VECTOR_STORE_DIR), mmap=self.mmap)
+            sparse_index = BM25Index.load(os.path.join(snapshot_dir, SPARSE_INDEX_DIR), mmap=self.mmap)
+        except Exception as e:
+            logger.warning(f"Failed to load persisted index snapshot {name}: {str(e)}")
+            return False
+
+        # Switch everything over at once; requests in flight finish on the old objects
+        self.vector_store = vector_store
+        self.sparse_index = sparse_index
+        self.index = VectorStoreIndex.from_vector_store(vector_store)
+        self.files = manifest.get("files", {})
+        self.snapshot = name
+        self._mark_changed()
+        logger.info(f"Loaded persisted index snapshot {name} from {self.persist_dir}")
+        return True
+
+    def refresh(self) -> bool:
+        """
+        Switch to the latest published snapshot if another worker published a newer one.
+
+        Returns True if the index changed. Cheap when nothing changed: it reads one small file.
+        """
+        latest = self.latest_snapshot()
+        if latest is None or latest in (self.snapshot, self._unusable_snapshot):
+            return False
+        with self._write_lock:
+            latest = self.latest_snapshot()
+            if latest in (self.snapshot, self._unusable_snapshot):
+                return False
+            manifest = self._read_manifest(latest)
+            if manifest is not None and self._settings_of(manifest) != self._settings_of(self.build_manifest()):
+                # Built with other settings; wait for the next version
+                self._unusable_snapshot = latest
+                return False
+            if self.load_index(latest):
+                self._load_failures = (None, 0)
+                return True
+            # Unreadable for now (being removed, out of file handles, ...); retry on the next poll
+            failures = self._load_failures[1] + 1 if self._load_failures[0] == latest else 1
+            self._load_failures = (latest, failures)
+            if failures >= SNAPSHOT_LOAD_RETRIES:
+                logger.error(f"Giving up on index snapshot {latest} after {failures} failed loads")
+                self._unusable_snapshot = latest
+            return False
+
+    def load_or_create_index(self, doc_loader, file_hashes: Optional[Dict[str, str]] = None) -> None:
+        """
+        Load the persisted index and bring it up to date with the documents directory.
+
+        Only added, changed or removed files are (re)indexed; a full rebuild happens
+        when there is no usable persisted index for the current settings.
+
+        Args:
+            doc_loader: DocumentLoader for the documents directory
+            file_hashes: Content hash of every document file, if already computed (default: None, hashes the directory)
+        """
+        with self._writing():
+            if file_hashes is None:
+                file_hashes = doc_loader.get_file_hashes()
+            # Entering _writing() already loaded the latest usable snapshot, if there is one
+            if not self.index:
+                self.build_index(doc_loader.docs_path, file_hashes)
+                self.persist_index()
+                return
+
+            removed = [file_name for file_name in self.files if file_name not in file_hashes]
+            for file_name in removed:
+                self._remove_document(file_name)
+                logger.info(f"Document {file_name} no longer exists, removed from index")
+
+            changed = {
+                file_name: content_hash for file_name, content_hash in file_hashes.items()
+                if self.get_document_hash(file_name) != content_hash
+            }
+            self._ingest_files(doc_loader.docs_path, changed)
+
+            if removed or changed:
+                self._mark_changed()
+                logger.info(f"Index synced with documents directory ({len(changed)} re-indexed, {len(removed)} removed)")
+                self.persist_index()
+
+    def get_query_engine(
+        self,
+        similarity_top_k: int = 3,
+        response_mode: str = "compact",
+        retrieval_mode: Optional[str] = None,
+    ):
+        """
+        Get a query engine from the index.
+
+        Engines are built once per parameter combination and reused until the index changes.
+        """
+        retrieval_mode = retrieval_mode or self.retrieval_mode
+        self.ensure_models()
+        return self._get_cached(
+            ("query_engine", similarity_top_k, response_mode, retrieval_mode),
+            lambda: RetrieverQueryEngine.from_args(
+                self.get_retriever(similarity_top_k=similarity_top_k, retrieval_mode=retrieval_mode),
+                llm=Settings.llm,
+                response_mode=ResponseMode(response_mode)
+            )
+        )
+
+    def get_retriever(self, similarity_top_k: int = 3, retrieval_mode: Optional[str] = None):
+        """
+        Get a retriever that returns the top-k nodes and scores without LLM synthesis.
+
+        Retrievers are built once per parameter combination and reused until the index changes.
+        """
+        retrieval_mode = retrieval_mode or self.retrieval_mode
+        self.ensure_models()
+        return self._get_cached(
+            ("retriever", similarity_top_k, retrieval_mode),
+            lambda: self._build_retriever(similarity_top_k, retrieval_mode)
+        )
+
+    def memory_bytes(self) -> int:
+        """Memory held by the index: the vector store's and the BM25 index's arrays."""
+        if self.vector_store is None:
+            return 0
+        return self.vector_store.nbytes() + self.sparse_index.nbytes()
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries with one model call."""
+        # all-MiniLM-L6-v2 is symmetric (no query instruction), so the batched text path
+        # gives the same vectors as embedding each query on its own
+        self.ensure_models()
+        return Settings.embed_model.get_text_embedding_batch(queries)
+
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        embeddings: List[List[float]],
+        similarity_top_k: int = 3,
+        retrieval_mode: Optional[str] = None,
+    ) -> List[List[NodeWithScore]]:
+        """
+        Retrieve the top-k nodes for several already embedded queries.
+
+        The dense search for all queries is one matrix product against the vector
+        store; in hybrid mode each query's candidates are then fused with its BM25 results.
+        """
+        retrieval_mode = retrieval_mode or self.retrieval_mode
+        retriever = self.get_retriever(similarity_top_k=similarity_top_k, retrieval_mode=retrieval_mode)
+        dense_top_k = retriever.candidate_top_k if isinstance(retriever, HybridRetriever) else similarity_top_k
+
+        dense = [
+            [NodeWithScore(node=node, score=score) for node, score in zip(result.nodes, result.similarities)]
+            for result in self.vector_store.query_batch(embeddings, dense_top_k)
+        ]
+        if isinstance(retriever, HybridRetriever):
+            return [retriever.fuse(query, nodes) for query, nodes in zip(queries, dense)]
+        return dense
+
+    def _get_cached(self, key: Tuple, build: Callable[[], Any]) -> Any:
+        with self._engines_lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = build()
+                self._engines[key] = engine
+                while len(self._engines) > MAX_CACHED_ENGINES:
+                    self._engines.popitem(last=False)
+            self._engines.move_to_end(key)
+            return engine
+
+    def _build_retriever(self, similarity_top_k: int, retrieval_mode: str):
+        if not self.index:
+            logger.error("Index not created. Call load_or_create_index() first.")
+            raise ValueError("Index not created. Call load_or_create_index() first.")
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {retrieval_mode}. Expected one of {RETRIEVAL_MODES}")
+
+        if retrieval_mode == "vector":
+            return self.index.as_retriever(similarity_top_k=similarity_top_k)
+
+        candidate_top_k = max(similarity_top_k * 4, 20)
+        return HybridRetriever(
+            vector_retriever=self.index.as_retriever(similarity_top_k=candidate_top_k),
+            sparse_index=self.sparse_index,
+            vector_store=self.vector_store,
+            similarity_top_k=similarity_top_k,
+            candidate_top_k=candidate_top_k,
+        )
@@ -0,0 +1,151 @@
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+from llama_index.core import Settings
+from llama_index.core.schema import BaseNode, MetadataMode
+from src.document_loader import DocumentLoader
+from src.metrics import record_stage
+
+logger = logging.getLogger(__name__)
+
+# Below this many files the cost of spawning parser processes outweighs the gain
+MIN_FILES_FOR_POOL = 8
+# Parsed files waiting to be embedded, per parser process; bounds memory on large corpora
+MAX_PENDING_PER_WORKER = 2
+
+def parse_and_chunk(file_path: str, chunk_size: int, chunk_overlap: int) -> Tuple[str, List[str], List[BaseNode]]:
+    """
+    Parse one file and split it into nodes.
+
+    Runs in a worker process, so it only touches LlamaIndex's readers and splitter
+    and never the embedding model. Documents (PDF pages) are split as they are read
+    and dropped afterwards, so only the file's chunks are held in memory.
+    """
+    loader = DocumentLoader(os.path.dirname(file_path), chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    doc_ids: List[str] = []
+
+    def documents():
+        for document in loader.iter_file_documents(file_path):
+            doc_ids.append(document.doc_id)
+            yield document
+
+    nodes = list(loader.iter_nodes(documents()))
+    return os.path.basename(file_path), doc_ids, nodes
+
+class IngestionPipeline:
+    def __init__(
+        self,
+        chunk_size: int = 1024,
+        chunk_overlap: int = 20,
+        embed_batch_size: int = 256,
+        num_workers: Optional[int] = None,
+    ):
+        """
+        Parse and chunk files in a process pool and embed their chunks in large batches.
+
+        Args:
+            chunk_size: Chunk size used when splitting documents into nodes (default: 1024)
+            chunk_overlap: Overlap between consecutive chunks (default: 20)
+            embed_batch_size: Number of chunks sent to the embedding model at once (default: 256)
+            num_workers: Parser processes; 1 parses in-process (default: None, one per CPU)
+        """
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.embed_batch_size = embed_batch_size
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.last_stats: Dict[str, float] = {}
+
+    def run(self, file_paths: List[str]) -> Iterator[Tuple[str, List[str], List[BaseNode]]]:
+        """
+        Yield (file name, document ids, embedded nodes) for every file that could be parsed.
+
+        Files are yielded as soon as the batch containing their chunks is embedded, so
+        parsing in the pool overlaps with embedding in this process. At most
+        MAX_PENDING_PER_WORKER files per parser process are parsed ahead of embedding,
+        so memory stays flat however large the corpus is. Files that fail to parse are
+        logged and skipped.
+        """
+        start = time.perf_counter()
+        stats = {"files": 0, "failed": 0, "documents": 0, "chunks": 0, "embed_seconds": 0.0}
+        pending: List[Tuple[str, List[str], List[BaseNode]]] = []
+        pending_chunks = 0
+
+        for parsed in self._parse(file_paths, stats):
+            pending.append(parsed)
+            pending_chunks += len(parsed[2])
+            if pending_chunks >= self.embed_batch_size:
+                yield from self._embed_pending(pending, stats)
+                pending, pending_chunks = [], 0
+        if pending:
+            yield from self._embed_pending(pending, stats)
+
+        elapsed = time.perf_counter() - start
+        stats["seconds"] = elapsed
+        stats["docs_per_second"] = stats["documents"] / elapsed if elapsed else 0.0
+        stats["chunks_per_second"] = stats["chunks"] / elapsed if elapsed else 0.0
+        self.last_stats = stats
+        logger.info(
+            f"Ingested {stats['files']} files ({stats['documents']} documents, {stats['chunks']} chunks) "
+            f"in {elapsed:.2f}s: {stats['docs_per_second']:.1f} docs/s, {stats['chunks_per_second']:.1f} chunks/s, "
+            f"{stats['embed_seconds']:.2f}s embedding, {stats['failed']} failed"
+        )
+
+    def _parse(self, file_paths: List[str], stats: Dict) -> Iterator[Tuple[str, List[str], List[BaseNode]]]:
+        if self.num_workers <= 1 or len(file_paths) < MIN_FILES_FOR_POOL:
+            for file_path in file_paths:
+                try:
+                    yield parse_and_chunk(file_path, self.chunk_size, self.chunk_overlap)
+                except Exception as e:
+                    stats["failed"] += 1
+                    logger.error(f"Failed to parse {file_path}: {str(e)}")
+            return
+
+        # spawn rather than fork: the parent holds the embedding model and worker threads
+        context = multiprocessing.get_context("spawn")
+        num_workers = min(self.num_workers, len(file_paths))
+        max_pending = num_workers * MAX_PENDING_PER_WORKER
+        remaining = iter(file_paths)
+        futures = {}
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=context) as executor:
+            while True:
+                # Only submit more work once earlier results have been consumed
+                for file_path in remaining:
+                    futures[executor.submit(parse_and_chunk, file_path, self.chunk_size, self.chunk_overlap)] = file_path
+                    if len(futures) >= max_pending:
+                        break
+                if not futures:
+                    break
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path = futures.pop(future)
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        stats["failed"] += 1
+                        logger.error(f"Failed to parse {file_path}: {str(e)}")
+
+    def _embed_pending(self, pending: List[Tuple[str, List[str], List[BaseNode]]], stats: Dict):
+        nodes = [node for _, _, file_nodes in pending for node in file_nodes]
+        self.embed_nodes(nodes, stats)
+        for file_name, doc_ids, file_nodes in pending:
+            stats["files"] += 1
+            stats["documents"] += len(doc_ids)
+            stats["chunks"] += len(file_nodes)
+            yield file_name, doc_ids, file_nodes
+
+    def embed_nodes(self, nodes: List[BaseNode], stats: Optional[Dict] = None):
+        """Embed nodes in place, embed_batch_size chunks per model call."""
+        embed_model = Settings.embed_model
+        start = time.perf_counter()
+        for offset in range(0, len(nodes), self.embed_batch_size):
+            batch = nodes[offset:offset + self.embed_batch_size]
+            texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in batch]
+            for node, embedding in zip(batch, embed_model.get_text_embedding_batch(texts)):
+                node.embedding = embedding
+        elapsed = time.perf_counter() - start
+        record_stage("index_embed", elapsed)
+        if stats is not None:
+            stats["embed_seconds"] += elapsed
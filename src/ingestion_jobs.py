@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class IngestionJobQueue:
+    """
+    Background queue that indexes uploaded files outside the request.
+
+    Uploads (and removals of deleted files) that arrive within coalesce_seconds of
+    each other are applied as one batch with IndexManager.apply_changes, so queries
+    keep using the current index until the whole batch is embedded and then switch
+    over in one swap. A single writer thread applies batches in order. Jobs can target another index and
+    directory (a tenant's); each index in a batch gets its own apply_changes call.
+    """
+
+    def __init__(
+        self,
+        index_manager,
+        docs_path: str,
+        coalesce_seconds: float = 1.0,
+        max_batch_files: int = 64,
+        max_history: int = 1000,
+    ):
+        """
+        Args:
+            index_manager: IndexManager the batches are applied to unless a job names another
+            docs_path: Directory the uploaded files are written to unless a job names another
+            coalesce_seconds: How long to wait for more uploads before applying a batch (default: 1.0)
+            max_batch_files: Maximum number of jobs applied in one batch (default: 64)
+            max_history: Number of finished jobs kept for status lookups (default: 1000)
+        """
+        self.index_manager = index_manager
+        self.docs_path = docs_path
+        self.coalesce_seconds = coalesce_seconds
+        self.max_batch_files = max_batch_files
+        self.max_history = max_history
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # job id -> (index manager, docs path) of jobs that have not finished
+        self._targets: Dict[str, Tuple[Any, str]] = {}
+        self._lock = threading.Lock()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-writer")
+        self._batches = 0
+
+    def start(self):
+        """Start the background worker on the running event loop."""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+            logger.info("Ingestion job queue started")
+
+    async def close(self):
+        """Stop the worker; queued jobs that have not started are dropped."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("Ingestion job queue closed")
+
+    def submit(
+        self,
+        file_name: str,
+        content_hash: Optional[str],
+        index_manager=None,
+        docs_path: Optional[str] = None,
+        tenant: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Queue a file that has been written to or removed from the documents directory and return its job.
+
+        Args:
+            file_name: Name of the file in the documents directory
+            content_hash: SHA-256 hash of the file's contents, or None to remove the file from the index
+            index_manager: IndexManager to apply the job to (default: None, the queue's)
+            docs_path: Directory holding the file (default: None, the queue's)
+            tenant: Tenant the job belongs to, reported with its status (default: None)
+        """
+        if self._queue is None:
+            raise RuntimeError("Ingestion job queue is not started")
+
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "tenant": tenant,
+            "file_name": file_name,
+            "content_hash": content_hash,
+            "action": "index" if content_hash is not None else "remove",
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "progress": {"files_done": 0, "files_total": 0},
+            "batch_size": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "queued_seconds": None,
+            "processing_seconds": None,
+        }
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+            self._targets[job["job_id"]] = (index_manager or self.index_manager, docs_path or self.docs_path)
+            self._trim_history()
+        self._queue.put_nowait(job["job_id"])
+        logger.info(f"Queued ingestion job {job['job_id']} for {file_name}")
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a snapshot of a job, or None if it is unknown or expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = dict(job)
+            snapshot["progress"] = dict(job["progress"])
+            return snapshot
+
+    def pending_hash(self, file_name: str, tenant: Optional[str] = None) -> Optional[str]:
+        """Content hash of the newest queued or running job for a file of a tenant, or None if there is none."""
+        with self._lock:
+            for job in reversed(self._jobs.values()):
+                if job["file_name"] == file_name and job["tenant"] == tenant and job["finished_at"] is None:
+                    return job["content_hash"]
+        return None
+
+    def stats(self, tenant: Optional[str] = None) -> Dict[str, Any]:
+        """Return the queue depth, the number of batches applied and a tenant's job counts by status."""
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                if job["tenant"] == tenant:
+                    counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return {
+                "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+                "batches": self._batches,
+                "jobs": counts,
+            }
+
+    def _trim_history(self):
+        # Drop the oldest finished jobs; queued and running ones are always kept
+        excess = len(self._jobs) - self.max_history
+        for job_id in [job_id for job_id, job in self._jobs.items() if job["finished_at"] is not None]:
+            if excess <= 0:
+                break
+            del self._jobs[job_id]
+            excess -= 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.coalesce_seconds
+            while len(batch) < self.max_batch_files:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await loop.run_in_executor(self._executor, self._process, batch)
+            except Exception as e:
+                logger.error(f"Ingestion batch failed: {str(e)}")
+
+    def _process(self, job_ids: List[str]):
+        groups: Dict[int, Tuple[Any, str, List[Dict[str, Any]]]] = {}
+        with self._lock:
+            for job_id in job_ids:
+                if job_id in self._jobs:
+                    index_manager, docs_path = self._targets.pop(job_id)
+                    groups.setdefault(id(index_manager), (index_manager, docs_path, []))[2].append(self._jobs[job_id])
+        for index_manager, docs_path, jobs in groups.values():
+            self._apply(index_manager, docs_path, jobs)
+
+    def _apply(self, index_manager, docs_path: str, jobs: List[Dict[str, Any]]):
+        started = time.time()
+        with self._lock:
+            # A later upload of the same file supersedes earlier ones in the batch
+            latest = {job["file_name"]: job for job in jobs}
+            for job in jobs:
+                job["status"] = "running"
+                job["started_at"] = started
+                job["queued_seconds"] = started - job["created_at"]
+                job["batch_size"] = len(latest)
+                job["progress"]["files_total"] = len(latest)
+            self._batches += 1
+
+        def progress(file_name: str, files_done: int, files_total: int):
+            with self._lock:
+                for job in jobs:
+                    job["progress"]["files_done"] = files_done
+
+        logger.info(f"Applying ingestion batch of {len(latest)} files ({len(jobs)} jobs)")
+        try:
+            statuses = index_manager.apply_changes(
+                docs_path,
+                {file_name: job["content_hash"] for file_name, job in latest.items() if job["action"] == "index"},
+                progress=progress,
+                removed=[file_name for file_name, job in latest.items() if job["action"] == "remove"],
+            )
+            error = None
+        except Exception as e:
+            logger.error(f"Failed to apply ingestion batch: {str(e)}")
+            statuses = {}
+            error = str(e)
+
+        finished = time.time()
+        with self._lock:
+            for job in jobs:
+                if error is not None:
+                    job["status"] = "failed"
+                    job["error"] = error
+                elif latest[job["file_name"]] is not job:
+                    job["status"] = "completed"
+                    job["result"] = "superseded"
+                elif statuses.get(job["file_name"]) == "failed":
+                    job["status"] = "failed"
+                    job["error"] = f"Could not parse {job['file_name']}"
+                else:
+                    job["status"] = "completed"
+                    job["result"] = statuses.get(job["file_name"])
+                job["progress"]["files_done"] = len(latest) if error is None else job["progress"]["files_done"]
+                job["finished_at"] = finished
+                job["processing_seconds"] = finished - started
+        logger.info(f"Ingestion batch of {len(latest)} files finished in {finished - started:.2f}s")
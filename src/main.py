@@ -1,18 +1,28 @@
 import os
 import json
+import asyncio
+import hashlib
 import logging
-from fastapi import FastAPI, UploadFile, File, HTTPException, Header, Depends
+from fastapi import FastAPI, UploadFile, File, HTTPException, Header, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any, Union
-from llama_index.core import Document, VectorStoreIndex, Settings
-from llama_index.llms.ollama import Ollama
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-from fastembed import TextEmbedding
+from fastapi.responses import StreamingResponse, JSONResponse, Response
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any, Union, Callable
 from src.document_loader import DocumentLoader
-from src.index_manager import IndexManager
+from src.index_manager import IndexManager, RESPONSE_MODES, RETRIEVAL_MODES
 from src.query_engine import QueryManager
 from src.auth_middleware import JWTMiddleware, get_current_user
+from src.worker_pool import WorkerPool, PoolSaturatedError
+from src.ollama_pool import OllamaBackendPool
+from src.answer_cache import AnswerCache
+from src.ingestion_jobs import IngestionJobQueue
+from src.document_catalog import DocumentCatalog
+from src.tenants import Tenant, TenantRegistry, TENANT_MODES
+from src.chat_sessions import ChatSessionStore
+from src.query_batcher import QueryBatcher, SingleFlight
+from src.prompt_builder import PromptBuilder, parse_context_windows
+from src.metrics import TimingMiddleware, span, record_stage, record_ollama_response, record_prompt_tokens, render_metrics
+from contextlib import asynccontextmanager
 import httpx
 import time
 
@@ -27,7 +37,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Local AI Assistant API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources on startup and release them on shutdown"""
+    await ollama_pool.start()
+    # Accept requests right away; RAG endpoints answer 503 until the warm-up has loaded the index
+    warmup_task = asyncio.create_task(startup_event())
+    snapshot_watcher = asyncio.create_task(watch_index_snapshots())
+    yield
+    warmup_task.cancel()
+    snapshot_watcher.cancel()
+    await shutdown_event()
+
+app = FastAPI(title="Local AI Assistant API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -38,8 +60,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Add JWT middleware
-app.add_middleware(JWTMiddleware)
+# Add JWT middleware; tokens are only verified when JWT_SECRET is set
+JWT_SECRET = os.environ.get("JWT_SECRET")
+JWT_EXEMPT_PATHS = [path.strip() for path in os.environ.get("JWT_EXEMPT_PATHS", "/,/healthz,/readyz,/metrics,/docs,/openapi.json").split(",") if path.strip()]
+JWT_CACHE_SIZE = int(os.environ.get("JWT_CACHE_SIZE", "1024"))
+app.add_middleware(
+    JWTMiddleware,
+    secret=JWT_SECRET,
+    exempt_paths=JWT_EXEMPT_PATHS,
+    cache_size=JWT_CACHE_SIZE
+)
+
+# Record request latency and per-stage timings for /metrics; stage timings are returned
+# in a Server-Timing header for requests sent with "X-Debug-Timing: 1", or always with TIMING_HEADER=true
+app.add_middleware(
+    TimingMiddleware,
+    timing_header=os.environ.get("TIMING_HEADER", "false").lower() in ("1", "true", "yes")
+)
 
 # Configuration from environment variables
 OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
@@ -52,6 +89,98 @@ OLLAMA_PORT = int(os.environ.get("OLLAMA_PORT", "11434"))
 if not os.environ.get("OLLAMA_BASE_URL") and (os.environ.get("OLLAMA_HOST") or os.environ.get("OLLAMA_PORT")):
     OLLAMA_BASE_URL = f"http://{OLLAMA_HOST}:{OLLAMA_PORT}"
 
+# Comma-separated Ollama servers to spread requests over; defaults to OLLAMA_BASE_URL
+OLLAMA_BASE_URLS = [url.strip() for url in os.environ.get("OLLAMA_BASE_URLS", OLLAMA_BASE_URL).split(",") if url.strip()]
+OLLAMA_HEALTH_INTERVAL = float(os.environ.get("OLLAMA_HEALTH_INTERVAL", "10"))
+
+# Shared Ollama HTTP client limits and timeouts
+OLLAMA_MAX_CONNECTIONS = int(os.environ.get("OLLAMA_MAX_CONNECTIONS", "20"))
+OLLAMA_MAX_KEEPALIVE = int(os.environ.get("OLLAMA_MAX_KEEPALIVE", "10"))
+OLLAMA_KEEPALIVE_EXPIRY = float(os.environ.get("OLLAMA_KEEPALIVE_EXPIRY", "30"))
+OLLAMA_CONNECT_TIMEOUT = float(os.environ.get("OLLAMA_CONNECT_TIMEOUT", "5"))
+OLLAMA_READ_TIMEOUT = float(os.environ.get("OLLAMA_READ_TIMEOUT", "120"))
+OLLAMA_MAX_RETRIES = int(os.environ.get("OLLAMA_MAX_RETRIES", "2"))
+OLLAMA_RETRY_BACKOFF = float(os.environ.get("OLLAMA_RETRY_BACKOFF", "0.5"))
+# How long Ollama keeps the model, and the evaluated prompt of the last chat, loaded after a /chat request,
+# e.g. "30m", "2h" or "-1m" (indefinitely); empty uses Ollama's own default of 5 minutes
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+# Embedding backend ("huggingface" or "fastembed") and ingestion parallelism
+EMBED_BACKEND = os.environ.get("EMBED_BACKEND", "huggingface")
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", "256"))
+INGEST_WORKERS = int(os.environ["INGEST_WORKERS"]) if os.environ.get("INGEST_WORKERS") else None
+
+# Uploads arriving within this many seconds of each other are indexed as one batch
+INGEST_COALESCE_SECONDS = float(os.environ.get("INGEST_COALESCE_SECONDS", "1.0"))
+INGEST_MAX_BATCH = int(os.environ.get("INGEST_MAX_BATCH", "64"))
+
+# Embedding storage type ("float32", "float16" or "int8") and whether to memory-map the persisted vectors and BM25 postings
+VECTOR_DTYPE = os.environ.get("VECTOR_DTYPE", "float32")
+VECTOR_MMAP = os.environ.get("VECTOR_MMAP", "true").lower() in ("1", "true", "yes")
+
+# Retrieval mode: "hybrid" (BM25 + vector with reciprocal rank fusion) or "vector"
+RETRIEVAL_MODE = os.environ.get("RETRIEVAL_MODE", "hybrid")
+
+# Default and maximum number of chunks a request may retrieve
+RAG_TOP_K = int(os.environ.get("RAG_TOP_K", "3"))
+RAG_MAX_TOP_K = int(os.environ.get("RAG_MAX_TOP_K", "20"))
+
+# Bounded worker pool for blocking RAG and indexing work
+RAG_POOL_WORKERS = int(os.environ.get("RAG_POOL_WORKERS", "4"))
+RAG_POOL_QUEUE = int(os.environ.get("RAG_POOL_QUEUE", "32"))
+
+# Token budget of the /chat prompt: context window per model (e.g. "llama3=8192,mistral=8192"),
+# tokens kept free for the response, and the share of the rest retrieved context may use
+PROMPT_CONTEXT_WINDOW = int(os.environ.get("PROMPT_CONTEXT_WINDOW", "4096"))
+PROMPT_MODEL_CONTEXT_WINDOWS = parse_context_windows(os.environ.get("PROMPT_MODEL_CONTEXT_WINDOWS", ""))
+PROMPT_RESERVE_TOKENS = int(os.environ.get("PROMPT_RESERVE_TOKENS", "512"))
+PROMPT_CONTEXT_SHARE = float(os.environ.get("PROMPT_CONTEXT_SHARE", "0.5"))
+
+# Micro-batching of concurrent query embeddings and vector searches; a window of 0 disables it
+QUERY_BATCH_WINDOW_MS = float(os.environ.get("QUERY_BATCH_WINDOW_MS", "2"))
+QUERY_BATCH_MAX = int(os.environ.get("QUERY_BATCH_MAX", "32"))
+
+# Answer cache for /query and RAG /chat retrieval; the semantic tier is off unless a threshold is set
+ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", "1024"))
+ANSWER_CACHE_TTL = float(os.environ.get("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_SEMANTIC_THRESHOLD = os.environ.get("ANSWER_CACHE_SEMANTIC_THRESHOLD")
+
+# Directory the documents are read from and uploads are written to
+DOCS_PATH = os.environ.get("DOCS_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "docs"))
+
+# How files added to or changed in DOCS_PATH outside the API are detected: "auto" (watch, polling
+# as fallback), "poll" or "off"; changes are indexed once the directory has been quiet for the debounce time
+DOCS_WATCH = os.environ.get("DOCS_WATCH", "auto").lower()
+DOCS_POLL_SECONDS = float(os.environ.get("DOCS_POLL_SECONDS", "5"))
+DOCS_DEBOUNCE_SECONDS = float(os.environ.get("DOCS_DEBOUNCE_SECONDS", "2"))
+
+# Where the vector index and its manifest are persisted between restarts
+INDEX_PERSIST_DIR = os.environ.get(
+    "INDEX_PERSIST_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "index_storage")
+)
+
+# How often each worker checks for an index version published by another worker,
+# and how many versions stay on disk for workers that have not switched yet
+INDEX_POLL_SECONDS = float(os.environ.get("INDEX_POLL_SECONDS", "1.0"))
+INDEX_SNAPSHOT_KEEP = int(os.environ.get("INDEX_SNAPSHOT_KEEP", "3"))
+
+# Separate documents and index per tenant: "off" (one shared index), "user" (the token's subject)
+# or "workspace" (the token's workspace claim, falling back to its subject)
+TENANT_MODE = os.environ.get("TENANT_MODE", "off").lower()
+if TENANT_MODE not in TENANT_MODES:
+    raise ValueError(f"Invalid TENANT_MODE: {TENANT_MODE}. Expected one of {', '.join(TENANT_MODES)}")
+TENANTS_DIR = os.environ.get("TENANTS_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "tenants"))
+# Estimated memory the tenant indexes kept in memory may use; least recently used tenants are evicted beyond it
+TENANT_MEMORY_BUDGET_MB = float(os.environ.get("TENANT_MEMORY_BUDGET_MB", "1024"))
+
+# Server-side chat sessions: how many stay in memory, how long an idle one lives and how many messages each
+# keeps, and an optional SQLite file that sessions evicted from memory (and all of them on shutdown) go to
+CHAT_SESSIONS_MAX = int(os.environ.get("CHAT_SESSIONS_MAX", "1000"))
+CHAT_SESSION_TTL = float(os.environ.get("CHAT_SESSION_TTL", "86400"))
+CHAT_SESSION_MAX_MESSAGES = int(os.environ.get("CHAT_SESSION_MAX_MESSAGES", "200"))
+CHAT_SESSIONS_DB = os.environ.get("CHAT_SESSIONS_DB")
+
 class ChatMessage(BaseModel):
     role: str
     content: str
@@ -63,15 +192,29 @@ class ChatRequest(BaseModel):
     max_tokens: Optional[int] = None
     stream: bool = False
     use_rag: bool = False  # Flag to indicate whether to use RAG
+    top_k: Optional[int] = Field(default=None, ge=1, le=RAG_MAX_TOP_K)
+    retrieval_mode: Optional[str] = None  # "hybrid" or "vector"; defaults to RETRIEVAL_MODE
+    session_id: Optional[str] = None  # Server-side history from /chat/sessions; messages then holds only the new turn
+
+class ChatSessionRequest(BaseModel):
+    messages: List[ChatMessage] = []  # Initial messages, such as a system prompt
 
 class QueryRequest(BaseModel):
     query: str
     temperature: float = 0.7
+    top_k: Optional[int] = Field(default=None, ge=1, le=RAG_MAX_TOP_K)
+    response_mode: str = "compact"
+    retrieval_mode: Optional[str] = None  # "hybrid" or "vector"; defaults to RETRIEVAL_MODE
 
 class DocumentInfo(BaseModel):
     filename: str
     size: int
     type: str
+    modified_at: Optional[float] = None
+    hash: Optional[str] = None
+    chunks: Optional[int] = None
+    indexed_at: Optional[float] = None
+    indexed: bool = False
 
 class ChatResponse(BaseModel):
     id: str
@@ -80,54 +223,318 @@ class ChatResponse(BaseModel):
     createdAt: str = ""
     updatedAt: str = ""
     sources: List[Dict[str, Any]] = []
+    prompt_tokens: Dict[str, int] = {}
+    session_id: Optional[str] = None
 
 # Initialize components
-docs_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "docs")
+docs_path = DOCS_PATH
 doc_loader = DocumentLoader(docs_path)
-index_manager = IndexManager(
-    model_name=OLLAMA_MODEL,
-    ollama_base_url=OLLAMA_BASE_URL
+ollama_pool = OllamaBackendPool(
+    base_urls=OLLAMA_BASE_URLS,
+    health_interval=OLLAMA_HEALTH_INTERVAL,
+    max_connections=OLLAMA_MAX_CONNECTIONS,
+    max_keepalive_connections=OLLAMA_MAX_KEEPALIVE,
+    keepalive_expiry=OLLAMA_KEEPALIVE_EXPIRY,
+    connect_timeout=OLLAMA_CONNECT_TIMEOUT,
+    read_timeout=OLLAMA_READ_TIMEOUT,
+    max_retries=OLLAMA_MAX_RETRIES,
+    retry_backoff=OLLAMA_RETRY_BACKOFF
+)
+
+def create_index_manager(persist_dir: str) -> IndexManager:
+    """Create an IndexManager with the configured models and storage options, persisting to persist_dir"""
+    return IndexManager(
+        model_name=OLLAMA_MODEL,
+        ollama_base_url=OLLAMA_BASE_URL,
+        persist_dir=persist_dir,
+        embed_backend=EMBED_BACKEND,
+        embed_batch_size=EMBED_BATCH_SIZE,
+        ingest_workers=INGEST_WORKERS,
+        vector_dtype=VECTOR_DTYPE,
+        mmap=VECTOR_MMAP,
+        retrieval_mode=RETRIEVAL_MODE,
+        ollama_pool=ollama_pool,
+        snapshot_keep=INDEX_SNAPSHOT_KEEP
+    )
+
+index_manager = create_index_manager(INDEX_PERSIST_DIR)
+answer_cache = AnswerCache(
+    max_entries=ANSWER_CACHE_SIZE,
+    ttl_seconds=ANSWER_CACHE_TTL,
+    semantic_threshold=float(ANSWER_CACHE_SEMANTIC_THRESHOLD) if ANSWER_CACHE_SEMANTIC_THRESHOLD else None,
+    embed_fn=lambda text: index_manager.embed_queries([text])[0]
+)
+# Cache keys carry the tenant and index version; a change only drops that tenant's entries
+index_manager.add_change_listener(lambda: answer_cache.clear(""))
+prompt_builder = PromptBuilder(
+    context_window=PROMPT_CONTEXT_WINDOW,
+    model_context_windows=PROMPT_MODEL_CONTEXT_WINDOWS,
+    reserve_tokens=PROMPT_RESERVE_TOKENS,
+    context_share=PROMPT_CONTEXT_SHARE
+)
+chat_sessions = ChatSessionStore(
+    max_sessions=CHAT_SESSIONS_MAX,
+    ttl_seconds=CHAT_SESSION_TTL,
+    max_messages=CHAT_SESSION_MAX_MESSAGES,
+    sqlite_path=CHAT_SESSIONS_DB
+)
+worker_pool = WorkerPool(max_workers=RAG_POOL_WORKERS, max_queue=RAG_POOL_QUEUE)
+# Progress of the background warm-up, reported by /readyz
+warmup: Dict[str, Any] = {"status": "starting", "error": None, "started_at": time.time(), "ready_at": None}
+ingestion_jobs = IngestionJobQueue(
+    index_manager,
+    docs_path,
+    coalesce_seconds=INGEST_COALESCE_SECONDS,
+    max_batch_files=INGEST_MAX_BATCH
+)
+
+async def reindex_documents(changed: Dict[str, str], removed: List[str]):
+    """Queue files that were added, changed or removed in the documents directory outside the API for indexing"""
+    for file_name, content_hash in changed.items():
+        ingestion_jobs.submit(file_name, content_hash)
+    for file_name in removed:
+        # Through the same single writer as additions, so a busy request pool cannot drop the removal
+        ingestion_jobs.submit(file_name, None)
+        logger.info(f"Document {file_name} no longer exists, queued for removal from index")
+
+document_catalog = DocumentCatalog(
+    docs_path,
+    index_manager,
+    worker_pool.run,
+    on_changes=reindex_documents,
+    watch=DOCS_WATCH,
+    poll_seconds=DOCS_POLL_SECONDS,
+    debounce_seconds=DOCS_DEBOUNCE_SECONDS,
+    # One worker watches; the others take over if it exits
+    lock_path=os.path.join(INDEX_PERSIST_DIR, "watcher.lock")
 )
 
+async def run_blocking(fn, *args, **kwargs):
+    """Run blocking work on the worker pool, rejecting fast with 503 when it is saturated."""
+    try:
+        return await worker_pool.run(fn, *args, **kwargs)
+    except PoolSaturatedError as e:
+        logger.warning(str(e))
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+
+# The shared index, used by every request when TENANT_MODE is off
+default_tenant = Tenant("", docs_path, index_manager, document_catalog)
+tenant_registry = TenantRegistry(
+    TENANTS_DIR,
+    create_index_manager,
+    # Tenant loads run on the request path, so a saturated pool answers 503 like any other request
+    run_blocking,
+    memory_budget_bytes=int(TENANT_MEMORY_BUDGET_MB * 1024 * 1024),
+    on_load=lambda tenant: tenant.index_manager.add_change_listener(lambda: answer_cache.clear(tenant.tenant_id))
+)
+
+query_batcher = QueryBatcher(
+    index_manager,
+    run_blocking,
+    window_seconds=QUERY_BATCH_WINDOW_MS / 1000,
+    max_batch=QUERY_BATCH_MAX
+)
+single_flight = SingleFlight("query")
+
+def validate_retrieval_options(retrieval_mode: Optional[str], response_mode: Optional[str] = None):
+    """Reject unknown retrieval or response modes with 400."""
+    if retrieval_mode is not None and retrieval_mode not in RETRIEVAL_MODES:
+        raise HTTPException(status_code=400, detail=f"retrieval_mode must be one of {list(RETRIEVAL_MODES)}")
+    if response_mode is not None and response_mode not in RESPONSE_MODES:
+        raise HTTPException(status_code=400, detail=f"response_mode must be one of {list(RESPONSE_MODES)}")
+
+async def cached(fn, *args, **kwargs):
+    """Call an answer cache method, on the worker pool when the semantic tier has to embed the query."""
+    if answer_cache.semantic_threshold is None:
+        return fn(*args, **kwargs)
+    return await run_blocking(fn, *args, **kwargs)
+
+async def answer_query(
+    tenant: Tenant,
+    query_text: str,
+    temperature: float,
+    top_k: int = RAG_TOP_K,
+    response_mode: str = "compact",
+    retrieval_mode: Optional[str] = None
+) -> Dict:
+    """Retrieve and synthesize an answer from the tenant's index, served from the answer cache when possible."""
+    index_manager = tenant.index_manager
+    retrieval_mode = retrieval_mode or index_manager.retrieval_mode
+    cache_key = {
+        "model": index_manager.model_name,
+        "temperature": temperature,
+        "index_version": (tenant.tenant_id, index_manager.version),
+        "options": (top_k, response_mode, retrieval_mode),
+    }
+    with span("cache_lookup"):
+        cached_result = await cached(answer_cache.get, "query", query_text, **cache_key)
+    if cached_result is not None:
+        return cached_result
+
+    nodes = await query_batcher.retrieve(query_text, top_k, retrieval_mode, index_manager)
+    query_engine = index_manager.get_query_engine(
+        similarity_top_k=top_k, response_mode=response_mode, retrieval_mode=retrieval_mode
+    )
+    result = await run_blocking(QueryManager(query_engine).synthesize, query_text, nodes)
+    await cached(answer_cache.put, "query", query_text, result, **cache_key)
+    return result
+
+async def retrieve_context(
+    tenant: Tenant,
+    query_text: str,
+    top_k: int = RAG_TOP_K,
+    retrieval_mode: Optional[str] = None
+) -> Dict:
+    """Retrieve the top-k chunks for a query from the tenant's index without LLM synthesis, using the answer cache."""
+    index_manager = tenant.index_manager
+    retrieval_mode = retrieval_mode or index_manager.retrieval_mode
+    index_version = (tenant.tenant_id, index_manager.version)
+    options = (top_k, retrieval_mode)
+    with span("cache_lookup"):
+        cached_result = await cached(answer_cache.get, "retrieve", query_text, index_version=index_version, options=options)
+    if cached_result is not None:
+        return cached_result
+
+    nodes = await query_batcher.retrieve(query_text, top_k, retrieval_mode, index_manager)
+    result = QueryManager.format_retrieval(nodes)
+    await cached(answer_cache.put, "retrieve", query_text, result, index_version=index_version, options=options)
+    return result
+
 @app.get("/")
 async def root():
     return {"status": "ok", "message": "Local AI Assistant API is running"}
 
-@app.on_event("startup")
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "ok", "uptime_seconds": time.time() - warmup["started_at"]}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: the index is loaded and at least one Ollama backend is reachable"""
+    index_ready = warmup["status"] == "ready"
+    ollama_ready = ollama_pool.has_healthy_backend()
+    body = {
+        "ready": index_ready and ollama_ready,
+        "index": {
+            "ready": index_ready,
+            "warmup": warmup["status"],
+            "error": warmup["error"],
+            "snapshot": index_manager.snapshot,
+            "files": len(index_manager.files),
+            "tenant_mode": TENANT_MODE,
+            "resident_tenants": len(tenant_registry.resident()),
+        },
+        "ollama": {
+            "ready": ollama_ready,
+            "healthy_backends": [backend.base_url for backend in ollama_pool.backends if backend.healthy and backend.last_checked],
+        },
+    }
+    return JSONResponse(status_code=200 if body["ready"] else 503, content=body)
+
+async def check_ollama():
+    """Run a first health check of the Ollama backends and log whether they have the default model"""
+    await ollama_pool.check_health()
+    for backend in ollama_pool.backends:
+        if not backend.healthy:
+            logger.error(f"Failed to connect to Ollama at {backend.base_url}: {backend.last_error}")
+            logger.error("Make sure Ollama is running and accessible")
+        elif OLLAMA_MODEL not in backend.models:
+            logger.warning(f"Model {OLLAMA_MODEL} not found in Ollama at {backend.base_url}. Available models: {sorted(backend.models)}")
+            logger.info(f"You may need to pull the model using: ollama pull {OLLAMA_MODEL}")
+        else:
+            logger.info(f"Model {OLLAMA_MODEL} is available in Ollama at {backend.base_url}")
+
 async def startup_event():
-    """Initialize the index on startup"""
+    """Warm up in the background: check Ollama, load the models, then load or build the index"""
     logger.info("Starting up server...")
     try:
-        logger.info(f"Checking Ollama availability at {OLLAMA_BASE_URL}...")
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(f"{OLLAMA_BASE_URL}/api/tags")
-                if response.status_code == 200:
-                    models = response.json().get("models", [])
-                    model_names = [model.get("name") for model in models]
-                    if OLLAMA_MODEL not in model_names:
-                        logger.warning(f"Model {OLLAMA_MODEL} not found in Ollama. Available models: {model_names}")
-                        logger.info(f"You may need to pull the model using: ollama pull {OLLAMA_MODEL}")
-                    else:
-                        logger.info(f"Model {OLLAMA_MODEL} is available in Ollama")
-                else:
-                    logger.warning(f"Ollama returned status code {response.status_code}")
-            except Exception as e:
-                logger.error(f"Failed to connect to Ollama at {OLLAMA_BASE_URL}: {str(e)}")
-                logger.error("Make sure Ollama is running and accessible")
-                
-        logger.info("Loading documents...")
-        documents = doc_loader.load_documents()
-        logger.info(f"Loaded {len(documents)} documents")
-        
-        logger.info("Creating index...")
-        index_manager.create_index(documents)
-        logger.info("Index created successfully")
+        warmup["status"] = "loading_models"
+        if TENANT_MODE != "off":
+            # Tenant indexes are loaded on their first request; the shared index is not used
+            await asyncio.gather(check_ollama(), worker_pool.run(index_manager.ensure_models))
+        else:
+            _, _, file_hashes = await asyncio.gather(
+                check_ollama(),
+                worker_pool.run(index_manager.ensure_models),
+                worker_pool.run(document_catalog.load)
+            )
+
+            warmup["status"] = "indexing"
+            logger.info("Loading index...")
+            await worker_pool.run(index_manager.load_or_create_index, doc_loader, file_hashes)
+            document_catalog.start()
+        ingestion_jobs.start()
+        warmup.update(status="ready", ready_at=time.time())
+        logger.info(f"Index ready {warmup['ready_at'] - warmup['started_at']:.1f}s after startup")
     except Exception as e:
+        warmup.update(status="failed", error=str(e))
         logger.error(f"Error during startup: {str(e)}")
         import traceback
         logger.error(f"Traceback: {traceback.format_exc()}")
 
+def require_index():
+    """Reject requests that need the index with 503 while it is still warming up."""
+    if warmup["status"] != "ready":
+        detail = "Index is still loading, please retry shortly"
+        if warmup["status"] == "failed":
+            detail = f"Index failed to load: {warmup['error']}"
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": "5"})
+
+def get_tenant_id(http_request: Request) -> str:
+    """Tenant of a request: "" (the shared index) when TENANT_MODE is off, otherwise taken from the verified token."""
+    if TENANT_MODE == "off":
+        return ""
+    user = getattr(http_request.state, "user", None)
+    tenant_id = None
+    if user:
+        tenant_id = (user.get("workspace") if TENANT_MODE == "workspace" else None) or user.get("id")
+    if not tenant_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    return str(tenant_id)
+
+def get_user_id(http_request: Request) -> str:
+    """User of a request from the verified token, or "" when it carries none."""
+    user = getattr(http_request.state, "user", None)
+    return str(user.get("id") or "") if user else ""
+
+async def get_tenant(http_request: Request) -> Tenant:
+    """Tenant of a request, with its index loaded."""
+    tenant_id = get_tenant_id(http_request)
+    if not tenant_id:
+        return default_tenant
+    return await tenant_registry.get(tenant_id)
+
+async def watch_index_snapshots():
+    """Switch to index versions published by other workers; requests in flight finish on the old one"""
+    while True:
+        await asyncio.sleep(INDEX_POLL_SECONDS)
+        # The warm-up loads the latest snapshot itself
+        if warmup["status"] != "ready":
+            continue
+        managers = [tenant.index_manager for tenant in tenant_registry.resident()]
+        if TENANT_MODE == "off":
+            managers.append(index_manager)
+        for manager in managers:
+            try:
+                if manager.latest_snapshot() != manager.snapshot:
+                    await worker_pool.run(manager.refresh)
+            except Exception as e:
+                logger.error(f"Error switching to the latest index snapshot: {str(e)}")
+        tenant_registry.trim()
+
+async def shutdown_event():
+    """Save chat sessions and release the Ollama client, ingestion queue and worker pool on shutdown"""
+    chat_sessions.close()
+    await document_catalog.close()
+    await ingestion_jobs.close()
+    await ollama_pool.close()
+    worker_pool.shutdown()
+
 # Authentication dependency for protected endpoints
 async def get_token(authorization: Optional[str] = Header(None)) -> Optional[str]:
     if authorization and authorization.startswith("Bearer "):
@@ -135,116 +542,334 @@ async def get_token(authorization: Optional[str] = Header(None)) -> Optional[str
     return None
 
 @app.get("/documents", response_model=List[DocumentInfo])
-async def get_documents(token: Optional[str] = Depends(get_token)):
-    """Get information about loaded documents"""
+async def get_documents(
+    http_request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    type: Optional[str] = None,
+    name: Optional[str] = None,
+    indexed: Optional[bool] = None,
+    token: Optional[str] = Depends(get_token)
+):
+    """Get one page of the document catalog, optionally filtered by type, name and indexed state; the total is in X-Total-Count"""
     try:
-        return doc_loader.get_document_info()
+        tenant = await get_tenant(http_request)
+        total, documents = tenant.catalog.list(offset=offset, limit=limit, file_type=type, name=name, indexed=indexed)
+        response.headers["X-Total-Count"] = str(total)
+        return documents
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving documents: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/query", response_model=ChatResponse)
-async def query(request: QueryRequest, token: Optional[str] = Depends(get_token)):
+async def query(request: QueryRequest, http_request: Request, token: Optional[str] = Depends(get_token)):
     """Process a document query and return the response with sources"""
     try:
-        query_manager = QueryManager(index_manager.get_query_engine())
-        response = query_manager.process_query(request.query)
+        require_index()
+        validate_retrieval_options(request.retrieval_mode, request.response_mode)
+        tenant = await get_tenant(http_request)
+        top_k = request.top_k or RAG_TOP_K
+        retrieval_mode = request.retrieval_mode or tenant.index_manager.retrieval_mode
+        # Identical concurrent queries share one retrieval and synthesis
+        flight_key = (
+            "query", tenant.tenant_id, answer_cache.normalize(request.query), request.temperature,
+            top_k, request.response_mode, retrieval_mode, tenant.index_manager.version
+        )
+        with span("answer"):
+            response = await single_flight.run(flight_key, lambda: answer_query(
+                tenant,
+                request.query,
+                request.temperature,
+                top_k=top_k,
+                response_mode=request.response_mode,
+                retrieval_mode=retrieval_mode
+            ))
         
         return ChatResponse(
             id=str(hash(request.query)),
             content=response["response"],
             sources=response["sources"] if "sources" in response else []
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+class UpstreamStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that always closes the upstream Ollama response it relays.
+
+    The body generator closes it when it finishes, but the generator never runs if the
+    client is gone before the body starts, and a background task is skipped when
+    sending fails, so the pooled connection is released here as well (closing twice is
+    harmless).
+    """
+
+    def __init__(self, upstream: httpx.Response, content, **kwargs):
+        super().__init__(content, **kwargs)
+        self.upstream = upstream
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.upstream.aclose()
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_chat_events(
+    upstream: httpx.Response,
+    response_id: str,
+    sources: List[Dict[str, Any]],
+    model: str,
+    started_at: float,
+    prompt_tokens: Optional[Dict[str, int]] = None,
+    on_done: Optional[Callable[[str], None]] = None
+):
+    """
+    Relay a streaming Ollama chat response as server-sent events.
+
+    Emits a "sources" event first (with the prompt's tokens per section), then one "message" event per generated token
+    chunk and a final "done" event. The next upstream chunk is only read after the
+    previous event was sent, so a slow client applies backpressure to Ollama. If the
+    client disconnects, Starlette cancels this generator and closing the upstream
+    response makes Ollama stop generating. started_at is when the request to Ollama
+    was sent, for the time-to-first-token metric. on_done is called with the full reply
+    once Ollama finished it, not for interrupted streams.
+    """
+    ttft = None
+    parts = []
+    try:
+        yield format_sse("sources", {"id": response_id, "sources": sources, "prompt_tokens": prompt_tokens or {}})
+        async for chunk in ollama_pool.iter_chat_chunks(upstream):
+            if "error" in chunk:
+                logger.error(f"Ollama stream error: {chunk['error']}")
+                yield format_sse("error", {"id": response_id, "detail": chunk["error"]})
+                break
+            content = chunk.get("message", {}).get("content", "")
+            if content:
+                if ttft is None:
+                    ttft = time.perf_counter() - started_at
+                parts.append(content)
+                yield format_sse("message", {"id": response_id, "content": content})
+            if chunk.get("done"):
+                wall = time.perf_counter() - started_at
+                record_stage("ollama", wall)
+                record_ollama_response(model, chunk, wall, ttft_seconds=ttft if ttft is not None else wall)
+                if on_done is not None:
+                    on_done("".join(parts))
+                yield format_sse("done", {
+                    "id": response_id,
+                    "done_reason": chunk.get("done_reason"),
+                    "eval_count": chunk.get("eval_count"),
+                    "eval_duration": chunk.get("eval_duration")
+                })
+                break
+    except httpx.RequestError as e:
+        logger.error(f"Ollama stream interrupted: {e}")
+        yield format_sse("error", {"id": response_id, "detail": "Connection to Ollama was interrupted"})
+    finally:
+        await upstream.aclose()
+
+def session_turn(new_messages: List[Dict[str, str]], chunks: List[Dict[str, Any]], reply: str) -> List[Dict[str, Any]]:
+    """
+    Messages of a finished turn as a session stores them, each with its token count.
+
+    The latest user message keeps only the question and the names of the files its
+    context came from, not the retrieved context itself: stored contexts would fill the
+    context window within a few turns, and once turns get trimmed the prompt prefix
+    changes on every turn.
+    """
+    system = [message for message in new_messages if message["role"] == "system"]
+    conversation = [dict(message) for message in new_messages if message["role"] != "system"]
+    file_names = list(dict.fromkeys(chunk["file_name"] for chunk in chunks))
+    last_user = next((i for i in reversed(range(len(conversation))) if conversation[i]["role"] == "user"), None)
+    if file_names and last_user is not None:
+        conversation[last_user]["content"] += f"\n\n[Sources: {', '.join(file_names)}]"
+    turn = system + conversation + [{"role": "assistant", "content": reply}]
+    return [{**message, "tokens": prompt_builder.message_tokens(message)} for message in turn]
+
+def session_info(session: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "session_id": session["id"],
+        "created_at": session["created_at"],
+        "updated_at": session["updated_at"],
+        "messages": session["messages"],
+        "tokens": sum(message["tokens"] for message in session["messages"]),
+        "sources": session["retrieval"]["sources"] if session["retrieval"] else [],
+    }
+
+@app.post("/chat/sessions")
+async def create_chat_session(request: ChatSessionRequest, http_request: Request, token: Optional[str] = Depends(get_token)):
+    """Start a server-side chat session; pass its session_id to /chat and send only the new turn"""
+    messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
+    messages = [{**message, "tokens": prompt_builder.message_tokens(message)} for message in messages]
+    session = chat_sessions.create(get_user_id(http_request), messages)
+    return session_info(session)
+
+@app.get("/chat/sessions/{session_id}")
+async def get_chat_session(session_id: str, http_request: Request, token: Optional[str] = Depends(get_token)):
+    """Get a session's stored messages, their token counts and the last retrieval's sources"""
+    session = chat_sessions.get(session_id, get_user_id(http_request))
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session_info(session)
+
+@app.delete("/chat/sessions/{session_id}")
+async def delete_chat_session(session_id: str, http_request: Request, token: Optional[str] = Depends(get_token)):
+    """Delete a chat session"""
+    if not chat_sessions.delete(session_id, get_user_id(http_request)):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"message": "Session deleted"}
+
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest, token: Optional[str] = Depends(get_token)):
-    """Process a chat request with optional RAG"""
+async def chat(request: ChatRequest, http_request: Request, token: Optional[str] = Depends(get_token)):
+    """Process a chat request with optional RAG, streamed as server-sent events when stream is set"""
     try:
         logger.info(f"Received chat request for model: {request.model}")
         
+        # With a session the server holds the history and the request only carries the new turn
+        new_messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
+        session = None
+        history = []
+        if request.session_id:
+            session = chat_sessions.get(request.session_id, get_user_id(http_request))
+            if session is None:
+                raise HTTPException(status_code=404, detail="Session not found")
+            if not any(message["role"] == "user" for message in new_messages):
+                raise HTTPException(status_code=400, detail="The new turn needs a user message")
+            history = session["messages"]
+        
         # Get user's last message
-        user_message = next((msg.content for msg in reversed(request.messages) if msg.role == "user"), None)
+        user_message = next((message["content"] for message in reversed(new_messages) if message["role"] == "user"), None)
         
         # If RAG is enabled and we have a user message, retrieve context
-        context = ""
+        chunks = []
         sources = []
+        session_retrieval = None
         if request.use_rag and user_message:
             logger.info("RAG enabled, retrieving context from documents...")
+            require_index()
             
-            # Get query engine from the index manager
-            query_engine = index_manager.get_query_engine()
-            
-            # Use QueryManager to get context and sources
-            query_manager = QueryManager(query_engine)
-            query_result = query_manager.process_query(user_message)
+            # Retrieve raw chunks in a shared micro-batch; Ollama does the only generation
+            validate_retrieval_options(request.retrieval_mode)
+            tenant = await get_tenant(http_request)
+            top_k = request.top_k or RAG_TOP_K
+            retrieval_mode = request.retrieval_mode or tenant.index_manager.retrieval_mode
+            retrieval_key = [
+                tenant.tenant_id, answer_cache.normalize(user_message), top_k, retrieval_mode, tenant.index_manager.version
+            ]
+            if session and session["retrieval"] and session["retrieval"]["key"] == retrieval_key:
+                # The same question again, e.g. a regenerated answer, reuses the session's last retrieval
+                retrieval = session["retrieval"]
+            else:
+                with span("rag"):
+                    retrieval = await single_flight.run(
+                        ("retrieve", *retrieval_key),
+                        lambda: retrieve_context(tenant, user_message, top_k=top_k, retrieval_mode=retrieval_mode)
+                    )
             
-            # Extract context and sources from the query result
-            context = query_result.get("response", "")
-            sources = query_result.get("sources", [])
+            # Keep the full chunks for the prompt and their previews as sources
+            chunks = retrieval["chunks"]
+            sources = retrieval["sources"]
+            session_retrieval = {"key": retrieval_key, "chunks": chunks, "sources": sources}
             
-            logger.info(f"Retrieved context of length {len(context)} with {len(sources)} sources")
-        
-        # Format messages for Ollama API
-        formatted_messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
+            logger.info(f"Retrieved {len(chunks)} chunks with {len(sources)} sources")
         
-        # If we have RAG context, add it to the system message or create one
-        if context:
-            # Check if there's an existing system message
-            has_system = any(msg["role"] == "system" for msg in formatted_messages)
-            
-            if has_system:
-                # Append the context to the existing system message
-                for msg in formatted_messages:
-                    if msg["role"] == "system":
-                        msg["content"] += f"\n\nRelevant context from documents:\n{context}"
-                        break
-            else:
-                # Create a new system message with the context
-                formatted_messages.insert(0, {
-                    "role": "system", 
-                    "content": f"You are a helpful assistant. Use the following context from documents to answer the user's question if relevant:\n\n{context}"
-                })
+        # Fit the system prompt, history and retrieved context into the model's token budget
+        with span("prompt"):
+            prompt = prompt_builder.build(
+                request.model,
+                history + new_messages,
+                chunks=chunks,
+                max_tokens=request.max_tokens
+            )
+        record_prompt_tokens(prompt["tokens"])
+        if prompt["dropped_turns"] or prompt["dropped_chunks"]:
+            logger.info(
+                f"Prompt over budget ({prompt['budget']} tokens): left out {prompt['dropped_turns']} turns "
+                f"and {prompt['dropped_chunks']} chunks"
+            )
         
         # Set up the request to Ollama
         ollama_request = {
             "model": request.model,
-            "messages": formatted_messages,
+            "messages": prompt["messages"],
             "options": {
-                "temperature": request.temperature
+                "temperature": request.temperature,
+                "num_ctx": prompt["num_ctx"]
             }
         }
         
         if request.max_tokens:
             ollama_request["options"]["num_predict"] = request.max_tokens
+        if OLLAMA_KEEP_ALIVE:
+            ollama_request["keep_alive"] = OLLAMA_KEEP_ALIVE
             
         logger.debug(f"Sending to Ollama: {ollama_request}")
         
-        # Make request to Ollama
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{OLLAMA_BASE_URL}/api/chat",
-                json=ollama_request
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"Ollama error: {response.text}")
+        # A session's turns go to the backend that evaluated its previous prompt
+        preferred_backend = session["backend"] if session else None
+        
+        def save_turn(reply: str, backend: Optional[str]):
+            if session is not None:
+                turn = session_turn(new_messages, chunks, reply)
+                chat_sessions.append(session, turn, retrieval=session_retrieval, backend=backend)
+        
+        response_id = str(int(time.time()))
+        if request.stream:
+            started_at = time.perf_counter()
+            upstream = await ollama_pool.open_chat_stream(ollama_request, prefer=preferred_backend)
+            if upstream.status_code != 200:
+                error_text = (await upstream.aread()).decode("utf-8", errors="replace")
+                await upstream.aclose()
+                logger.error(f"Ollama error: {error_text}")
                 raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Ollama API error: {response.text}"
+                    status_code=upstream.status_code,
+                    detail=f"Ollama API error: {error_text}"
                 )
-            
-            ollama_response = response.json()
-            logger.debug(f"Received from Ollama: {ollama_response}")
-            
-            # Create response with content and sources if RAG was used
-            return ChatResponse(
-                id=str(int(time.time())),
-                content=ollama_response.get("message", {}).get("content", ""),
-                sources=sources if request.use_rag else []
+            return UpstreamStreamingResponse(
+                upstream,
+                stream_chat_events(
+                    upstream, response_id, sources if request.use_rag else [], request.model, started_at, prompt["tokens"],
+                    on_done=lambda reply: save_turn(reply, upstream.extensions.get("ollama_backend"))
+                ),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+        
+        # Make request to Ollama over the shared connection pool
+        started_at = time.perf_counter()
+        with span("ollama"):
+            response = await ollama_pool.chat(ollama_request, prefer=preferred_backend)
+        
+        if response.status_code != 200:
+            logger.error(f"Ollama error: {response.text}")
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Ollama API error: {response.text}"
             )
+        
+        ollama_response = response.json()
+        logger.debug(f"Received from Ollama: {ollama_response}")
+        record_ollama_response(request.model, ollama_response, time.perf_counter() - started_at)
+        content = ollama_response.get("message", {}).get("content", "")
+        save_turn(content, response.extensions.get("ollama_backend"))
+        
+        # Create response with content and sources if RAG was used
+        return ChatResponse(
+            id=response_id,
+            content=content,
+            sources=sources if request.use_rag else [],
+            prompt_tokens=prompt["tokens"],
+            session_id=session["id"] if session else None
+        )
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error: {e}")
         raise HTTPException(status_code=500, detail=f"HTTP error: {str(e)}")
@@ -254,6 +879,8 @@ async def chat(request: ChatRequest, token: Optional[str] = Depends(get_token)):
             status_code=503,
             detail="Could not connect to Ollama. Is the service running?"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}")
         import traceback
@@ -261,49 +888,146 @@ async def chat(request: ChatRequest, token: Optional[str] = Depends(get_token)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/upload")
-async def upload_document(file: UploadFile = File(...), token: Optional[str] = Depends(get_token)):
-    """Upload a new document"""
+async def upload_document(http_request: Request, file: UploadFile = File(...), token: Optional[str] = Depends(get_token)):
+    """Save a document and queue it for background indexing; returns 202 with a job id"""
     try:
+        require_index()
+        tenant = await get_tenant(http_request)
+        file_name = os.path.basename(file.filename or "")
+        if not file_name or file_name.startswith("."):
+            raise HTTPException(status_code=400, detail="Invalid file name")
+
+        content = await file.read()
+        content_hash = hashlib.sha256(content).hexdigest()
+        # Unchanged only if the file on disk and the index will both end up with this content;
+        # a queued upload of other content would otherwise overwrite this one
+        tenant_key = tenant.tenant_id or None
+        target_hash = ingestion_jobs.pending_hash(file_name, tenant_key) or tenant.index_manager.get_document_hash(file_name)
+        if target_hash == content_hash and tenant.catalog.get_hash(file_name) == content_hash:
+            logger.info(f"Document {file_name} is unchanged, skipping upload")
+            return {"message": "Document already indexed", "status": "unchanged"}
+
         # Save the uploaded file
-        file_path = os.path.join(docs_path, file.filename)
+        file_path = os.path.join(tenant.docs_path, file_name)
         with open(file_path, "wb") as buffer:
-            content = await file.read()
             buffer.write(content)
+        tenant.catalog.record(file_name, content_hash)
         
-        logger.info(f"Document uploaded: {file.filename}")
+        logger.info(f"Document uploaded: {file_name}")
         
-        # Reload documents and recreate index
-        documents = doc_loader.load_documents()
-        index_manager.create_index(documents)
+        # Index in the background; uploads close together are applied as one batch
+        job = ingestion_jobs.submit(
+            file_name,
+            content_hash,
+            index_manager=tenant.index_manager,
+            docs_path=tenant.docs_path,
+            tenant=tenant_key
+        )
         
-        return {"message": "Document uploaded successfully"}
+        return JSONResponse(
+            status_code=202,
+            content={"message": "Document queued for indexing", "status": "queued", "job_id": job["job_id"]}
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error uploading document: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.delete("/documents/{filename}")
+async def delete_document(filename: str, http_request: Request, token: Optional[str] = Depends(get_token)):
+    """Delete a document and remove it from the index"""
+    try:
+        require_index()
+        tenant = await get_tenant(http_request)
+        file_name = os.path.basename(filename)
+        file_path = os.path.join(tenant.docs_path, file_name)
+        removed_from_index = await run_blocking(tenant.index_manager.delete_document, file_name)
+        file_exists = os.path.isfile(file_path)
+        if not removed_from_index and not file_exists:
+            raise HTTPException(status_code=404, detail=f"Document not found: {file_name}")
+
+        if file_exists:
+            os.remove(file_path)
+        tenant.catalog.forget(file_name)
+        logger.info(f"Document deleted: {file_name}")
+
+        return {"message": "Document deleted successfully"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error deleting document: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, http_request: Request, token: Optional[str] = Depends(get_token)):
+    """Get the status, progress and durations of an ingestion job"""
+    job = ingestion_jobs.get(job_id)
+    # Jobs of other tenants are reported as unknown
+    if job is None or (job["tenant"] or "") != get_tenant_id(http_request):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/stats/ingestion")
+async def get_ingestion_stats(http_request: Request, token: Optional[str] = Depends(get_token)):
+    """Get queue depth of the background ingestion queue, and the caller's job counts and throughput of their last indexing run"""
+    tenant = await get_tenant(http_request)
+    return {**ingestion_jobs.stats(tenant.tenant_id or None), "last_run": tenant.index_manager.pipeline.last_stats}
+
+@app.get("/stats/tenants")
+async def get_tenant_stats(http_request: Request, token: Optional[str] = Depends(get_token)):
+    """Get the number and estimated memory of the tenants held in memory, the eviction count, and the caller's own tenant"""
+    return {"mode": TENANT_MODE, **tenant_registry.stats(get_tenant_id(http_request))}
+
+@app.get("/stats/sessions")
+async def get_session_stats(token: Optional[str] = Depends(get_token)):
+    """Get the number of chat sessions in memory and in SQLite, and how often they were found, reloaded or spilled"""
+    return chat_sessions.stats()
+
+@app.get("/stats/documents")
+async def get_document_stats(http_request: Request, token: Optional[str] = Depends(get_token)):
+    """Get the size of the caller's document catalog, how changes are detected and how many were applied"""
+    tenant = await get_tenant(http_request)
+    return tenant.catalog.stats()
+
+@app.get("/metrics")
+async def get_metrics():
+    """Expose request, stage and Ollama timing metrics in the Prometheus text format"""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+@app.get("/stats/pool")
+async def get_pool_stats(token: Optional[str] = Depends(get_token)):
+    """Get queue depth, utilisation and wait times of the RAG worker pool"""
+    return worker_pool.stats()
+
+@app.get("/stats/cache")
+async def get_cache_stats(token: Optional[str] = Depends(get_token)):
+    """Get hit/miss counters of the answer cache"""
+    return answer_cache.stats()
+
 @app.get("/ollama/models")
 async def get_ollama_models(token: Optional[str] = Depends(get_token)):
-    """Get available models from Ollama"""
+    """Get the models available on the Ollama backends, merged and cached between health checks"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{OLLAMA_BASE_URL}/api/tags")
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Ollama API error: {response.text}"
-                )
-            
-            return response.json()
-    except httpx.RequestError as e:
-        raise HTTPException(
-            status_code=503,
-            detail="Could not connect to Ollama. Is the service running?"
-        )
+        models = await ollama_pool.list_models()
+        if not ollama_pool.has_healthy_backend():
+            raise HTTPException(
+                status_code=503,
+                detail="Could not connect to Ollama. Is the service running?"
+            )
+        return models
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting Ollama models: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/stats/ollama")
+async def get_ollama_stats(token: Optional[str] = Depends(get_token)):
+    """Get health, models and outstanding requests of each Ollama backend"""
+    return ollama_pool.stats()
+
 if __name__ == "__main__":
     import uvicorn
     try:
@@ -0,0 +1,199 @@
+import time
+import logging
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+
+logger = logging.getLogger(__name__)
+
+# Buckets from sub-millisecond cache hits up to multi-minute generations and index builds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TIMING_REQUEST_HEADER = b"x-debug-timing"
+
+REQUEST_SECONDS = Histogram(
+    "assistant_request_duration_seconds",
+    "Time until the response headers are sent, by endpoint",
+    ["method", "endpoint", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "assistant_stage_duration_seconds",
+    "Time spent in each stage of a request or indexing run",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+OLLAMA_TTFT_SECONDS = Histogram(
+    "assistant_ollama_time_to_first_token_seconds",
+    "Time from sending a chat request to Ollama until the first token; estimated from "
+    "load and prompt eval durations for non-streaming requests",
+    ["model", "streaming"],
+    buckets=LATENCY_BUCKETS,
+)
+OLLAMA_PHASE_SECONDS = Histogram(
+    "assistant_ollama_phase_duration_seconds",
+    "Ollama-reported durations (load, prompt_eval, eval) and the time a request spent "
+    "queued or in transit outside of Ollama's own processing (queue)",
+    ["model", "phase"],
+    buckets=LATENCY_BUCKETS,
+)
+OLLAMA_TOKENS = Counter(
+    "assistant_ollama_tokens_total",
+    "Tokens processed by Ollama, by kind (prompt or generated)",
+    ["model", "kind"],
+)
+OLLAMA_TOKENS_PER_SECOND = Histogram(
+    "assistant_ollama_generation_tokens_per_second",
+    "Generation speed reported by Ollama (eval_count / eval_duration)",
+    ["model"],
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 400),
+)
+
+QUERY_BATCH_SIZE = Histogram(
+    "assistant_query_batch_size",
+    "Queries embedded and searched together in one micro-batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+SINGLE_FLIGHT_SHARED = Counter(
+    "assistant_single_flight_shared_total",
+    "Requests that reused the result of an identical in-flight request",
+    ["name"],
+)
+PROMPT_TOKENS = Histogram(
+    "assistant_prompt_tokens",
+    "Estimated tokens per section of the prompt sent to Ollama for /chat",
+    ["section"],
+    buckets=(0, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768),
+)
+TENANTS_RESIDENT = Gauge(
+    "assistant_tenants_resident",
+    "Tenant indexes currently held in memory",
+)
+TENANT_RESIDENT_BYTES = Gauge(
+    "assistant_tenant_resident_bytes",
+    "Estimated memory of the resident tenant indexes",
+)
+TENANT_LOAD_SECONDS = Histogram(
+    "assistant_tenant_load_seconds",
+    "Time to load a tenant's index from disk, including syncing it with its documents",
+    buckets=LATENCY_BUCKETS,
+)
+TENANT_EVICTIONS = Counter(
+    "assistant_tenant_evictions_total",
+    "Tenant indexes dropped from memory to stay within the memory budget",
+)
+
+# Stage timings of the current request, shared with worker threads through the context
+_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar("timings", default=None)
+
+def record_stage(stage: str, seconds: float):
+    """Observe a stage duration and add it to the current request's timings."""
+    STAGE_SECONDS.labels(stage=stage).observe(seconds)
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time the enclosed block as one stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+def record_ollama_response(model: str, data: Dict, wall_seconds: float, ttft_seconds: Optional[float] = None):
+    """
+    Record the timing fields of a final Ollama chat response (durations are in nanoseconds).
+
+    wall_seconds is the time from sending the request to receiving the final chunk; what
+    Ollama does not account for in total_duration was spent queued or in transit.
+    """
+    try:
+        load = data.get("load_duration", 0) / 1e9
+        prompt_eval = data.get("prompt_eval_duration", 0) / 1e9
+        eval_seconds = data.get("eval_duration", 0) / 1e9
+        total = data.get("total_duration", 0) / 1e9
+        prompt_tokens = data.get("prompt_eval_count", 0)
+        eval_tokens = data.get("eval_count", 0)
+
+        OLLAMA_PHASE_SECONDS.labels(model=model, phase="load").observe(load)
+        OLLAMA_PHASE_SECONDS.labels(model=model, phase="prompt_eval").observe(prompt_eval)
+        OLLAMA_PHASE_SECONDS.labels(model=model, phase="eval").observe(eval_seconds)
+        if total:
+            OLLAMA_PHASE_SECONDS.labels(model=model, phase="queue").observe(max(wall_seconds - total, 0.0))
+        OLLAMA_TOKENS.labels(model=model, kind="prompt").inc(prompt_tokens)
+        OLLAMA_TOKENS.labels(model=model, kind="generated").inc(eval_tokens)
+        if eval_tokens and eval_seconds:
+            OLLAMA_TOKENS_PER_SECOND.labels(model=model).observe(eval_tokens / eval_seconds)
+
+        if ttft_seconds is None:
+            OLLAMA_TTFT_SECONDS.labels(model=model, streaming="false").observe(load + prompt_eval)
+        else:
+            OLLAMA_TTFT_SECONDS.labels(model=model, streaming="true").observe(ttft_seconds)
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Could not record Ollama timings: {str(e)}")
+
+def record_prompt_tokens(tokens: Dict[str, int]):
+    """Observe the token count of each prompt section."""
+    for section, count in tokens.items():
+        PROMPT_TOKENS.labels(section=section).observe(count)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Return the Prometheus exposition text and its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+def format_server_timing(timings: List[Tuple[str, float]]) -> str:
+    """Format stage timings as a Server-Timing header value (durations in milliseconds)."""
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings)
+
+class TimingMiddleware:
+    """
+    ASGI middleware that records request latency per endpoint and collects the stage
+    timings of each request.
+
+    When a request carries an "X-Debug-Timing: 1" header, or timing_header is set, the
+    stages finished before the response starts are returned in a Server-Timing header.
+    For streamed responses that excludes the generation itself.
+    """
+
+    def __init__(self, app, timing_header: bool = False):
+        """
+        Args:
+            app: The ASGI application to wrap
+            timing_header: Add the Server-Timing header to every response (default: False)
+        """
+        self.app = app
+        self.timing_header = timing_header
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: List[Tuple[str, float]] = []
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        add_header = self.timing_header or any(
+            name == TIMING_REQUEST_HEADER and value in (b"1", b"true")
+            for name, value in scope.get("headers", [])
+        )
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - start
+                endpoint = scope.get("endpoint")
+                REQUEST_SECONDS.labels(
+                    method=scope["method"],
+                    endpoint=getattr(endpoint, "__name__", "unmatched"),
+                    status=str(message["status"]),
+                ).observe(elapsed)
+                if add_header:
+                    value = format_server_timing(timings + [("total", elapsed)])
+                    message = {**message, "headers": list(message.get("headers", [])) + [(b"server-timing", value.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Optional
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Errors raised before the request reached Ollama, so retrying is always safe.
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+# RemoteProtocolError covers a pooled keep-alive connection the server already closed, but also
+# a connection dropped after Ollama accepted a chat request, so only idempotent requests retry on it.
+IDEMPOTENT_RETRYABLE_ERRORS = RETRYABLE_ERRORS + (httpx.RemoteProtocolError,)
+IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+def retryable_errors(method: str) -> tuple:
+    """Errors a request with this HTTP method may be retried or failed over on."""
+    return IDEMPOTENT_RETRYABLE_ERRORS if method.upper() in IDEMPOTENT_METHODS else RETRYABLE_ERRORS
+
+class OllamaClient:
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 120.0,
+        max_retries: int = 2,
+        retry_backoff: float = 0.5,
+    ):
+        """
+        Application-lifetime HTTP client for the Ollama API with connection pooling.
+
+        Args:
+            base_url: The base URL for the Ollama API (default: "http://localhost:11434")
+            max_connections: Maximum number of open connections (default: 20)
+            max_keepalive_connections: Idle connections kept open for reuse (default: 10)
+            keepalive_expiry: Seconds an idle connection is kept open (default: 30.0)
+            connect_timeout: Seconds to wait for a connection (default: 5.0)
+            read_timeout: Seconds to wait for response data, e.g. a slow generation (default: 120.0)
+            max_retries: Retries on connection errors (default: 2)
+            retry_backoff: Initial retry delay in seconds, doubled on each retry (default: 0.5)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self):
+        """Open the shared connection pool."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=self.limits,
+                timeout=self.timeout,
+            )
+            logger.info(f"Ollama client started for {self.base_url}")
+
+    async def close(self):
+        """Close all pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("Ollama client closed")
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("Ollama client not started. Call start() first.")
+        return self._client
+
+    async def request(self, method: str, path: str, stream: bool = False, **kwargs) -> httpx.Response:
+        """
+        Send a request to Ollama, retrying with exponential backoff on connection errors.
+
+        A chat request is not retried once it may have reached Ollama, so a generation
+        is never started twice.
+
+        With stream=True the body is not read; the caller must iterate the response
+        and close it with aclose().
+        """
+        retryable = retryable_errors(method)
+        attempt = 0
+        while True:
+            try:
+                request = self.client.build_request(method, path, **kwargs)
+                return await self.client.send(request, stream=stream)
+            except retryable as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.retry_backoff * (2 ** attempt)
+                attempt += 1
+                logger.warning(
+                    f"Ollama connection error on {method} {path}: {str(e)}. "
+                    f"Retrying in {delay:.2f}s ({attempt}/{self.max_retries})"
+                )
+                await asyncio.sleep(delay)
+
+    async def get_tags(self) -> httpx.Response:
+        """List the models available in Ollama."""
+        return await self.request("GET", "/api/tags")
+
+    async def chat(self, payload: dict) -> httpx.Response:
+        """Send a non-streaming chat completion request."""
+        return await self.request("POST", "/api/chat", json={**payload, "stream": False})
+
+    async def open_chat_stream(self, payload: dict) -> httpx.Response:
+        """
+        Start a streaming chat completion and return the open response.
+
+        Ollama sends one JSON object per line; use iter_chat_chunks() to read them.
+        Closing the response drops the connection, which makes Ollama stop generating.
+        """
+        return await self.request("POST", "/api/chat", stream=True, json={**payload, "stream": True})
+
+    @staticmethod
+    async def iter_chat_chunks(response: httpx.Response) -> AsyncIterator[dict]:
+        """Yield the parsed JSON chunks of a streaming chat response."""
+        async for line in response.aiter_lines():
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,296 @@
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+import httpx
+from src.ollama_client import OllamaClient, retryable_errors
+
+logger = logging.getLogger(__name__)
+
+def model_names(name: str) -> Set[str]:
+    """Names a model can be requested by: "mistral:latest" is also "mistral"."""
+    names = {name}
+    if name.endswith(":latest"):
+        names.add(name[: -len(":latest")])
+    return names
+
+class OllamaBackend:
+    """One Ollama server in the pool with its health, models and load."""
+
+    def __init__(self, base_url: str, client: OllamaClient):
+        self.base_url = base_url
+        self.client = client
+        self.healthy = True  # Assumed until the first health check says otherwise
+        self.models: Set[str] = set()
+        self.tags: List[Dict[str, Any]] = []
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.last_checked: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "healthy": self.healthy,
+            "models": sorted(tag.get("name") for tag in self.tags),
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "last_checked": self.last_checked,
+            "last_error": self.last_error,
+        }
+
+class OllamaBackendPool:
+    def __init__(
+        self,
+        base_urls: List[str],
+        health_interval: float = 10.0,
+        health_timeout: float = 3.0,
+        max_retries: int = 2,
+        **client_kwargs,
+    ):
+        """
+        Routes Ollama requests over several Ollama servers.
+
+        Each request goes to the healthy backend with the fewest outstanding requests
+        among those that have the requested model. A backend that refuses connections
+        is marked down and the request fails over to the next one. A background task
+        checks every backend's /api/tags every health_interval seconds, which brings
+        backends back up and keeps the model list that /ollama/models serves.
+
+        Args:
+            base_urls: Base URLs of the Ollama servers
+            health_interval: Seconds between health checks (default: 10.0)
+            health_timeout: Seconds a health check may take (default: 3.0)
+            max_retries: Retries on connection errors with a single backend; with several
+                backends a request fails over instead of retrying the same one (default: 2)
+            **client_kwargs: Connection pool and timeout settings passed to each OllamaClient
+        """
+        if not base_urls:
+            raise ValueError("At least one Ollama base URL is required")
+        retries = max_retries if len(base_urls) == 1 else 0
+        self.backends = [
+            OllamaBackend(url.rstrip("/"), OllamaClient(base_url=url, max_retries=retries, **client_kwargs))
+            for url in base_urls
+        ]
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        # Held briefly to pick a backend; taken from the event loop and from worker threads
+        self._lock = threading.Lock()
+        self._next = 0
+        self._models: List[Dict[str, Any]] = []
+        self._models_checked: Optional[float] = None
+        self._health_task: Optional[asyncio.Task] = None
+
+    @property
+    def base_urls(self) -> List[str]:
+        return [backend.base_url for backend in self.backends]
+
+    async def start(self):
+        """Open the connection pools and start the periodic health check; call check_health() for a first result."""
+        for backend in self.backends:
+            await backend.client.start()
+        if self._health_task is None and self.health_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self):
+        """Stop the health checks and close all connection pools."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        for backend in self.backends:
+            await backend.client.close()
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.error(f"Ollama health check failed: {str(e)}")
+
+    async def check_health(self):
+        """Fetch /api/tags from every backend, updating health, models and the merged model list."""
+        await asyncio.gather(*(self._check_backend(backend) for backend in self.backends))
+
+        merged: Dict[str, Dict[str, Any]] = {}
+        for backend in self.backends:
+            if not backend.healthy:
+                continue
+            for tag in backend.tags:
+                entry = merged.setdefault(tag.get("name"), {**tag, "backends": []})
+                entry["backends"].append(backend.base_url)
+        self._models = sorted(merged.values(), key=lambda tag: tag.get("name") or "")
+        self._models_checked = time.time()
+
+    async def _check_backend(self, backend: OllamaBackend):
+        try:
+            response = await backend.client.client.get("/api/tags", timeout=self.health_timeout)
+            response.raise_for_status()
+            tags = response.json().get("models", [])
+        except Exception as e:
+            if backend.healthy:
+                logger.warning(f"Ollama backend {backend.base_url} is down: {str(e)}")
+            with self._lock:
+                backend.healthy = False
+                backend.last_error = str(e)
+                backend.last_checked = time.time()
+            return
+
+        if not backend.healthy:
+            logger.info(f"Ollama backend {backend.base_url} is up again")
+        with self._lock:
+            backend.healthy = True
+            backend.tags = tags
+            backend.models = set().union(*(model_names(tag.get("name", "")) for tag in tags))
+            backend.last_error = None
+            backend.last_checked = time.time()
+
+    async def list_models(self) -> Dict[str, Any]:
+        """Models of all healthy backends, merged by name, from the last health check."""
+        if self._models_checked is None or time.time() - self._models_checked > self.health_interval:
+            await self.check_health()
+        return {"models": self._models}
+
+    def has_healthy_backend(self) -> bool:
+        """True if at least one backend answered its last health check."""
+        return any(backend.healthy and backend.last_checked is not None for backend in self.backends)
+
+    def acquire(
+        self,
+        model: Optional[str] = None,
+        exclude: Set[str] = frozenset(),
+        prefer: Optional[str] = None,
+    ) -> Optional[OllamaBackend]:
+        """
+        Pick a backend for a request and count it as outstanding; release() it when done.
+
+        Prefers healthy backends that have the model, then any healthy backend (Ollama
+        reports a missing model itself), then backends marked down, in case they are back.
+        The prefer backend is used whenever it is among those; it holds the evaluated
+        prompt of a conversation's previous turn.
+        """
+        with self._lock:
+            candidates = [backend for backend in self.backends if backend.base_url not in exclude]
+            healthy = [backend for backend in candidates if backend.healthy]
+            with_model = [backend for backend in healthy if model in backend.models]
+            candidates = with_model or healthy or candidates
+            if not candidates:
+                return None
+            preferred = next((backend for backend in candidates if backend.base_url == prefer), None)
+            if preferred is not None:
+                preferred.outstanding += 1
+                preferred.requests += 1
+                return preferred
+            # Least outstanding requests; rotate the starting point to spread ties
+            self._next = (self._next + 1) % len(self.backends)
+            offset = self._next
+            backend = min(
+                candidates,
+                key=lambda b: (b.outstanding, (self.backends.index(b) - offset) % len(self.backends))
+            )
+            backend.outstanding += 1
+            backend.requests += 1
+            return backend
+
+    def release(self, backend: OllamaBackend):
+        with self._lock:
+            backend.outstanding -= 1
+
+    def mark_down(self, backend: OllamaBackend, error: Exception):
+        """Take a backend out of rotation until the next successful health check."""
+        with self._lock:
+            backend.failures += 1
+            backend.last_error = str(error)
+            if not backend.healthy:
+                return
+            backend.healthy = False
+        if len(self.backends) > 1:
+            logger.warning(f"Ollama backend {backend.base_url} failed ({str(error)}), failing over")
+
+    async def request(
+        self,
+        model: Optional[str],
+        method: str,
+        path: str,
+        stream: bool = False,
+        prefer: Optional[str] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Send a request to the least loaded backend for the model, failing over on connection errors.
+
+        With stream=True the backend counts as busy until the caller closes the response.
+        prefer names a backend to use when it is available (see acquire()); the backend
+        that served the request is in response.extensions["ollama_backend"].
+        """
+        retryable = retryable_errors(method)
+        tried: Set[str] = set()
+        last_error: Optional[Exception] = None
+        while True:
+            backend = self.acquire(model, exclude=tried, prefer=prefer)
+            if backend is None:
+                raise last_error
+            try:
+                response = await backend.client.request(method, path, stream=stream, **kwargs)
+            except retryable as e:
+                self.release(backend)
+                self.mark_down(backend, e)
+                tried.add(backend.base_url)
+                last_error = e
+                continue
+            except BaseException:
+                self.release(backend)
+                raise
+
+            response.extensions["ollama_backend"] = backend.base_url
+            if not stream:
+                self.release(backend)
+                return response
+
+            # Release the backend once, when the caller closes the stream
+            close = response.aclose
+            released = False
+
+            async def aclose():
+                nonlocal released
+                try:
+                    await close()
+                finally:
+                    if not released:
+                        released = True
+                        self.release(backend)
+
+            response.aclose = aclose
+            return response
+
+    async def chat(self, payload: dict, prefer: Optional[str] = None) -> httpx.Response:
+        """Send a non-streaming chat completion request."""
+        return await self.request(payload.get("model"), "POST", "/api/chat", prefer=prefer, json={**payload, "stream": False})
+
+    async def open_chat_stream(self, payload: dict, prefer: Optional[str] = None) -> httpx.Response:
+        """
+        Start a streaming chat completion on a backend and return the open response.
+
+        See OllamaClient.open_chat_stream(); close the response with aclose().
+        """
+        return await self.request(
+            payload.get("model"), "POST", "/api/chat", stream=True, prefer=prefer, json={**payload, "stream": True}
+        )
+
+    @staticmethod
+    async def iter_chat_chunks(response: httpx.Response) -> AsyncIterator[dict]:
+        """Yield the parsed JSON chunks of a streaming chat response."""
+        async for chunk in OllamaClient.iter_chat_chunks(response):
+            yield chunk
+
+    def stats(self) -> Dict[str, Any]:
+        """Return health, models and load of every backend."""
+        with self._lock:
+            return {"backends": [backend.stats() for backend in self.backends]}
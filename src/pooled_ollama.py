@@ -0,0 +1,101 @@
+from typing import Any, Dict, Optional, Set
+from pydantic import PrivateAttr
+from llama_index.llms.ollama import Ollama
+from src.ollama_client import RETRYABLE_ERRORS
+from src.ollama_pool import OllamaBackendPool
+
+# Connection failures surfaced by the ollama package the LlamaIndex LLM uses
+LLM_CONNECTION_ERRORS = RETRYABLE_ERRORS + (ConnectionError,)
+
+class PooledOllama(Ollama):
+    """
+    LlamaIndex Ollama LLM that sends each call to a backend of an OllamaBackendPool.
+
+    Holds one Ollama LLM per backend and delegates chat and completion calls to the
+    one the pool picks, failing over on connection errors. Streaming calls keep their
+    backend busy until the stream is consumed.
+    """
+
+    _pool: OllamaBackendPool = PrivateAttr()
+    _llms: Dict[str, Ollama] = PrivateAttr()
+
+    def __init__(self, pool: OllamaBackendPool, **kwargs: Any):
+        """
+        Args:
+            pool: The backend pool to route calls over
+            **kwargs: Ollama LLM settings (model, temperature, context window, ...) used for every backend
+        """
+        super().__init__(base_url=pool.base_urls[0], **kwargs)
+        self._pool = pool
+        self._llms = {url: Ollama(base_url=url, **kwargs) for url in pool.base_urls}
+
+    def _call(self, method: str, *args, **kwargs):
+        tried: Set[str] = set()
+        last_error: Optional[Exception] = None
+        while True:
+            backend = self._pool.acquire(self.model, exclude=tried)
+            if backend is None:
+                raise last_error
+            try:
+                return getattr(self._llms[backend.base_url], method)(*args, **kwargs)
+            except LLM_CONNECTION_ERRORS as e:
+                self._pool.mark_down(backend, e)
+                tried.add(backend.base_url)
+                last_error = e
+            finally:
+                self._pool.release(backend)
+
+    async def _acall(self, method: str, *args, **kwargs):
+        tried: Set[str] = set()
+        last_error: Optional[Exception] = None
+        while True:
+            backend = self._pool.acquire(self.model, exclude=tried)
+            if backend is None:
+                raise last_error
+            try:
+                return await getattr(self._llms[backend.base_url], method)(*args, **kwargs)
+            except LLM_CONNECTION_ERRORS as e:
+                self._pool.mark_down(backend, e)
+                tried.add(backend.base_url)
+                last_error = e
+            finally:
+                self._pool.release(backend)
+
+    def _stream(self, method: str, *args, **kwargs):
+        backend = self._pool.acquire(self.model)
+        try:
+            yield from getattr(self._llms[backend.base_url], method)(*args, **kwargs)
+        finally:
+            self._pool.release(backend)
+
+    async def _astream(self, method: str, *args, **kwargs):
+        backend = self._pool.acquire(self.model)
+        try:
+            async for chunk in await getattr(self._llms[backend.base_url], method)(*args, **kwargs):
+                yield chunk
+        finally:
+            self._pool.release(backend)
+
+    def chat(self, messages, **kwargs):
+        return self._call("chat", messages, **kwargs)
+
+    def complete(self, prompt, formatted: bool = False, **kwargs):
+        return self._call("complete", prompt, formatted=formatted, **kwargs)
+
+    def stream_chat(self, messages, **kwargs):
+        return self._stream("stream_chat", messages, **kwargs)
+
+    def stream_complete(self, prompt, formatted: bool = False, **kwargs):
+        return self._stream("stream_complete", prompt, formatted=formatted, **kwargs)
+
+    async def achat(self, messages, **kwargs):
+        return await self._acall("achat", messages, **kwargs)
+
+    async def acomplete(self, prompt, formatted: bool = False, **kwargs):
+        return await self._acall("acomplete", prompt, formatted=formatted, **kwargs)
+
+    async def astream_chat(self, messages, **kwargs):
+        return self._astream("astream_chat", messages, **kwargs)
+
+    async def astream_complete(self, prompt, formatted: bool = False, **kwargs):
+        return self._astream("astream_complete", prompt, formatted=formatted, **kwargs)
@@ -0,0 +1,210 @@
+import re
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYSTEM_PROMPT = "You are a helpful assistant."
+CONTEXT_INSTRUCTION = "Use the following context from documents to answer the question if relevant:"
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+
+# Tokens a chat template adds around each message (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in text without a model tokenizer.
+
+    Counts words and punctuation marks, plus one token for every further eight
+    characters of a long word. This tracks the Llama/Mistral SentencePiece tokenizers
+    to within about 10% on English prose and errs on the high side for code.
+    """
+    return sum(1 + (len(piece) - 1) // 8 for piece in _TOKEN_PATTERN.findall(text))
+
+def parse_context_windows(value: str) -> Dict[str, int]:
+    """Parse "model=tokens,model=tokens" into a dictionary."""
+    windows = {}
+    for entry in value.split(","):
+        if "=" in entry:
+            model, tokens = entry.split("=", 1)
+            windows[model.strip()] = int(tokens)
+    return windows
+
+class PromptBuilder:
+    def __init__(
+        self,
+        context_window: int = 4096,
+        model_context_windows: Optional[Dict[str, int]] = None,
+        reserve_tokens: int = 512,
+        context_share: float = 0.5,
+        summary_share: float = 0.1,
+        count_tokens=estimate_tokens,
+    ):
+        """
+        Assembles the messages sent to Ollama for /chat within the model's context window.
+
+        Messages are laid out as [system prompt] [summary of dropped turns] [recent turns]
+        [retrieved context + latest user message]. The system prompt carries no per-request
+        content, so it stays byte-identical between requests and Ollama can reuse its
+        evaluated prefix. Retrieved chunks are deduplicated and added best first up to
+        context_share of the space left after the system prompt and latest message; the
+        remaining space holds the most recent turns. Turns that no longer fit are condensed
+        into a short extractive summary.
+
+        Args:
+            context_window: Context window in tokens for models without an entry in model_context_windows (default: 4096)
+            model_context_windows: Context window per model name, with or without tag (default: None)
+            reserve_tokens: Tokens kept free for the response when the request sets no max_tokens (default: 512)
+            context_share: Share of the remaining budget retrieved context may use (default: 0.5)
+            summary_share: Share of the budget the summary of dropped turns may use (default: 0.1)
+            count_tokens: Function returning the token count of a text (default: estimate_tokens)
+        """
+        self.context_window = context_window
+        self.model_context_windows = model_context_windows or {}
+        self.reserve_tokens = reserve_tokens
+        self.context_share = context_share
+        self.summary_share = summary_share
+        self.count_tokens = count_tokens
+
+    def window_for(self, model: str) -> int:
+        """Context window of a model, looked up by full name and then without its tag."""
+        if model in self.model_context_windows:
+            return self.model_context_windows[model]
+        return self.model_context_windows.get(model.split(":", 1)[0], self.context_window)
+
+    def message_tokens(self, message: Dict[str, Any]) -> int:
+        """Token count of a message, taken from its "tokens" entry when it was counted before."""
+        if message.get("tokens") is not None:
+            return message["tokens"]
+        return self.count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+    def build(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        chunks: Optional[List[Dict[str, Any]]] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Build the prompt for one chat request.
+
+        Args:
+            model: Ollama model name, used to look up the context window
+            messages: Chat history as role/content dictionaries, oldest first; a "tokens"
+                entry is used as the message's token count instead of counting it again
+            chunks: Retrieved chunks with file_name, score and text (default: None)
+            max_tokens: Tokens requested for the response (default: None, uses reserve_tokens)
+
+        Returns:
+            Dictionary with the messages to send, num_ctx, the tokens used per section,
+            and how many turns and chunks were left out.
+        """
+        window = self.window_for(model)
+        budget = max(window - (max_tokens or self.reserve_tokens), 0)
+
+        system_messages = [m for m in messages if m["role"] == "system"]
+        conversation = [m for m in messages if m["role"] != "system"]
+        last_user = max((i for i, m in enumerate(conversation) if m["role"] == "user"), default=len(conversation))
+        history, latest = conversation[:last_user], [dict(m) for m in conversation[last_user:]]
+
+        system = None
+        if system_messages or chunks:
+            system = {
+                "role": "system",
+                "content": "\n\n".join(m["content"] for m in system_messages) or DEFAULT_SYSTEM_PROMPT,
+            }
+        tokens = {
+            "system": self.message_tokens(system) if system else 0,
+            "latest": sum(self.message_tokens(m) for m in latest),
+        }
+        remaining = budget - tokens["system"] - tokens["latest"]
+        if remaining < 0:
+            logger.warning(f"System prompt and latest message use {budget - remaining} tokens, over the budget of {budget}")
+            remaining = 0
+
+        context, dropped_chunks = self._select_chunks(chunks or [], int(remaining * self.context_share))
+        context_text = ""
+        if context:
+            context_text = f"{CONTEXT_INSTRUCTION}\n\n" + "\n\n".join(
+                f"[Source: {chunk['file_name']}]\n{chunk['text']}" for chunk in context
+            )
+            if latest:
+                latest[0]["content"] = f"{context_text}\n\nQuestion: {latest[0]['content']}"
+            else:
+                latest = [{"role": "user", "content": context_text}]
+        tokens["context"] = self.count_tokens(context_text) if context_text else 0
+        remaining -= tokens["context"]
+
+        # When the history does not fit, part of the space goes to the summary of older turns
+        summary_budget = 0
+        if sum(self.message_tokens(m) for m in history) > remaining:
+            summary_budget = min(remaining, int(budget * self.summary_share))
+        kept, dropped = self._select_history(history, remaining - summary_budget)
+        tokens["history"] = sum(self.message_tokens(m) for m in kept)
+        remaining -= tokens["history"]
+
+        summary = self._summarize(dropped, remaining) if dropped else None
+        tokens["summary"] = self.message_tokens(summary) if summary else 0
+
+        prompt = ([system] if system else []) + ([summary] if summary else []) + kept + latest
+        tokens["total"] = sum(tokens.values())
+        return {
+            "messages": [{"role": m["role"], "content": m["content"]} for m in prompt],
+            "num_ctx": window,
+            "budget": budget,
+            "tokens": tokens,
+            "dropped_turns": len(dropped),
+            "dropped_chunks": dropped_chunks,
+        }
+
+    def _select_chunks(self, chunks: List[Dict[str, Any]], budget: int):
+        """Deduplicate chunks and keep the highest scoring ones that fit the budget."""
+        ranked = sorted(chunks, key=lambda chunk: chunk.get("score") or 0.0, reverse=True)
+        selected, seen, used = [], [], 0
+        for chunk in ranked:
+            normalized = " ".join(chunk["text"].split()).lower()
+            # Overlapping splits and re-uploaded files yield the same or contained text
+            if any(normalized in other or other in normalized for other in seen):
+                continue
+            cost = self.count_tokens(chunk["text"]) + self.count_tokens(chunk["file_name"]) + MESSAGE_OVERHEAD_TOKENS
+            if used + cost > budget:
+                continue
+            seen.append(normalized)
+            selected.append(chunk)
+            used += cost
+        return selected, len(chunks) - len(selected)
+
+    def _select_history(self, history: List[Dict[str, str]], budget: int):
+        """Keep the most recent turns that fit; return them and the dropped older turns."""
+        used = 0
+        start = len(history)
+        while start > 0:
+            cost = self.message_tokens(history[start - 1])
+            if used + cost > budget:
+                break
+            used += cost
+            start -= 1
+        return [dict(m) for m in history[start:]], history[:start]
+
+    def _summarize(self, dropped: List[Dict[str, str]], budget: int) -> Optional[Dict[str, str]]:
+        """
+        Condense dropped turns into one message of at most budget tokens.
+
+        Each turn is reduced to its first sentence; the most recent dropped turns are
+        kept when even that does not fit.
+        """
+        lines = []
+        used = self.count_tokens(SUMMARY_HEADER) + MESSAGE_OVERHEAD_TOKENS
+        for message in reversed(dropped):
+            first_sentence = re.split(r"(?<=[.!?])\s", " ".join(message["content"].split()), maxsplit=1)[0]
+            line = f"- {message['role']}: {first_sentence[:200]}"
+            cost = self.count_tokens(line)
+            if used + cost > budget:
+                break
+            lines.append(line)
+            used += cost
+        if not lines:
+            return None
+        return {"role": "system", "content": SUMMARY_HEADER + "\n" + "\n".join(reversed(lines))}
@@ -0,0 +1,153 @@
+import time
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Set, Tuple
+from llama_index.core.schema import NodeWithScore
+from src.metrics import QUERY_BATCH_SIZE, SINGLE_FLIGHT_SHARED, record_stage, span
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Deduplicates identical concurrent calls: while a call for a key is in flight,
+    later callers with the same key await its result instead of starting their own.
+
+    The shared call runs as its own task, so a caller that goes away does not cancel
+    it for the others.
+    """
+
+    def __init__(self, name: str = "default"):
+        """
+        Args:
+            name: Label for the shared-call metric (default: "default")
+        """
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result of fn(), shared with every concurrent caller using the same key."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            SINGLE_FLIGHT_SHARED.labels(name=self.name).inc()
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved in case every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+class QueryBatcher:
+    """
+    Collects retrievals that arrive within a short window and runs them as one batch:
+    one embedding model call for all queries and one matrix search against the vector
+    store (see IndexManager.embed_queries and IndexManager.retrieve_batch).
+
+    A batch is sent when the window closes or max_batch queries are waiting. With a
+    window of 0 every query is retrieved on its own. Queries against different indexes
+    (tenants) share the embedding call and are searched per index.
+    """
+
+    def __init__(
+        self,
+        index_manager,
+        run: Callable[..., Awaitable[Any]],
+        window_seconds: float = 0.002,
+        max_batch: int = 32,
+    ):
+        """
+        Args:
+            index_manager: IndexManager that embeds the batches, and searches them unless a query names another
+            run: Coroutine function that runs blocking work off the event loop, e.g. WorkerPool.run
+            window_seconds: How long to collect queries before sending a batch (default: 0.002)
+            max_batch: Maximum number of queries per batch (default: 32)
+        """
+        self.index_manager = index_manager
+        self.run = run
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._pending: List[Tuple[Tuple[str, int, str, Any], asyncio.Future]] = []
+        self._timer = None
+        self._batches: Set[asyncio.Task] = set()
+
+    async def retrieve(
+        self,
+        query: str,
+        similarity_top_k: int,
+        retrieval_mode: str,
+        index_manager=None,
+    ) -> List[NodeWithScore]:
+        """Retrieve the top-k nodes for a query from index_manager (default: the batcher's) as part of the next batch."""
+        item = (query, similarity_top_k, retrieval_mode, index_manager or self.index_manager)
+        if self.window_seconds <= 0:
+            return (await self.run(self._retrieve_batch, [item]))[0]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+
+        start = time.perf_counter()
+        try:
+            return await future
+        finally:
+            record_stage("query_batch", time.perf_counter() - start)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        # Skip queries whose request has already gone away
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Tuple[str, int, str, Any], asyncio.Future]]):
+        QUERY_BATCH_SIZE.observe(len(batch))
+        try:
+            results = await self.run(self._retrieve_batch, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), nodes in zip(batch, results):
+            if not future.done():
+                future.set_result(nodes)
+
+    def _retrieve_batch(self, items: List[Tuple[str, int, str, Any]]) -> List[List[NodeWithScore]]:
+        """Embed all queries at once, then search once per (index, top-k, retrieval mode) group (blocking)."""
+        with span("embed_query"):
+            embeddings = self.index_manager.embed_queries([item[0] for item in items])
+
+        groups: Dict[Tuple[Any, int, str], List[int]] = defaultdict(list)
+        for position, (_, similarity_top_k, retrieval_mode, index_manager) in enumerate(items):
+            groups[(index_manager, similarity_top_k, retrieval_mode)].append(position)
+
+        results: List[List[NodeWithScore]] = [[] for _ in items]
+        with span("retrieve"):
+            for (index_manager, similarity_top_k, retrieval_mode), positions in groups.items():
+                group_results = index_manager.retrieve_batch(
+                    [items[position][0] for position in positions],
+                    [embeddings[position] for position in positions],
+                    similarity_top_k=similarity_top_k,
+                    retrieval_mode=retrieval_mode,
+                )
+                for position, nodes in zip(positions, group_results):
+                    results[position] = nodes
+        return results
@@ -1,24 +1,91 @@
 from typing import Optional, Dict, List
-from llama_index.core.query_engine import BaseQueryEngine
+from llama_index.core import Settings
+from llama_index.core.query_engine import BaseQueryEngine, RetrieverQueryEngine
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+from src.metrics import span
 
 class QueryManager:
-    def __init__(self, query_engine: BaseQueryEngine):
+    def __init__(self, query_engine: Optional[BaseQueryEngine] = None, retriever: Optional[BaseRetriever] = None):
         self.query_engine = query_engine
+        self.retriever = retriever
 
     def process_query(self, query: str) -> Dict:
         """Process a user query and return the response with metadata."""
+        if self.query_engine is None:
+            raise ValueError("QueryManager was created without a query engine")
         try:
-            response = self.query_engine.query(query)
+            if isinstance(self.query_engine, RetrieverQueryEngine):
+                # Run the stages separately so each one is timed
+                query_bundle = self._embed_query(query)
+                with span("retrieve"):
+                    nodes = self.query_engine.retrieve(query_bundle)
+                with span("synthesize"):
+                    response = self.query_engine.synthesize(query_bundle, nodes)
+            else:
+                with span("query_engine"):
+                    response = self.query_engine.query(query)
             return {
                 "response": str(response.response).strip(),
                 "sources": [
-                    {
-                        "file_name": node.metadata.get("file_name", "Unknown"),
-                        "score": float(node.score) if hasattr(node, "score") else None,
-                        "text": node.text[:200] + "..." if len(node.text) > 200 else node.text
-                    }
-                    for node in response.source_nodes
+                    self._format_source(node) for node in response.source_nodes
                 ] if hasattr(response, "source_nodes") else []
             }
         except Exception as e:
-            raise Exception(f"Error processing query: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"Error processing query: {str(e)}")
+
+    def synthesize(self, query: str, nodes: List[NodeWithScore]) -> Dict:
+        """Synthesize an answer from nodes that were already retrieved for the query."""
+        if not isinstance(self.query_engine, RetrieverQueryEngine):
+            raise ValueError("QueryManager needs a retriever query engine to synthesize from retrieved nodes")
+        try:
+            with span("synthesize"):
+                response = self.query_engine.synthesize(QueryBundle(query), nodes)
+            return {
+                "response": str(response.response).strip(),
+                "sources": [self._format_source(node) for node in response.source_nodes]
+            }
+        except Exception as e:
+            raise Exception(f"Error processing query: {str(e)}")
+
+    def retrieve(self, query: str) -> Dict:
+        """Retrieve the top-k chunks for a query without LLM synthesis."""
+        if self.retriever is None:
+            raise ValueError("QueryManager was created without a retriever")
+        try:
+            query_bundle = self._embed_query(query)
+            with span("retrieve"):
+                nodes = self.retriever.retrieve(query_bundle)
+            return self.format_retrieval(nodes)
+        except Exception as e:
+            raise Exception(f"Error retrieving context: {str(e)}")
+
+    @classmethod
+    def format_retrieval(cls, nodes: List[NodeWithScore]) -> Dict:
+        """Full chunk texts for the prompt plus short source previews for the client."""
+        return {
+            "chunks": [
+                {
+                    "file_name": node.metadata.get("file_name", "Unknown"),
+                    "score": float(node.score) if node.score is not None else None,
+                    "text": node.get_content()
+                }
+                for node in nodes
+            ],
+            "sources": [cls._format_source(node) for node in nodes]
+        }
+
+    @staticmethod
+    def _embed_query(query: str) -> QueryBundle:
+        """Embed the query up front; retrievers reuse the embedding on the bundle."""
+        with span("embed_query"):
+            return QueryBundle(query, embedding=Settings.embed_model.get_query_embedding(query))
+
+    @staticmethod
+    def _format_source(node: NodeWithScore) -> Dict:
+        text = node.get_content()
+        return {
+            "file_name": node.metadata.get("file_name", "Unknown"),
+            "score": float(node.score) if node.score is not None else None,
+            "text": text[:200] + "..." if len(text) > 200 else text
+        }
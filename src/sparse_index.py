@@ -0,0 +1,298 @@
+import os
+import re
+import json
+import math
+import shutil
+import logging
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from llama_index.core.schema import BaseNode, MetadataMode
+from src.vector_store import NumpyVectorStore, _load_array, _take_blob_rows
+
+logger = logging.getLogger(__name__)
+
+# Keeps identifiers such as "E1234", "ERR_CONN_RESET" or "12-345-ab" as single tokens
+TOKEN_PATTERN = re.compile(r"\w+(?:[-./]\w+)*")
+INDEX_FILE = "bm25.json"
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens; compound identifiers also yield their parts."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(part for part in re.split(r"[-./_]", token) if part)
+    return tokens
+
+class _PostingsData:
+    """
+    Immutable snapshot of the index; mutations build a new one and swap it in.
+
+    The vocabulary is a packed string table sorted by UTF-8 bytes, so a term is found
+    by binary search. Postings are in CSR form: the postings of term t are the entries
+    postings_offsets[t]:postings_offsets[t + 1] of postings_rows (node rows) and
+    postings_freqs (term frequencies).
+    """
+
+    def __init__(self, vocab_blob, vocab_offsets, postings_offsets, postings_rows, postings_freqs, node_ids, ref_doc_ids, doc_lens):
+        self.vocab_blob = vocab_blob
+        self.vocab_offsets = vocab_offsets
+        self.postings_offsets = postings_offsets
+        self.postings_rows = postings_rows
+        self.postings_freqs = postings_freqs
+        self.node_ids = node_ids
+        self.ref_doc_ids = ref_doc_ids
+        self.doc_lens = doc_lens
+        self._total_len: Optional[int] = None
+
+    def total_len(self) -> int:
+        """Sum of all node lengths, computed once per snapshot."""
+        if self._total_len is None:
+            self._total_len = int(self.doc_lens.sum())
+        return self._total_len
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def num_terms(self) -> int:
+        return len(self.vocab_offsets) - 1
+
+    def find_term(self, term: bytes) -> Tuple[int, bool]:
+        """Position of a UTF-8 encoded term in the vocabulary (or where it would go) and whether it is there."""
+        lo, hi = 0, self.num_terms()
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if bytes(self.vocab_blob[self.vocab_offsets[mid]:self.vocab_offsets[mid + 1]]) < term:
+                lo = mid + 1
+            else:
+                hi = mid
+        found = lo < self.num_terms() and bytes(self.vocab_blob[self.vocab_offsets[lo]:self.vocab_offsets[lo + 1]]) == term
+        return lo, found
+
+    @classmethod
+    def empty(cls) -> "_PostingsData":
+        return cls(
+            vocab_blob=np.zeros(0, dtype=np.uint8),
+            vocab_offsets=np.zeros(1, dtype=np.int64),
+            postings_offsets=np.zeros(1, dtype=np.int64),
+            postings_rows=np.zeros(0, dtype=np.int32),
+            postings_freqs=np.zeros(0, dtype=np.int32),
+            node_ids=np.zeros(0, dtype="<U1"),
+            ref_doc_ids=np.zeros(0, dtype="<U1"),
+            doc_lens=np.zeros(0, dtype=np.int32),
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "vocab_blob": self.vocab_blob,
+            "vocab_offsets": self.vocab_offsets,
+            "postings_offsets": self.postings_offsets,
+            "postings_rows": self.postings_rows,
+            "postings_freqs": self.postings_freqs,
+            "node_ids": self.node_ids,
+            "ref_doc_ids": self.ref_doc_ids,
+            "doc_lens": self.doc_lens,
+        }
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Inverted index with BM25 scoring, kept in flat NumPy arrays.
+
+        A persisted index can be memory-mapped read-only, so workers share its
+        postings through the page cache. Mutations are copy-on-write, so a search
+        always sees a consistent snapshot.
+
+        Args:
+            k1: Term frequency saturation (default: 1.5)
+            b: Document length normalization (default: 0.75)
+        """
+        self.k1 = k1
+        self.b = b
+        self._data = _PostingsData.empty()
+        self._write_lock = threading.Lock()
+
+    def count(self) -> int:
+        """Number of indexed nodes."""
+        return len(self._data)
+
+    def nbytes(self) -> int:
+        """Bytes used by the vocabulary, the postings and the node tables."""
+        return int(sum(array.nbytes for array in self._data.arrays().values()))
+
+    def add(self, nodes: Sequence[BaseNode]):
+        """Index the text of the given nodes."""
+        self.replace([], nodes)
+
+    def replace(self, ref_doc_ids: Sequence[str], nodes: Sequence[BaseNode]):
+        """Remove the nodes of the given source documents and index new nodes, atomically for searches."""
+        node_terms = [
+            (node.node_id, node.ref_doc_id or "", Counter(tokenize(node.get_content(metadata_mode=MetadataMode.NONE))))
+            for node in nodes
+        ]
+        with self._write_lock:
+            if len(ref_doc_ids) or node_terms:
+                self._data = self._rebuild(self._data, ref_doc_ids, node_terms)
+
+    def delete(self, ref_doc_id: str):
+        """Remove all nodes of a source document."""
+        self.replace([ref_doc_id], [])
+
+    @staticmethod
+    def _rebuild(
+        data: _PostingsData,
+        ref_doc_ids: Sequence[str],
+        node_terms: List[Tuple[str, str, Counter]],
+    ) -> _PostingsData:
+        keep_rows = np.ones(len(data), dtype=bool)
+        if len(ref_doc_ids):
+            keep_rows &= ~np.isin(data.ref_doc_ids, list(ref_doc_ids))
+        if node_terms:
+            # A node id that is indexed again replaces its old row
+            keep_rows &= ~np.isin(data.node_ids, [node_id for node_id, _, _ in node_terms])
+
+        # Existing postings as (term, row, frequency) triples, minus the dropped rows
+        terms = np.repeat(np.arange(data.num_terms(), dtype=np.int64), np.diff(data.postings_offsets))
+        keep = keep_rows[data.postings_rows]
+        row_map = np.cumsum(keep_rows) - 1
+        terms = terms[keep]
+        rows = row_map[data.postings_rows[keep]]
+        freqs = data.postings_freqs[keep]
+
+        # Merge the new terms into the sorted vocabulary
+        term_index: Dict[str, int] = {}
+        inserted: List[Tuple[int, bytes]] = []
+        for term in sorted({term for _, _, counts in node_terms for term in counts}):
+            position, found = data.find_term(term.encode("utf-8"))
+            if found:
+                term_index[term] = position
+            else:
+                inserted.append((position, term.encode("utf-8")))
+                term_index[term] = -len(inserted)
+        insert_at = np.asarray([position for position, _ in inserted], dtype=np.int64)
+        # Existing terms move up by the number of new terms inserted before them
+        terms = terms + np.searchsorted(insert_at, terms, side="right")
+        for term, position in term_index.items():
+            if position >= 0:
+                term_index[term] = position + int(np.searchsorted(insert_at, position, side="right"))
+            else:
+                k = -position - 1
+                term_index[term] = inserted[k][0] + k
+        vocab_lengths = np.insert(np.diff(data.vocab_offsets), insert_at, [len(term) for _, term in inserted])
+        pieces, start = [], 0
+        for position, term in inserted:
+            cut = int(data.vocab_offsets[position])
+            pieces.append(data.vocab_blob[start:cut])
+            pieces.append(np.frombuffer(term, dtype=np.uint8))
+            start = cut
+        pieces.append(data.vocab_blob[start:])
+        vocab_blob = np.concatenate(pieces)
+        vocab_offsets = np.zeros(len(vocab_lengths) + 1, dtype=np.int64)
+        np.cumsum(vocab_lengths, out=vocab_offsets[1:])
+
+        num_kept = int(keep_rows.sum())
+        if node_terms:
+            terms = np.concatenate([terms, np.asarray(
+                [term_index[term] for _, _, counts in node_terms for term in counts], dtype=np.int64
+            )])
+            rows = np.concatenate([rows, np.asarray(
+                [num_kept + row for row, (_, _, counts) in enumerate(node_terms) for _ in counts], dtype=np.int64
+            )])
+            freqs = np.concatenate([freqs, np.asarray(
+                [frequency for _, _, counts in node_terms for frequency in counts.values()], dtype=np.int32
+            )])
+
+        # Terms no longer used by any node leave the vocabulary
+        counts = np.bincount(terms, minlength=len(vocab_lengths))
+        live = counts > 0
+        if not live.all():
+            vocab_blob, vocab_offsets = _take_blob_rows(vocab_blob, vocab_offsets, live)
+            terms = (np.cumsum(live) - 1)[terms]
+            counts = counts[live]
+        order = np.argsort(terms, kind="stable")
+        postings_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=postings_offsets[1:])
+
+        node_ids, ref_doc_ids, doc_lens = data.node_ids[keep_rows], data.ref_doc_ids[keep_rows], data.doc_lens[keep_rows]
+        if node_terms:
+            node_ids = np.concatenate([node_ids, np.asarray([node_id for node_id, _, _ in node_terms], dtype=str)])
+            ref_doc_ids = np.concatenate([ref_doc_ids, np.asarray([ref_doc_id for _, ref_doc_id, _ in node_terms], dtype=str)])
+            doc_lens = np.concatenate([doc_lens, np.asarray(
+                [sum(counts.values()) for _, _, counts in node_terms], dtype=np.int32
+            )])
+        return _PostingsData(
+            vocab_blob=vocab_blob,
+            vocab_offsets=vocab_offsets,
+            postings_offsets=postings_offsets,
+            postings_rows=rows[order].astype(np.int32),
+            postings_freqs=freqs[order].astype(np.int32),
+            node_ids=node_ids,
+            ref_doc_ids=ref_doc_ids,
+            doc_lens=doc_lens,
+        )
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """Return (node id, BM25 score) pairs for the best matching nodes."""
+        query_terms = set(tokenize(query))
+        data = self._data
+        num_docs = len(data)
+        if not num_docs or not query_terms:
+            return []
+        avg_len = data.total_len() / num_docs
+
+        matched_rows, matched_scores = [], []
+        for term in query_terms:
+            position, found = data.find_term(term.encode("utf-8"))
+            if not found:
+                continue
+            start, end = int(data.postings_offsets[position]), int(data.postings_offsets[position + 1])
+            rows = np.asarray(data.postings_rows[start:end])
+            freqs = data.postings_freqs[start:end].astype(np.float64)
+            idf = math.log(1 + (num_docs - (end - start) + 0.5) / ((end - start) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * data.doc_lens[rows] / avg_len)
+            matched_rows.append(rows)
+            matched_scores.append(idf * freqs * (self.k1 + 1) / (freqs + norm))
+        if not matched_rows:
+            return []
+
+        rows, inverse = np.unique(np.concatenate(matched_rows), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(matched_scores))
+        return [(str(data.node_ids[rows[i]]), float(scores[i])) for i in NumpyVectorStore.top_k(scores, top_k)]
+
+    def save(self, index_dir: str):
+        """Write the index to a directory of .npy files, replacing any previous copy."""
+        data = self._data
+        tmp_dir = index_dir.rstrip(os.sep) + ".tmp"
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        os.makedirs(tmp_dir)
+        for name, array in data.arrays().items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+        with open(os.path.join(tmp_dir, INDEX_FILE), "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "count": len(data)}, f)
+
+        old_dir = index_dir.rstrip(os.sep) + ".old"
+        if os.path.exists(index_dir):
+            if os.path.exists(old_dir):
+                shutil.rmtree(old_dir)
+            os.replace(index_dir, old_dir)
+        os.replace(tmp_dir, index_dir)
+        if os.path.exists(old_dir):
+            # Memory-mapped readers keep their pages after the files are unlinked
+            shutil.rmtree(old_dir)
+
+    @classmethod
+    def load(cls, index_dir: str, mmap: bool = True) -> "BM25Index":
+        """Load an index written by save(), memory-mapping its arrays read-only when mmap is set."""
+        with open(os.path.join(index_dir, INDEX_FILE), "r", encoding="utf-8") as f:
+            info = json.load(f)
+        index = cls(k1=info["k1"], b=info["b"])
+        arrays = {
+            name: _load_array(os.path.join(index_dir, f"{name}.npy"), mmap)
+            for name in _PostingsData.empty().arrays()
+        }
+        index._data = _PostingsData(**arrays)
+        logger.info(f"Loaded BM25 index with {info['count']} nodes from {index_dir}")
+        return index
@@ -0,0 +1,164 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from src.document_loader import DocumentLoader
+from src.document_catalog import DocumentCatalog
+from src.query_batcher import SingleFlight
+from src.metrics import TENANTS_RESIDENT, TENANT_RESIDENT_BYTES, TENANT_LOAD_SECONDS, TENANT_EVICTIONS
+
+logger = logging.getLogger(__name__)
+
+TENANT_MODES = ("off", "user", "workspace")
+
+_SAFE_TENANT_ID = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+def tenant_directory_name(tenant_id: str) -> str:
+    """Directory name for a tenant: the id itself when it is a safe file name, otherwise its hash."""
+    if _SAFE_TENANT_ID.match(tenant_id) and tenant_id not in (".", ".."):
+        return tenant_id
+    return hashlib.sha256(tenant_id.encode()).hexdigest()[:32]
+
+class Tenant:
+    """A tenant's document directory, index and document catalog."""
+
+    def __init__(self, tenant_id: str, docs_path: str, index_manager, catalog: DocumentCatalog):
+        self.tenant_id = tenant_id
+        self.docs_path = docs_path
+        self.index_manager = index_manager
+        self.doc_loader = DocumentLoader(docs_path)
+        self.catalog = catalog
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.load_seconds = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tenant": self.tenant_id,
+            "documents": len(self.index_manager.files),
+            "memory_bytes": self.index_manager.memory_bytes(),
+            "load_seconds": self.load_seconds,
+            "idle_seconds": time.time() - self.last_used,
+        }
+
+class TenantRegistry:
+    """
+    Loads tenant indexes on demand and keeps the recently used ones in memory.
+
+    Every tenant has its own directory under root_dir with a docs folder and a
+    persisted index (see IndexManager's snapshots). A tenant is loaded on its first
+    request and kept in an LRU; when the estimated memory of the resident indexes
+    exceeds memory_budget_bytes, the least recently used tenants are dropped. Every
+    change to an index is persisted when it is made, so evicting a tenant only frees
+    memory and the next request loads it back from disk. Requests that still hold an
+    evicted index finish on it.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        create_index_manager: Callable[[str], Any],
+        run: Callable[..., Awaitable[Any]],
+        memory_budget_bytes: int = 1024 * 1024 * 1024,
+        on_load: Optional[Callable[[Tenant], None]] = None,
+    ):
+        """
+        Args:
+            root_dir: Directory holding one subdirectory per tenant
+            create_index_manager: Returns a new IndexManager persisting to the given directory
+            run: Coroutine function that runs blocking work off the event loop, e.g. WorkerPool.run
+            memory_budget_bytes: Estimated memory the resident indexes may use; the most recently
+                used tenant always stays resident (default: 1 GiB)
+            on_load: Called with each tenant after it is loaded (default: None)
+        """
+        self.root_dir = root_dir
+        self.create_index_manager = create_index_manager
+        self.run = run
+        self.memory_budget_bytes = memory_budget_bytes
+        self.on_load = on_load
+        self._tenants: "OrderedDict[str, Tenant]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loads = SingleFlight("tenant_load")
+        self._evictions = 0
+
+    async def get(self, tenant_id: str) -> Tenant:
+        """Return a tenant, loading its index first if it is not resident."""
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+            if tenant is not None:
+                self._tenants.move_to_end(tenant_id)
+                tenant.last_used = time.time()
+                return tenant
+        # Concurrent first requests for a tenant share one load
+        return await self._loads.run(tenant_id, lambda: self.run(self._load, tenant_id))
+
+    def resident(self) -> List[Tenant]:
+        with self._lock:
+            return list(self._tenants.values())
+
+    def _load(self, tenant_id: str) -> Tenant:
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+        if tenant is not None:
+            return tenant
+
+        start = time.perf_counter()
+        tenant_dir = os.path.join(self.root_dir, tenant_directory_name(tenant_id))
+        docs_path = os.path.join(tenant_dir, "docs")
+        os.makedirs(docs_path, exist_ok=True)
+        index_manager = self.create_index_manager(os.path.join(tenant_dir, "index_storage"))
+        # Tenant folders are only written through the API; files changed outside it are synced on the next load
+        catalog = DocumentCatalog(docs_path, index_manager, self.run, on_changes=None, watch="off")
+        tenant = Tenant(tenant_id, docs_path, index_manager, catalog)
+        index_manager.load_or_create_index(tenant.doc_loader, catalog.load())
+        tenant.load_seconds = time.perf_counter() - start
+        TENANT_LOAD_SECONDS.observe(tenant.load_seconds)
+        if self.on_load is not None:
+            self.on_load(tenant)
+
+        with self._lock:
+            self._tenants[tenant_id] = tenant
+            self._evict()
+        logger.info(f"Loaded tenant {tenant_id} ({len(index_manager.files)} documents) in {tenant.load_seconds:.2f}s")
+        return tenant
+
+    def trim(self):
+        """Evict tenants whose indexes grew past the budget since they were loaded."""
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used tenants until the resident ones fit the budget (caller holds the lock)."""
+        sizes = {tenant_id: tenant.index_manager.memory_bytes() for tenant_id, tenant in self._tenants.items()}
+        total = sum(sizes.values())
+        while total > self.memory_budget_bytes and len(self._tenants) > 1:
+            tenant_id, tenant = self._tenants.popitem(last=False)
+            total -= sizes[tenant_id]
+            self._evictions += 1
+            TENANT_EVICTIONS.inc()
+            logger.info(
+                f"Evicted tenant {tenant_id} ({sizes[tenant_id] / 1e6:.1f} MB, "
+                f"idle {time.time() - tenant.last_used:.0f}s) to stay within the memory budget"
+            )
+        TENANTS_RESIDENT.set(len(self._tenants))
+        TENANT_RESIDENT_BYTES.set(total)
+
+    def stats(self, tenant_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Return totals over the resident tenants and the eviction count.
+
+        Only the given tenant's own entry is included (None if it is not resident), so
+        callers never see which other tenants are loaded.
+        """
+        tenants = {tenant.tenant_id: tenant.stats() for tenant in self.resident()}
+        return {
+            "resident": len(tenants),
+            "memory_bytes": sum(tenant["memory_bytes"] for tenant in tenants.values()),
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "evictions": self._evictions,
+            "tenant": tenants.get(tenant_id) if tenant_id else None,
+        }
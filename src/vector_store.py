@@ -0,0 +1,369 @@
+import os
+import json
+import shutil
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import metadata_dict_to_node
+
+logger = logging.getLogger(__name__)
+
+VECTOR_DTYPES = ("float32", "float16", "int8")
+STORE_FILE = "store.json"
+# Quantized rows are upcast and scored in cache-sized blocks so the float32 copy
+# never spans the whole matrix
+SCORE_BLOCK_ROWS = 4096
+
+def _blob_from_strings(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack strings into one UTF-8 byte array plus an offsets array of length n + 1."""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8).copy()
+    return blob, offsets
+
+def _take_blob_rows(blob: np.ndarray, offsets: np.ndarray, keep: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Keep only the rows selected by a boolean mask from a packed string table."""
+    lengths = np.diff(offsets)
+    new_offsets = np.zeros(int(keep.sum()) + 1, dtype=np.int64)
+    np.cumsum(lengths[keep], out=new_offsets[1:])
+    return blob[np.repeat(keep, lengths)], new_offsets
+
+def _load_array(path: str, mmap: bool) -> np.ndarray:
+    """Load a .npy file, memory-mapped read-only when mmap is set."""
+    if not mmap:
+        return np.load(path)
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        # Empty arrays cannot be memory-mapped
+        return np.load(path)
+
+class _StoreData:
+    """Immutable snapshot of the store; mutations build a new one and swap it in."""
+
+    def __init__(self, embeddings, scales, node_ids, ref_doc_ids, text_blob, text_offsets, meta_blob, meta_offsets):
+        self.embeddings = embeddings
+        self.scales = scales
+        self.node_ids = node_ids
+        self.ref_doc_ids = ref_doc_ids
+        self.text_blob = text_blob
+        self.text_offsets = text_offsets
+        self.meta_blob = meta_blob
+        self.meta_offsets = meta_offsets
+        self._row_of: Optional[Dict[str, int]] = None
+
+    def row_of(self) -> Dict[str, int]:
+        """Map of node id to row, built once per snapshot."""
+        if self._row_of is None:
+            self._row_of = {node_id: row for row, node_id in enumerate(self.node_ids.tolist())}
+        return self._row_of
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    @classmethod
+    def empty(cls, dtype: str, dim: int = 0) -> "_StoreData":
+        return cls(
+            embeddings=np.zeros((0, dim), dtype=dtype),
+            scales=np.zeros(0, dtype=np.float32),
+            node_ids=np.zeros(0, dtype="<U1"),
+            ref_doc_ids=np.zeros(0, dtype="<U1"),
+            text_blob=np.zeros(0, dtype=np.uint8),
+            text_offsets=np.zeros(1, dtype=np.int64),
+            meta_blob=np.zeros(0, dtype=np.uint8),
+            meta_offsets=np.zeros(1, dtype=np.int64),
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "embeddings": self.embeddings,
+            "scales": self.scales,
+            "node_ids": self.node_ids,
+            "ref_doc_ids": self.ref_doc_ids,
+            "text_blob": self.text_blob,
+            "text_offsets": self.text_offsets,
+            "meta_blob": self.meta_blob,
+            "meta_offsets": self.meta_offsets,
+        }
+
+class NumpyVectorStore(BasePydanticVectorStore):
+    """
+    Vector store backed by one contiguous NumPy matrix of normalized embeddings.
+
+    Embeddings are kept as float32, float16 or int8 (with a per-row scale) and scored
+    with a single matrix product and argpartition top-k. Node ids, ref doc ids, text
+    and node metadata live in separate array-backed tables rather than per-node
+    Python objects. A persisted store can be memory-mapped read-only.
+
+    Mutations are copy-on-write, so a query always sees a consistent snapshot.
+    """
+
+    stores_text: bool = True
+    dtype: str = "float32"
+
+    _data: _StoreData = PrivateAttr()
+    _write_lock: Any = PrivateAttr()
+
+    def __init__(self, dtype: str = "float32", **kwargs: Any):
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unknown vector dtype: {dtype}. Expected one of {VECTOR_DTYPES}")
+        super().__init__(dtype=dtype, **kwargs)
+        self._data = _StoreData.empty(dtype)
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "NumpyVectorStore"
+
+    @property
+    def client(self) -> None:
+        return None
+
+    def count(self) -> int:
+        """Number of stored nodes."""
+        return len(self._data)
+
+    def nbytes(self) -> int:
+        """Bytes used by the embedding matrix and the node tables."""
+        return int(sum(array.nbytes for array in self._data.arrays().values()))
+
+    def _quantize(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 0, norms, 1.0)
+        if self.dtype == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+            quantized = np.rint(vectors / scales[:, None]).astype(np.int8)
+            return quantized, scales
+        return vectors.astype(self.dtype), np.ones(len(vectors), dtype=np.float32)
+
+    def add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> List[str]:
+        """Add embedded nodes to the store."""
+        self.replace([], nodes)
+        return [node.node_id for node in nodes]
+
+    def replace(self, ref_doc_ids: Sequence[str], nodes: Sequence[BaseNode]):
+        """
+        Delete the nodes of the given source documents and add new nodes in one step.
+
+        Queries see either the old or the new contents, never a mix of the two.
+        """
+        rows = self._rows_from_nodes(nodes) if nodes else None
+        with self._write_lock:
+            data = self._data
+            if len(ref_doc_ids):
+                data = self._take(data, ~np.isin(data.ref_doc_ids, list(ref_doc_ids)))
+            if rows is not None:
+                data = self._concat(data, rows)
+            self._data = data
+
+    def _rows_from_nodes(self, nodes: Sequence[BaseNode]) -> _StoreData:
+        for node in nodes:
+            if node.embedding is None:
+                raise ValueError(f"Node {node.node_id} has no embedding")
+
+        embeddings, scales = self._quantize(np.asarray([node.embedding for node in nodes], dtype=np.float32))
+        text_blob, text_offsets = _blob_from_strings(
+            [node.get_content(metadata_mode=MetadataMode.NONE) for node in nodes]
+        )
+        meta_blob, meta_offsets = _blob_from_strings([self._node_metadata(node) for node in nodes])
+        return _StoreData(
+            embeddings=embeddings,
+            scales=scales,
+            node_ids=np.asarray([node.node_id for node in nodes]),
+            ref_doc_ids=np.asarray([node.ref_doc_id or "" for node in nodes]),
+            text_blob=text_blob,
+            text_offsets=text_offsets,
+            meta_blob=meta_blob,
+            meta_offsets=meta_offsets,
+        )
+
+    @staticmethod
+    def _concat(data: _StoreData, rows: _StoreData) -> _StoreData:
+        if not len(data):
+            return rows
+        if data.embeddings.shape[1] != rows.embeddings.shape[1]:
+            raise ValueError(
+                f"Embedding dimension {rows.embeddings.shape[1]} does not match the store ({data.embeddings.shape[1]})"
+            )
+        return _StoreData(
+            embeddings=np.concatenate([data.embeddings, rows.embeddings]),
+            scales=np.concatenate([data.scales, rows.scales]),
+            node_ids=np.concatenate([data.node_ids, rows.node_ids]),
+            ref_doc_ids=np.concatenate([data.ref_doc_ids, rows.ref_doc_ids]),
+            text_blob=np.concatenate([data.text_blob, rows.text_blob]),
+            text_offsets=np.concatenate([data.text_offsets, rows.text_offsets[1:] + data.text_offsets[-1]]),
+            meta_blob=np.concatenate([data.meta_blob, rows.meta_blob]),
+            meta_offsets=np.concatenate([data.meta_offsets, rows.meta_offsets[1:] + data.meta_offsets[-1]]),
+        )
+
+    @staticmethod
+    def _take(data: _StoreData, keep: np.ndarray) -> _StoreData:
+        if keep.all():
+            return data
+        text_blob, text_offsets = _take_blob_rows(data.text_blob, data.text_offsets, keep)
+        meta_blob, meta_offsets = _take_blob_rows(data.meta_blob, data.meta_offsets, keep)
+        return _StoreData(
+            embeddings=data.embeddings[keep],
+            scales=data.scales[keep],
+            node_ids=data.node_ids[keep],
+            ref_doc_ids=data.ref_doc_ids[keep],
+            text_blob=text_blob,
+            text_offsets=text_offsets,
+            meta_blob=meta_blob,
+            meta_offsets=meta_offsets,
+        )
+
+    @staticmethod
+    def _node_metadata(node: BaseNode) -> str:
+        node_dict = node.model_dump(mode="json")
+        node_dict["text"] = ""
+        node_dict.pop("text_resource", None)
+        node_dict["embedding"] = None
+        return json.dumps({
+            "_node_content": json.dumps(node_dict, ensure_ascii=False),
+            "_node_type": node.class_name(),
+        }, ensure_ascii=False)
+
+    def _remove_rows(self, remove: Callable[[_StoreData], np.ndarray]):
+        with self._write_lock:
+            self._data = self._take(self._data, ~remove(self._data))
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        """Delete all nodes of a source document."""
+        self._remove_rows(lambda data: data.ref_doc_ids == ref_doc_id)
+
+    def delete_nodes(self, node_ids: Optional[List[str]] = None, filters=None, **delete_kwargs: Any) -> None:
+        """Delete nodes by id."""
+        if filters is not None:
+            raise NotImplementedError("Metadata filters are not supported by NumpyVectorStore")
+        if node_ids:
+            self._remove_rows(lambda data: np.isin(data.node_ids, node_ids))
+
+    def clear(self) -> None:
+        with self._write_lock:
+            self._data = _StoreData.empty(self.dtype)
+
+    def _get_node(self, data: _StoreData, row: int) -> BaseNode:
+        text = bytes(data.text_blob[data.text_offsets[row]:data.text_offsets[row + 1]]).decode("utf-8")
+        meta = json.loads(bytes(data.meta_blob[data.meta_offsets[row]:data.meta_offsets[row + 1]]).decode("utf-8"))
+        return metadata_dict_to_node(meta, text=text)
+
+    def get_nodes(self, node_ids: Optional[List[str]] = None, filters=None) -> List[BaseNode]:
+        """Get nodes by id, in the order requested."""
+        if filters is not None:
+            raise NotImplementedError("Metadata filters are not supported by NumpyVectorStore")
+        data = self._data
+        if node_ids is None:
+            return [self._get_node(data, row) for row in range(len(data))]
+        rows = data.row_of()
+        return [self._get_node(data, rows[node_id]) for node_id in node_ids if node_id in rows]
+
+    def score(self, query_embeddings: np.ndarray, data: Optional[_StoreData] = None) -> np.ndarray:
+        """Cosine similarity of each query row against every stored embedding: shape (queries, nodes)."""
+        data = data or self._data
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms > 0, norms, 1.0)
+        if data.embeddings.dtype == np.float32:
+            return queries @ data.embeddings.T
+
+        scores = np.empty((len(queries), len(data)), dtype=np.float32)
+        buffer = np.empty((min(SCORE_BLOCK_ROWS, len(data)), data.embeddings.shape[1]), dtype=np.float32)
+        for start in range(0, len(data), SCORE_BLOCK_ROWS):
+            block = data.embeddings[start:start + SCORE_BLOCK_ROWS]
+            upcast = buffer[:len(block)]
+            upcast[...] = block
+            scores[:, start:start + len(block)] = queries @ upcast.T
+        if data.embeddings.dtype == np.int8:
+            scores *= data.scales
+        return scores
+
+    @staticmethod
+    def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k highest scores, best first."""
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        return candidates[np.argsort(-scores[candidates])]
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        """Return the top-k most similar nodes to the query embedding."""
+        if query.filters is not None:
+            raise NotImplementedError("Metadata filters are not supported by NumpyVectorStore")
+        data = self._data
+        if not len(data) or query.query_embedding is None:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+        scores = self.score(query.query_embedding, data)[0]
+        # VectorStoreIndex.as_retriever() passes node_ids=[] for stores that keep
+        # their own text, so an empty list means "no restriction"
+        if query.doc_ids:
+            scores = np.where(np.isin(data.ref_doc_ids, query.doc_ids), scores, -np.inf)
+        if query.node_ids:
+            scores = np.where(np.isin(data.node_ids, query.node_ids), scores, -np.inf)
+
+        return self._result(data, scores, query.similarity_top_k)
+
+    def query_batch(self, query_embeddings: Sequence[Sequence[float]], similarity_top_k: int) -> List[VectorStoreQueryResult]:
+        """Return the top-k nodes for several query embeddings, scored with one matrix product."""
+        data = self._data
+        if not len(data) or not len(query_embeddings):
+            return [VectorStoreQueryResult(nodes=[], similarities=[], ids=[]) for _ in query_embeddings]
+
+        scores = self.score(np.asarray(query_embeddings, dtype=np.float32), data)
+        return [self._result(data, row_scores, similarity_top_k) for row_scores in scores]
+
+    def _result(self, data: _StoreData, scores: np.ndarray, k: int) -> VectorStoreQueryResult:
+        rows = [row for row in self.top_k(scores, k) if np.isfinite(scores[row])]
+        return VectorStoreQueryResult(
+            nodes=[self._get_node(data, row) for row in rows],
+            similarities=[float(scores[row]) for row in rows],
+            ids=[str(data.node_ids[row]) for row in rows],
+        )
+
+    def save(self, store_dir: str):
+        """Write the store to a directory of .npy files, replacing any previous copy."""
+        data = self._data
+        tmp_dir = store_dir.rstrip(os.sep) + ".tmp"
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        os.makedirs(tmp_dir)
+        for name, array in data.arrays().items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+        with open(os.path.join(tmp_dir, STORE_FILE), "w", encoding="utf-8") as f:
+            json.dump({"dtype": self.dtype, "count": len(data)}, f)
+
+        old_dir = store_dir.rstrip(os.sep) + ".old"
+        if os.path.exists(store_dir):
+            if os.path.exists(old_dir):
+                shutil.rmtree(old_dir)
+            os.replace(store_dir, old_dir)
+        os.replace(tmp_dir, store_dir)
+        if os.path.exists(old_dir):
+            # Memory-mapped readers keep their pages after the files are unlinked
+            shutil.rmtree(old_dir)
+
+    @classmethod
+    def load(cls, store_dir: str, mmap: bool = True) -> "NumpyVectorStore":
+        """Load a saved store, memory-mapping its arrays read-only when mmap is set."""
+        with open(os.path.join(store_dir, STORE_FILE), "r", encoding="utf-8") as f:
+            info = json.load(f)
+        store = cls(dtype=info["dtype"])
+        arrays = {
+            name: _load_array(os.path.join(store_dir, f"{name}.npy"), mmap)
+            for name in _StoreData.empty(info["dtype"]).arrays()
+        }
+        store._data = _StoreData(**arrays)
+        logger.info(f"Loaded {info['count']} vectors ({info['dtype']}) from {store_dir}")
+        return store
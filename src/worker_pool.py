@@ -0,0 +1,108 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+from src.metrics import record_stage
+
+logger = logging.getLogger(__name__)
+
+class PoolSaturatedError(Exception):
+    """Raised when the worker pool and its queue are full."""
+
+class WorkerPool:
+    """
+    Bounded thread pool for the blocking stages of a request (embedding, retrieval,
+    LlamaIndex synthesis, indexing) so they never run on the event loop.
+
+    At most max_workers tasks run at once and at most max_queue more wait for a
+    worker. Anything beyond that is rejected immediately with PoolSaturatedError
+    instead of piling up behind slow requests.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 32, name: str = "rag-worker"):
+        """
+        Args:
+            max_workers: Number of worker threads (default: 4)
+            max_queue: Number of tasks allowed to wait for a free worker (default: 32)
+            name: Thread name prefix (default: "rag-worker")
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0  # queued + running
+        self._active = 0
+        self._submitted = 0
+        self._rejected = 0
+        self._completed = 0
+        self._failed = 0
+        self._started = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the pool and await its result."""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise PoolSaturatedError(
+                    f"Worker pool saturated ({self._pending} tasks in flight, max queue {self.max_queue})"
+                )
+            self._pending += 1
+            self._submitted += 1
+
+        enqueued_at = time.perf_counter()
+        # Carry request context (e.g. stage timings) into the worker thread
+        context = contextvars.copy_context()
+
+        def task():
+            wait = time.perf_counter() - enqueued_at
+            with self._lock:
+                self._active += 1
+                self._started += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+            context.run(record_stage, "pool_wait", wait)
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self._active -= 1
+
+        future = self._executor.submit(task)
+        # Release the slot when the task finishes or is cancelled before it starts,
+        # even if the awaiting request has already gone away
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _on_done(self, future):
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of queue depth, utilisation and wait times."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queue_depth": self._pending - self._active,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_wait_seconds": self._total_wait / self._started if self._started else 0.0,
+                "max_wait_seconds": self._max_wait,
+            }
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting work and release the worker threads."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        logger.info("Worker pool shut down")